@@ -0,0 +1,112 @@
+"""Mesure l'instantané en colonnes (Arrow) face aux lectures par objets Python
+
+Sur les données du générateur (benchmarks/generateur.py), pour N séances
+(une année universitaire par tranche de 100 000) :
+- construction complète de l'instantané, puis coût d'une modification avec
+  et sans instantané (seul le mois touché est réécrit) ;
+- DataFrame d'une semaine du calendrier : liste de séances + pd.to_datetime
+  contre lecture des colonnes projetées en mémoire ;
+- budget par enseignant sur toutes les années : lecture en flux de la
+  sauvegarde JSON (CLI budget) contre agrégation pyarrow de l'instantané.
+
+Nécessite pandas et pyarrow.
+Usage : python benchmarks/bench_colonnes.py [nb_seances ...] [--graine N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_sauvegarde import mesurer
+from generateur import PREMIERE_ANNEE, dimensions, ecrire, generer, jours_ouvres
+from planning.cli import main as cli
+from planning.colonnes import vers_dataframe
+from planning.seances import avec_noms
+from planning.stockage import ouvrir_stockage
+
+TAILLES = (100_000,)
+# Semaine pleine de la première année universitaire, comme dans suite.py
+JOUR = jours_ouvres(PREMIERE_ANNEE)[len(jours_ouvres(PREMIERE_ANNEE)) // 3]
+SEMAINE = JOUR - timedelta(days=JOUR.weekday())
+
+
+def dataframe_objets(stockage):
+    """Ancien chemin du calendrier : séances de la semaine en dicts, dates réinterprétées"""
+    import pandas as pd
+
+    seances = stockage.seances_entre(SEMAINE, SEMAINE + timedelta(days=6))
+    df = pd.DataFrame([avec_noms(stockage.index, s) for s in seances])
+    df['Date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def dataframe_colonnes(stockage):
+    df = vers_dataframe(stockage.colonnes_entre(SEMAINE, SEMAINE + timedelta(days=6)), stockage.index)
+    df['Date'] = df['date']
+    return df
+
+
+def chronometrer(fonction):
+    debut = time.perf_counter()
+    resultat = fonction()
+    return (time.perf_counter() - debut) * 1000, resultat
+
+
+def budget_cli(chemin, *options):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        cli(["--stockage", chemin, "budget", "--par", "enseignant", *options])
+
+
+def bench(nb_seances, dossier, graine=0):
+    chemin = os.path.join(dossier, f"colonnes-{nb_seances}.json")
+    ecrire(chemin, generer(nb_seances, graine))
+    annees = dimensions(nb_seances)[0]
+
+    simple = ouvrir_stockage(chemin)
+    simple.charger()
+    stockage = ouvrir_stockage(chemin, colonnes=True)
+    stockage.charger()
+    duree_construction, mois = chronometrer(stockage.actualiser_colonnes)
+
+    def modification(stockage):
+        def modifier(i):
+            seance = dict(stockage.index.element("seances", 1 + i))
+            seance["matiere"] = f"Matière {i}"
+            stockage.modifier("seances", seance)
+        return modifier
+
+    ecriture_simple = mesurer(modification(simple))
+    ecriture_colonnes = mesurer(modification(stockage))
+    stockage.charger()
+
+    objets = mesurer(lambda i: dataframe_objets(stockage))
+    colonnes = mesurer(lambda i: dataframe_colonnes(stockage))
+    lignes = len(dataframe_colonnes(stockage))
+
+    budget_flux = mesurer(lambda i: budget_cli(chemin), repetitions=3)
+    budget_colonnes = mesurer(lambda i: budget_cli(chemin, "--colonnes"), repetitions=3)
+    simple.fermer()
+    stockage.fermer()
+
+    print(f"{nb_seances} séances sur {annees} an(s)")
+    print(f"  instantané      : {duree_construction:>8.1f} ms ({len(mois)} fichiers)")
+    print(f"  modification    : {ecriture_simple:>8.2f} ms sans instantané | {ecriture_colonnes:>8.2f} ms avec")
+    print(f"  semaine ({lignes:>4} l.): {objets:>8.2f} ms objets | {colonnes:>8.2f} ms colonnes")
+    print(f"  budget {annees:>2} an(s): {budget_flux:>8.1f} ms flux JSON | {budget_colonnes:>8.1f} ms colonnes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Instantané en colonnes face aux lectures par objets Python")
+    parser.add_argument("tailles", type=int, nargs="*", default=TAILLES, metavar="nb_seances")
+    parser.add_argument("--graine", type=int, default=0)
+    arguments = parser.parse_args()
+    with tempfile.TemporaryDirectory() as dossier:
+        for nb_seances in arguments.tailles:
+            bench(nb_seances, dossier, arguments.graine)
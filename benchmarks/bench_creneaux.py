@@ -0,0 +1,77 @@
+"""Compare la résolution des horaires : apply() ligne à ligne contre table vectorisée
+
+Lignes : séances du générateur (benchmarks/generateur.py).
+Usage : python benchmarks/bench_creneaux.py [nb_lignes] [--graine N]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generateur import generer
+from planning.creneaux import JOURS, ajouter_colonnes_horaires
+
+NB_LIGNES = 100_000
+
+
+# Ancienne implémentation (déduction par sous-chaîne et strptime à chaque appel)
+def ancien_heure_debut(creneau):
+    if "matin" in creneau.lower():
+        return datetime.strptime("08:30", "%H:%M") if "1" in creneau or "4h" in creneau else datetime.strptime("10:30", "%H:%M")
+    return datetime.strptime("14:30", "%H:%M") if "1" in creneau or "4h" in creneau else datetime.strptime("16:30", "%H:%M")
+
+
+def ancien_heure_fin(creneau):
+    if "matin" in creneau.lower():
+        return datetime.strptime("10:30", "%H:%M") if "1" in creneau else datetime.strptime("12:30", "%H:%M")
+    return datetime.strptime("16:30", "%H:%M") if "1" in creneau else datetime.strptime("18:30", "%H:%M")
+
+
+def ancienne_preparation(df):
+    df['Jour'] = df['Date'].apply(lambda x: JOURS[x.date().weekday()])
+    df['Début'] = df['creneau'].apply(ancien_heure_debut)
+    df['Fin'] = df['creneau'].apply(ancien_heure_fin)
+    df['Jour'] = pd.Categorical(df['Jour'], categories=JOURS, ordered=True)
+    return df
+
+
+def generer_dataframe(nb_lignes, graine=0):
+    """Colonnes Date et creneau des séances, comme dans le calendrier"""
+    seances = generer(nb_lignes, graine)["seances"]
+    return pd.DataFrame({
+        "Date": pd.to_datetime([s["date"] for s in seances]),
+        "creneau": [s["creneau"] for s in seances]
+    })
+
+
+def chronometrer(fonction, df):
+    debut = time.perf_counter()
+    resultat = fonction(df.copy())
+    return (time.perf_counter() - debut) * 1000, resultat
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Résolution des horaires : apply() contre table vectorisée")
+    parser.add_argument("nb_lignes", type=int, nargs="?", default=NB_LIGNES)
+    parser.add_argument("--graine", type=int, default=0)
+    arguments = parser.parse_args(arguments)
+    nb_lignes = arguments.nb_lignes
+    df = generer_dataframe(nb_lignes, arguments.graine)
+    duree_apply, ancien = chronometrer(ancienne_preparation, df)
+    duree_table, nouveau = chronometrer(ajouter_colonnes_horaires, df)
+
+    identiques = all(ancien[c].equals(nouveau[c]) for c in ("Jour", "Début", "Fin"))
+    print(f"{nb_lignes} lignes")
+    print(f"  apply() ligne à ligne  {duree_apply:10.1f} ms")
+    print(f"  table vectorisée       {duree_table:10.1f} ms  (x{duree_apply / duree_table:.0f})")
+    print(f"  résultats identiques : {identiques}")
+
+
+if __name__ == "__main__":
+    main()
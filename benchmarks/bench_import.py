@@ -0,0 +1,70 @@
+"""Mesure l'import en masse d'un fichier CSV de séances
+
+Les lignes reprennent les séances du générateur (benchmarks/generateur.py),
+importées dans un stockage qui n'en contient aucune.
+Usage : python benchmarks/bench_import.py [nb_lignes ...] [--graine N]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generateur import ecrire, generer
+from planning.importation import analyser, importer, lire_lignes
+from planning.stockage import StockageJSON
+
+TAILLES = (1_000, 10_000)
+
+
+def generer_csv(data):
+    """Fichier CSV des séances du générateur, groupes et enseignants désignés par leur nom"""
+    groupes = {g["id"]: g["nom"] for g in data["groupes"]}
+    enseignants = {e["id"]: f"{e['prenom']} {e['nom']}" for e in data["enseignants"]}
+    sortie = io.StringIO()
+    ecrivain = csv.writer(sortie, delimiter=";")
+    ecrivain.writerow(["Date", "Créneau", "Groupe", "Enseignant", "Matière"])
+    for seance in data["seances"]:
+        ecrivain.writerow([
+            date.fromisoformat(seance["date"]).strftime("%d/%m/%Y"), seance["creneau"],
+            groupes[seance["groupe_id"]], enseignants[seance["enseignant_id"]], seance["matiere"]
+        ])
+    return sortie.getvalue().encode("utf-8")
+
+
+def mesurer(nb_lignes, graine=0):
+    data = generer(nb_lignes, graine)
+    contenu = generer_csv(data)
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "sauvegardes.json")
+        # Référentiel du générateur, sans ses séances : toutes les lignes sont nouvelles
+        ecrire(chemin, dict(data, seances=[]))
+        stockage = StockageJSON(chemin)
+
+        debut = time.perf_counter()
+        apercu = analyser(stockage, lire_lignes(io.BytesIO(contenu), "seances.csv"))
+        milieu = time.perf_counter()
+        importer(stockage, apercu)
+        fin = time.perf_counter()
+
+        # Deuxième passage : toutes les lignes sont des doublons
+        doublons = len(analyser(stockage, lire_lignes(io.BytesIO(contenu), "seances.csv")).doublons)
+
+    print(f"{nb_lignes:>7} lignes | analyse {(milieu - debut) * 1000:>8.1f} ms | "
+          f"écriture {(fin - milieu) * 1000:>8.1f} ms | {len(apercu.a_ajouter)} ajoutées, "
+          f"{len(apercu.erreurs)} erreurs, {doublons} doublons au second passage")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import en masse d'un fichier CSV de séances")
+    parser.add_argument("tailles", type=int, nargs="*", default=TAILLES, metavar="nb_lignes")
+    parser.add_argument("--graine", type=int, default=0)
+    arguments = parser.parse_args()
+    for nb_lignes in arguments.tailles:
+        mesurer(nb_lignes, arguments.graine)
@@ -0,0 +1,61 @@
+"""Coût du chronométrage des spans, désactivé et activé
+
+Désactivé (PLANNING_MESURES absent), `mesurer` retourne un contexte vide
+partagé et `chronometre` ne décore pas : on mesure le coût d'un bloc
+`with mesurer(...)` et d'un appel de fonction « décorée ». Activé, chaque
+span ajoute une ligne au fichier JSON lines. Une relance de l'interface
+ouvre une dizaine de spans.
+
+Usage : python benchmarks/bench_mesures.py [nb_iterations]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.pop("PLANNING_MESURES", None)
+from planning.mesures import Mesures, chronometre, mesurer
+
+ITERATIONS = 200_000
+
+
+def par_iteration(fonction, iterations):
+    """Durée moyenne d'un appel en nanosecondes"""
+    debut = time.perf_counter()
+    for _ in range(iterations):
+        fonction()
+    return (time.perf_counter() - debut) / iterations * 1e9
+
+
+def vide():
+    pass
+
+
+def bloc_desactive():
+    with mesurer("span"):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coût du chronométrage des spans")
+    parser.add_argument("iterations", type=int, nargs="?", default=ITERATIONS, metavar="nb_iterations")
+    iterations = parser.parse_args().iterations
+    reference = par_iteration(vide, iterations)
+    decoree = par_iteration(chronometre("span")(vide), iterations)
+    desactive = par_iteration(bloc_desactive, iterations)
+    with tempfile.TemporaryDirectory() as dossier:
+        mesures = Mesures(os.path.join(dossier, "mesures.jsonl"))
+
+        def bloc_active():
+            with mesures.span("span", onglet="Calendrier"):
+                pass
+
+        active = par_iteration(bloc_active, iterations // 10)
+        mesures.fermer()
+    print(f"appel de référence          : {reference:>8.0f} ns")
+    print(f"fonction décorée, désactivé : {decoree:>8.0f} ns")
+    print(f"bloc mesuré, désactivé      : {desactive:>8.0f} ns")
+    print(f"bloc mesuré, activé         : {active:>8.0f} ns (ligne JSON écrite)")
@@ -0,0 +1,76 @@
+"""Compare la latence d'une sauvegarde : réécriture complète contre journal
+
+Données du générateur (benchmarks/generateur.py).
+Usage : python benchmarks/bench_sauvegarde.py [nb_seances ...] [--repetitions N] [--graine N]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generateur import generer
+from planning.journal import FSYNC_COMPACTION, FSYNC_JAMAIS, FSYNC_TOUJOURS
+from planning.stockage import StockageJSON
+
+TAILLES = (1_000, 10_000, 100_000)
+REPETITIONS = 20
+
+
+def mesurer(fonction, repetitions=REPETITIONS):
+    """Retourne la durée médiane d'un appel en millisecondes"""
+    durees = []
+    for i in range(repetitions):
+        debut = time.perf_counter()
+        fonction(i)
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return durees[len(durees) // 2]
+
+
+def bench(nb_seances, dossier, repetitions=REPETITIONS, graine=0):
+    data = generer(nb_seances, graine)
+    chemin_complet = os.path.join(dossier, f"complet_{nb_seances}.json")
+
+    def reecriture_complete(i):
+        # Comportement historique de sauvegarder_donnees()
+        data["seances"][0]["matiere"] = f"Algorithmique {i}"
+        with open(chemin_complet, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+
+    resultats = {"réécriture complète": mesurer(reecriture_complete, repetitions)}
+
+    for politique in (FSYNC_JAMAIS, FSYNC_COMPACTION, FSYNC_TOUJOURS):
+        chemin = os.path.join(dossier, f"journal_{politique}_{nb_seances}.json")
+        stockage = StockageJSON(chemin, fsync=politique, seuil_compaction=repetitions + 1)
+        stockage.sauvegarder(generer(nb_seances, graine))
+        seance = dict(data["seances"][0])
+
+        def journal(i):
+            seance["matiere"] = f"Algorithmique {i}"
+            stockage.modifier("seances", dict(seance))
+
+        resultats[f"journal (fsync {politique})"] = mesurer(journal, repetitions)
+
+    return resultats
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Latence d'une sauvegarde : réécriture complète contre journal")
+    parser.add_argument("tailles", type=int, nargs="*", default=TAILLES, metavar="nb_seances")
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS)
+    parser.add_argument("--graine", type=int, default=0)
+    arguments = parser.parse_args(arguments)
+    with tempfile.TemporaryDirectory() as dossier:
+        for nb_seances in arguments.tailles:
+            print(f"{nb_seances} séances")
+            for nom, duree in bench(nb_seances, dossier, arguments.repetitions, arguments.graine).items():
+                print(f"  {nom:<28} {duree:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Compare l'ancien format des séances (noms recopiés, dicts) au format compact
+
+Pour N séances au format ancien (noms, durée et tarif recopiés) :
+- taille de la sauvegarde JSON et de la base SQLite avant et après migration ;
+- mémoire des séances chargées : dicts anciens, dicts normalisés, Seance ;
+- mémoire totale d'un stockage chargé (index et agrégats compris) ;
+- vérification que la migration est sans perte : chaque séance migrée,
+  complétée par jointure (`avec_noms`), redonne exactement l'ancienne.
+
+Les séances sont celles du générateur (benchmarks/generateur.py), remises
+au format ancien par jointure.
+Usage : python benchmarks/bench_seances.py [nb_seances ...] [--graine N]
+"""
+import argparse
+import gc
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generateur import generer
+from planning.index import IndexDonnees
+from planning.journal import ecrire_instantane
+from planning.restauration import migrer_seances
+from planning.seances import Seance, avec_noms
+from planning.stockage import ouvrir_stockage
+
+TAILLES = (100_000,)
+
+# Table des séances telle que la créaient les versions à noms recopiés
+SEANCES_ANCIENNES = """
+CREATE TABLE seances (
+    id INTEGER PRIMARY KEY, date TEXT NOT NULL, creneau TEXT NOT NULL, duree INTEGER,
+    groupe TEXT, groupe_id INTEGER, promotion TEXT, promo_id INTEGER, enseignant TEXT,
+    enseignant_id INTEGER, matiere TEXT, tarif REAL, cout REAL NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 1
+)
+"""
+COLONNES_ANCIENNES = (
+    "id", "date", "creneau", "duree", "groupe", "groupe_id", "promotion", "promo_id",
+    "enseignant", "enseignant_id", "matiere", "tarif", "cout", "version"
+)
+
+
+def generer_donnees_anciennes(nb_seances, graine=0):
+    """Données du générateur, séances au format ancien (noms, durée et tarif recopiés)"""
+    data = generer(nb_seances, graine)
+    index = IndexDonnees(data)
+    data["seances"] = [dict(avec_noms(index, seance), version=1) for seance in data["seances"]]
+    return data
+
+
+def memoire(construire):
+    """Retourne (objet construit, octets alloués qu'il retient)"""
+    gc.collect()
+    tracemalloc.start()
+    objet = construire()
+    gc.collect()
+    taille = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objet, taille
+
+
+def creer_base_ancienne(chemin, data):
+    """Base SQLite au schéma ancien, remplie avec les données"""
+    connexion = sqlite3.connect(chemin)
+    connexion.execute(SEANCES_ANCIENNES)
+    connexion.executemany(
+        f"INSERT INTO seances VALUES ({', '.join('?' * len(COLONNES_ANCIENNES))})",
+        ([s[c] for c in COLONNES_ANCIENNES] for s in data["seances"])
+    )
+    connexion.commit()
+    connexion.close()
+    # Les autres tables sont créées à l'ouverture
+    stockage = ouvrir_stockage(chemin)
+    for collection in ("enseignants", "sessions", "promotions", "groupes"):
+        stockage.ajouter_lot(collection, data[collection])
+    stockage.fermer()
+
+
+def taille_mo(chemin):
+    return os.path.getsize(chemin) / 1e6
+
+
+def bench(nb_seances, dossier, graine=0):
+    data = generer_donnees_anciennes(nb_seances, graine)
+    chemin_json = os.path.join(dossier, f"anciennes-{nb_seances}.json")
+    ecrire_instantane(chemin_json, data)
+    texte = json.dumps(data["seances"])
+
+    # Mémoire des seules séances, telles que décodées puis converties
+    anciennes, octets_anciens = memoire(lambda: json.loads(texte))
+    normalisees = [{c: s[c] for c in s if c not in ("duree", "groupe", "promotion", "enseignant", "tarif")} for s in anciennes]
+    texte_normalise = json.dumps(normalisees)
+    del anciennes, normalisees
+    _, octets_normalises = memoire(lambda: json.loads(texte_normalise))
+    _, octets_compacts = memoire(lambda: [Seance(s) for s in json.loads(texte_normalise)])
+
+    # Stockage complet chargé (index, agrégats, index des conflits)
+    def charger(chemin):
+        stockage = ouvrir_stockage(chemin)
+        stockage.charger()
+        return stockage
+
+    stockage, octets_stockage_ancien = memoire(lambda: charger(chemin_json))
+    debut = time.perf_counter()
+    _, conserves = migrer_seances(stockage)
+    duree_migration = time.perf_counter() - debut
+    stockage.fermer()
+    del stockage
+    stockage, octets_stockage_compact = memoire(lambda: charger(chemin_json))
+
+    # Sans perte : jointure des séances migrées == séances d'origine
+    migrees = {s["id"]: s for s in stockage.charger()["seances"]}
+    differences = sum(
+        1 for s in data["seances"]
+        if {k: v for k, v in avec_noms(stockage.index, migrees[s["id"]]).items() if k != "version"}
+        != {k: v for k, v in s.items() if k != "version"}
+    )
+    taille_json_compacte = taille_mo(chemin_json)
+    archive_json = taille_mo(stockage.chemin_archive(1))
+    stockage.fermer()
+
+    # SQLite : base ancienne, puis migrée et compactée
+    chemin_sqlite = os.path.join(dossier, f"anciennes-{nb_seances}.db")
+    creer_base_ancienne(chemin_sqlite, data)
+    taille_sqlite_ancienne = taille_mo(chemin_sqlite)
+    base = ouvrir_stockage(chemin_sqlite)
+    migrer_seances(base)
+    base.compacter()
+    taille_sqlite_compacte = taille_mo(chemin_sqlite)
+    base.fermer()
+
+    print(f"{nb_seances} séances")
+    print(f"  JSON          : {archive_json:>7.1f} Mo → {taille_json_compacte:>7.1f} Mo")
+    print(f"  SQLite        : {taille_sqlite_ancienne:>7.1f} Mo → {taille_sqlite_compacte:>7.1f} Mo")
+    print(f"  séances       : dicts anciens {octets_anciens / 1e6:>6.1f} Mo | dicts normalisés "
+          f"{octets_normalises / 1e6:>6.1f} Mo | Seance {octets_compacts / 1e6:>6.1f} Mo")
+    print(f"  stockage JSON : {octets_stockage_ancien / 1e6:>6.1f} Mo → {octets_stockage_compact / 1e6:>6.1f} Mo "
+          f"(index et agrégats compris)")
+    print(f"  migration     : {duree_migration:.2f} s, {differences} séance(s) différente(s) après jointure, "
+          f"champs conservés : {conserves or 'aucun'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ancien format des séances face au format compact")
+    parser.add_argument("tailles", type=int, nargs="*", default=TAILLES, metavar="nb_seances")
+    parser.add_argument("--graine", type=int, default=0)
+    arguments = parser.parse_args()
+    with tempfile.TemporaryDirectory() as dossier:
+        for nb_seances in arguments.tailles:
+            bench(nb_seances, dossier, arguments.graine)
@@ -0,0 +1,74 @@
+"""Mesure le temps de génération automatique selon la taille du problème
+
+Référentiel du générateur (benchmarks/generateur.py), sans ses séances :
+chaque promotion de la première année compte 4 groupes et 8 matières de
+40h sur le second semestre, soit 320 séances ; deux enseignants candidats
+par matière, avec les tarifs du générateur et des indisponibilités
+différentes.
+
+Usage : python benchmarks/bench_solveur.py [nb_promotions ...] [--graine N]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generateur import CRENEAUX_4H, DENSITE, GROUPES_PAR_PROMOTION, MATIERES, PREMIERE_ANNEE, generer, jours_ouvres
+from planning.index import IndexDonnees
+from planning.solveur import resoudre
+
+TAILLES = (1, 2, 4, 8)
+MATIERES_PAR_GROUPE = 8
+HEURES = 40
+DEBUT, FIN = date(PREMIERE_ANNEE + 1, 1, 4), date(PREMIERE_ANNEE + 1, 6, 25)
+
+
+def generer_probleme(nb_promotions, graine=0):
+    """Construit les données et les besoins pour nb_promotions promotions"""
+    jours = jours_ouvres(PREMIERE_ANNEE)
+    # Assez de séances pour que le générateur crée nb_promotions promotions par année
+    data = generer(math.ceil(nb_promotions * GROUPES_PAR_PROMOTION * len(jours) * len(CRENEAUX_4H) * DENSITE), graine)
+    data["seances"] = []
+    nb_enseignants = len(data["enseignants"])
+    besoins = []
+    for groupe in data["groupes"]:
+        p = groupe["promo_id"]
+        if p > nb_promotions:
+            continue
+        for m in range(MATIERES_PAR_GROUPE):
+            # Deux enseignants candidats, partagés entre les groupes de la promotion
+            premier = ((p - 1) * MATIERES_PAR_GROUPE + m) % nb_enseignants + 1
+            second = ((p - 1) * MATIERES_PAR_GROUPE + (m + 1) % MATIERES_PAR_GROUPE) % nb_enseignants + 1
+            besoins.append({
+                "groupe_id": groupe["id"], "matiere": MATIERES[m], "enseignants": [premier, second],
+                "heures": HEURES, "debut": DEBUT.isoformat(), "fin": FIN.isoformat()
+            })
+    # Un enseignant sur deux est absent un lundi sur deux
+    lundis = [jour.isoformat() for jour in jours if DEBUT <= jour <= FIN and jour.weekday() == 0][::2]
+    indisponibilites = {e["id"]: lundis if e["id"] % 2 else [] for e in data["enseignants"]}
+    return data, besoins, indisponibilites
+
+
+def mesurer(nb_promotions, graine=0):
+    data, besoins, indisponibilites = generer_probleme(nb_promotions, graine)
+    index = IndexDonnees(data)
+    debut = time.perf_counter()
+    resultat = resoudre(index, besoins, indisponibilites=indisponibilites, budget_temps=10.0)
+    duree = time.perf_counter() - debut
+    unites = len(resultat.seances) + len(resultat.non_placees)
+    print(f"{nb_promotions:>4} promo(s) | {unites:>6} séances à placer | {duree * 1000:>9.1f} ms | "
+          f"{len(resultat.non_placees):>4} non placées | coût {resultat.cout:>10.0f} €")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps de génération automatique selon la taille du problème")
+    parser.add_argument("tailles", type=int, nargs="*", default=TAILLES, metavar="nb_promotions")
+    parser.add_argument("--graine", type=int, default=0)
+    arguments = parser.parse_args()
+    for nb_promotions in arguments.tailles:
+        mesurer(nb_promotions, arguments.graine)
@@ -0,0 +1,135 @@
+"""Jeu de données synthétique déterministe, de 1 000 à 1 000 000 de séances
+
+Une session par année universitaire (septembre à juin, jours ouvrés), des
+promotions FISE/FISA de quatre groupes (GROUPES_PAR_PROMOTION ; la dernière
+de l'année peut en avoir moins), des enseignants plus nombreux que les
+groupes et des séances de 4 h sans chevauchement : un groupe et un
+enseignant n'ont jamais deux séances sur le même créneau. Le nombre
+d'années et de groupes croît avec le nombre de séances ; pour une même
+taille et une même graine, les données sont identiques octet pour octet.
+
+Usage : python benchmarks/generateur.py nb_seances [--graine N] [--sortie data/bench.json|.db]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planning.creneaux import CRENEAUX
+from planning.index import IndexDonnees
+from planning.journal import ecrire_instantane
+from planning.seances import construire_seance
+from planning.stockage import EXTENSIONS_SQLITE, donnees_vides, ouvrir_stockage
+
+PREMIERE_ANNEE = 2020
+# Séances par année universitaire avant d'étaler les données sur une année de plus
+SEANCES_PAR_ANNEE = 100_000
+MAX_ANNEES = 10
+# Part des créneaux (jour, demi-journée, groupe) effectivement occupés
+DENSITE = 0.8
+GROUPES_PAR_PROMOTION = 4
+FILIERES = ("FISE", "FISA")
+MATIERES = (
+    "Algorithmique", "Réseaux", "Bases de données", "Anglais", "Gestion de projet",
+    "Systèmes d'exploitation", "Mathématiques", "Génie logiciel", "Sécurité", "Management"
+)
+PRENOMS = ("Alice", "Bruno", "Chloé", "David", "Emma", "Farid", "Gaëlle", "Hugo", "Inès", "Julien")
+NOMS = ("Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau")
+CRENEAUX_4H = [libelle for libelle, creneau in CRENEAUX.items() if creneau.duree == 4]
+
+
+def jours_ouvres(annee):
+    """Jours ouvrés de l'année universitaire commençant en septembre `annee`"""
+    jour, fin = date(annee, 9, 1), date(annee + 1, 6, 30)
+    jours = []
+    while jour <= fin:
+        if jour.weekday() < 5:
+            jours.append(jour)
+        jour += timedelta(days=1)
+    return jours
+
+
+def dimensions(nb_seances):
+    """Retourne (années, groupes par année, enseignants) pour nb_seances séances"""
+    annees = min(MAX_ANNEES, max(1, math.ceil(nb_seances / SEANCES_PAR_ANNEE)))
+    par_annee = math.ceil(nb_seances / annees)
+    creneaux_par_groupe = len(jours_ouvres(PREMIERE_ANNEE)) * len(CRENEAUX_4H)
+    groupes = max(GROUPES_PAR_PROMOTION, math.ceil(par_annee / (creneaux_par_groupe * DENSITE)))
+    return annees, groupes, groupes + groupes // 4 + 1
+
+
+def generer(nb_seances, graine=0):
+    """Construit le document complet (cinq collections) avec nb_seances séances"""
+    alea = random.Random(graine)
+    annees, nb_groupes, nb_enseignants = dimensions(nb_seances)
+    data = donnees_vides()
+    data["enseignants"] = [
+        {
+            "id": i, "nom": f"{NOMS[i % len(NOMS)]}{i // len(NOMS) or ''}",
+            "prenom": PRENOMS[(i * 7) % len(PRENOMS)], "tarif": float(alea.randrange(35, 90))
+        }
+        for i in range(1, nb_enseignants + 1)
+    ]
+    nb_promotions = math.ceil(nb_groupes / GROUPES_PAR_PROMOTION)
+    for numero_annee in range(annees):
+        annee = PREMIERE_ANNEE + numero_annee
+        session_id = numero_annee + 1
+        data["sessions"].append({"id": session_id, "nom": f"{annee}-{annee + 1}", "annee": annee})
+        for p in range(nb_promotions):
+            # FISE 3, FISA 3, FISE 4… puis FISE 3-2… au-delà de six promotions
+            nom = f"{FILIERES[p % len(FILIERES)]} {3 + p // len(FILIERES) % 3}"
+            if p >= 3 * len(FILIERES):
+                nom += f"-{p // (3 * len(FILIERES)) + 1}"
+            data["promotions"].append({"id": len(data["promotions"]) + 1, "nom": f"{nom} ({annee})", "session_id": session_id})
+        for g in range(nb_groupes):
+            promo_id = numero_annee * nb_promotions + g // GROUPES_PAR_PROMOTION + 1
+            data["groupes"].append({"id": len(data["groupes"]) + 1, "nom": f"G{g + 1} {annee}", "promo_id": promo_id})
+
+    index = IndexDonnees(data)
+    seance_id = 1
+    for numero_annee in range(annees):
+        jours = jours_ouvres(PREMIERE_ANNEE + numero_annee)
+        capacite = len(jours) * len(CRENEAUX_4H) * nb_groupes
+        quota = min(capacite, nb_seances - seance_id + 1, math.ceil(nb_seances / annees))
+        # Créneaux tirés sans remise parmi (jour, demi-journée, groupe), puis remis dans l'ordre
+        for position in sorted(alea.sample(range(capacite), quota)):
+            numero_jour, reste = divmod(position, len(CRENEAUX_4H) * nb_groupes)
+            numero_creneau, groupe = divmod(reste, nb_groupes)
+            # Enseignants distincts entre groupes d'un même créneau (nb_groupes < nb_enseignants)
+            enseignant = (groupe + numero_jour * 7 + numero_creneau * 3) % nb_enseignants
+            seance = construire_seance(
+                index, jours[numero_jour].isoformat(), CRENEAUX_4H[numero_creneau],
+                numero_annee * nb_groupes + groupe + 1, enseignant + 1,
+                MATIERES[(groupe + enseignant) % len(MATIERES)], seance_id=seance_id
+            )
+            seance["version"] = 1
+            data["seances"].append(seance)
+            seance_id += 1
+    return data
+
+
+def ecrire(chemin, data):
+    """Écrit les données en sauvegarde JSON, ou dans une base SQLite selon l'extension"""
+    if chemin.lower().endswith(EXTENSIONS_SQLITE):
+        stockage = ouvrir_stockage(chemin)
+        try:
+            stockage.sauvegarder(data)
+        finally:
+            stockage.fermer()
+    else:
+        ecrire_instantane(chemin, data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jeu de données synthétique déterministe")
+    parser.add_argument("nb_seances", type=int)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--sortie", default=os.path.join("data", "bench.json"))
+    arguments = parser.parse_args()
+    data = generer(arguments.nb_seances, arguments.graine)
+    ecrire(arguments.sortie, data)
+    print(f"{arguments.sortie} : " + ", ".join(f"{len(data[c])} {c}" for c in data), file=sys.stderr)
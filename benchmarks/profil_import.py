@@ -0,0 +1,70 @@
+"""Profil du temps d'import et de la mémoire au démarrage
+
+Chaque cible est importée dans un interpréteur neuf (-X importtime) : on
+relève la durée totale, la mémoire résidente maximale et les modules les
+plus coûteux. « interface » importe streamlit_app sans exécuter main() ;
+« onglets lourds » y ajoute pandas et plotly.express, chargés à la demande
+par les onglets Calendrier, Séances et Budget.
+
+Usage : python benchmarks/profil_import.py [nb_modules_affiches]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CIBLES = {
+    "coeur": ["planning.stockage", "planning.seances", "planning.budget", "planning.conflits", "planning.entites"],
+    "interface": ["streamlit_app"],
+    "onglets lourds": ["streamlit_app", "pandas", "plotly.express"],
+}
+
+MESURE = """
+import resource, sys, time
+debut = time.perf_counter()
+for module in sys.argv[1:]:
+    __import__(module)
+duree = time.perf_counter() - debut
+# ru_maxrss est en kilo-octets sous Linux
+print(duree * 1000, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def profiler(modules, nb_modules):
+    processus = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", MESURE, *modules],
+        cwd=RACINE, capture_output=True, text=True
+    )
+    if processus.returncode != 0:
+        derniere_ligne = processus.stderr.strip().splitlines()[-1]
+        return None, derniere_ligne
+
+    # Lignes « import time: self [us] | cumulative | module »
+    couts = []
+    for ligne in processus.stderr.splitlines():
+        if not ligne.startswith("import time:") or "cumulative" in ligne:
+            continue
+        _, cumule, nom = ligne[len("import time:"):].split("|")
+        if not nom.startswith("  "):
+            # Modules de premier niveau seulement (sans indentation supplémentaire)
+            couts.append((int(cumule), nom.strip()))
+    duree_ms, memoire_mo = map(float, processus.stdout.split())
+    plus_couteux = sorted(couts, reverse=True)[:nb_modules]
+    return (duree_ms, memoire_mo, plus_couteux), None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps d'import et mémoire au démarrage")
+    parser.add_argument("nb_modules", type=int, nargs="?", default=5, metavar="nb_modules_affiches")
+    nb_modules = parser.parse_args().nb_modules
+    for nom, modules in CIBLES.items():
+        mesure, erreur = profiler(modules, nb_modules)
+        if erreur:
+            print(f"{nom:>15} | indisponible ({erreur})")
+            continue
+        duree_ms, memoire_mo, plus_couteux = mesure
+        print(f"{nom:>15} | {duree_ms:>8.1f} ms | {memoire_mo:>7.1f} Mo résidents")
+        for cumule, module in plus_couteux:
+            print(f"{'':>15}   {cumule / 1000:>8.1f} ms  {module}")
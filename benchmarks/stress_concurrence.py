@@ -0,0 +1,115 @@
+"""Test de charge : N processus écrivent en même temps dans le même stockage
+
+Chaque processus :
+- incrémente M fois le tarif d'un enseignant partagé par compare-and-swap
+  (lecture de la version, modification avec version_attendue, nouvel essai
+  en cas de ConflitVersion) ;
+- ajoute M séances sans id.
+
+À la fin, le tarif doit valoir N × M, il doit y avoir N × M séances d'ids
+distincts, et un stockage fraîchement ouvert doit voir le même état.
+
+Usage : python benchmarks/stress_concurrence.py [nb_processus] [nb_ecritures] [json|sqlite ...]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planning.stockage import ConflitVersion, ouvrir_stockage, version_element
+
+MOTEURS = ("json", "sqlite")
+
+
+def ecrivain(chemin, numero, nb_ecritures, depart, resultats):
+    stockage = ouvrir_stockage(chemin)
+    depart.wait()
+    conflits = 0
+    for i in range(nb_ecritures):
+        while True:
+            stockage.charger()
+            enseignant = stockage.index.element("enseignants", 1)
+            try:
+                stockage.modifier(
+                    "enseignants", dict(enseignant, tarif=enseignant["tarif"] + 1),
+                    version_attendue=version_element(enseignant)
+                )
+                break
+            except ConflitVersion:
+                conflits += 1
+        stockage.ajouter("seances", {
+            "id": None, "date": f"2025-01-{i % 28 + 1:02d}", "creneau": "Matin (4h)",
+            "groupe_id": numero, "enseignant_id": 1, "matiere": f"P{numero}", "cout": 1.0
+        })
+    stockage.fermer()
+    resultats.put(conflits)
+
+
+def verifier(chemin, nb_processus, nb_ecritures):
+    stockage = ouvrir_stockage(chemin)
+    data = stockage.charger()
+    ids = [s["id"] for s in data["seances"]]
+    attendu = nb_processus * nb_ecritures
+    erreurs = []
+    if data["enseignants"][0]["tarif"] != attendu:
+        erreurs.append(f"tarif {data['enseignants'][0]['tarif']} au lieu de {attendu} (mises à jour perdues)")
+    if data["enseignants"][0]["version"] != attendu + 1:
+        erreurs.append(f"version {data['enseignants'][0]['version']} au lieu de {attendu + 1}")
+    if len(ids) != attendu:
+        erreurs.append(f"{len(ids)} séances au lieu de {attendu}")
+    if len(set(ids)) != len(ids):
+        erreurs.append(f"{len(ids) - len(set(ids))} ids en double")
+    stockage.fermer()
+    return erreurs
+
+
+def executer(nb_processus, nb_ecritures, moteur):
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "planning.db" if moteur == "sqlite" else "sauvegardes.json")
+        stockage = ouvrir_stockage(chemin)
+        stockage.ajouter("enseignants", {"nom": "Martin", "prenom": "Alice", "tarif": 0})
+        stockage.fermer()
+
+        contexte = multiprocessing.get_context("spawn")
+        depart = contexte.Event()
+        resultats = contexte.Queue()
+        processus = [
+            contexte.Process(target=ecrivain, args=(chemin, numero, nb_ecritures, depart, resultats))
+            for numero in range(1, nb_processus + 1)
+        ]
+        for p in processus:
+            p.start()
+        debut = time.perf_counter()
+        depart.set()
+        conflits = sum(resultats.get() for _ in processus)
+        for p in processus:
+            p.join()
+        duree = time.perf_counter() - debut
+
+        erreurs = verifier(chemin, nb_processus, nb_ecritures)
+    ecritures = 2 * nb_processus * nb_ecritures
+    print(f"{moteur:>6} | {nb_processus} processus × {nb_ecritures} | {ecritures / duree:>7.0f} écritures/s | "
+          f"{conflits} conflits détectés et rejoués | {'OK' if not erreurs else 'ÉCHEC'}")
+    for erreur in erreurs:
+        print(f"  - {erreur}")
+    return not erreurs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Écritures concurrentes de plusieurs processus")
+    parser.add_argument("nb_processus", type=int, nargs="?", default=8)
+    parser.add_argument("nb_ecritures", type=int, nargs="?", default=200)
+    # Pas de choices : argparse refuse la valeur par défaut d'une liste positionnelle vide
+    parser.add_argument("moteurs", nargs="*", default=MOTEURS, metavar="json|sqlite")
+    arguments = parser.parse_args()
+    for moteur in arguments.moteurs:
+        if moteur not in MOTEURS:
+            parser.error(f"moteur inconnu : {moteur} (json ou sqlite)")
+    succes = all([
+        executer(arguments.nb_processus, arguments.nb_ecritures, moteur) for moteur in arguments.moteurs
+    ])
+    sys.exit(0 if succes else 1)
@@ -0,0 +1,290 @@
+"""Banc d'essai des chemins critiques de l'application, à résultats lisibles par machine
+
+Sur les données du générateur (benchmarks/generateur.py), pour chaque taille
+et chaque moteur de stockage, chronomètre les fonctions réellement appelées
+par l'interface :
+- charger_froid / charger_cache : charger_donnees (premier chargement, cache à jour)
+- calendrier_filtre / calendrier_colonnes : séances d'une semaine d'une session
+- calendrier_figure : construire_calendrier_semaine (DataFrame et figure Plotly)
+- budget_annuel : construire_budget_annuel (agrégats, DataFrame et figure)
+- controle_suppression : règles d'intégrité de supprimer_element (enseignant référencé)
+- export_excel : classeur de l'onglet Export, sans filtre
+- ajouter_seance / supprimer_seance : une écriture (journal ou transaction)
+- sauvegarder_tout : réécriture complète des données
+- restauration_json : restaurer_fichier (lecture validée d'une sauvegarde, archivage, remplacement)
+
+Les cas dont une dépendance manque (streamlit, pandas, plotly, pyarrow,
+xlsxwriter) sont notés indisponibles. Le résultat JSON (médiane, p95,
+min, max en ms, version du code) peut être comparé à une exécution
+précédente : le code de sortie vaut 1 si un cas ralentit au-delà du seuil.
+
+Usage : python benchmarks/suite.py [--tailles 1000 100000] [--moteurs json sqlite]
+        [--cas charger_froid ...] [--sortie resultats.json] [--comparer reference.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generateur import PREMIERE_ANNEE, ecrire, generer, jours_ouvres
+from planning.entites import SuppressionRefusee, verifier_suppression
+from planning.journal import ecrire_instantane
+from planning.seances import construire_seance
+from planning.stockage import ouvrir_stockage
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAILLES = (1_000, 10_000, 100_000)
+MOTEURS = ("json", "sqlite")
+REPETITIONS = 10
+# Cas coûteux (proportionnels à toutes les données) : répétitions plafonnées
+REPETITIONS_LOURDES = 3
+SEUIL = 1.25
+# Écart absolu en dessous duquel un rapport de médianes n'est que du bruit
+PLANCHER_MS = 1.0
+
+
+class Contexte:
+    """Données, fichiers et stockage ouvert d'une taille et d'un moteur"""
+
+    def __init__(self, dossier, nb_seances, moteur, graine):
+        self.nb_seances = nb_seances
+        self.data = generer(nb_seances, graine)
+        self.chemin = os.path.join(dossier, "donnees.db" if moteur == "sqlite" else "donnees.json")
+        ecrire(self.chemin, self.data)
+        self.chemin_sauvegarde = os.path.join(dossier, "sauvegarde.json")
+        ecrire_instantane(self.chemin_sauvegarde, self.data)
+        # Comme l'interface : stockage partagé, instantané en colonnes tenu à jour
+        self.stockage = ouvrir_stockage(self.chemin, colonnes=True)
+        self.stockage.charger()
+        jour = jours_ouvres(PREMIERE_ANNEE)[len(jours_ouvres(PREMIERE_ANNEE)) // 3]
+        self.semaine = jour - timedelta(days=jour.weekday())
+
+    def fermer(self):
+        self.stockage.fermer()
+
+
+def charger_froid(contexte, i):
+    stockage = ouvrir_stockage(contexte.chemin)
+    try:
+        stockage.charger()
+    finally:
+        stockage.fermer()
+
+
+def charger_cache(contexte, i):
+    contexte.stockage.charger()
+
+
+def calendrier_filtre(contexte, i):
+    contexte.stockage.seances_entre(contexte.semaine, contexte.semaine + timedelta(days=6), 1)
+
+
+def calendrier_colonnes(contexte, i):
+    contexte.stockage.colonnes_entre(contexte.semaine, contexte.semaine + timedelta(days=6), 1)
+
+
+def calendrier_figure(contexte, i):
+    from streamlit_app import construire_calendrier_semaine
+
+    construire_calendrier_semaine(contexte.stockage, contexte.semaine, 1)
+
+
+def budget_annuel(contexte, i):
+    from streamlit_app import construire_budget_annuel
+
+    construire_budget_annuel(contexte.stockage)
+
+
+def controle_suppression(contexte, i):
+    try:
+        verifier_suppression(contexte.stockage.index, "enseignants", 1 + i % len(contexte.data["enseignants"]))
+    except SuppressionRefusee:
+        pass
+
+
+def export_excel(contexte, i):
+    from planning.export import exporter_excel
+
+    exporter_excel(contexte.stockage)
+
+
+def ajouter_seance(contexte, i):
+    stockage = contexte.stockage
+    # Au-delà des données générées : aucune séance existante n'est touchée
+    jour = datetime(PREMIERE_ANNEE + 50, 1, 1).date() + timedelta(days=i)
+    stockage.ajouter("seances", construire_seance(stockage.index, jour.isoformat(), "Matin (4h)", 1, 1, "Algorithmique"))
+
+
+def supprimer_seance(contexte, i):
+    contexte.stockage.supprimer("seances", 1 + i)
+
+
+def sauvegarder_tout(contexte, i):
+    contexte.stockage.sauvegarder(contexte.stockage.charger())
+
+
+def restauration_json(contexte, i):
+    from planning.restauration import restaurer_fichier
+
+    with open(contexte.chemin_sauvegarde, 'rb') as f:
+        restaurer_fichier(contexte.stockage, f)
+
+
+# (nom, fonction, cas lourd) : les cas en lecture d'abord, les écritures ensuite
+CAS = (
+    ("charger_froid", charger_froid, True),
+    ("charger_cache", charger_cache, False),
+    ("calendrier_filtre", calendrier_filtre, False),
+    ("calendrier_colonnes", calendrier_colonnes, False),
+    ("calendrier_figure", calendrier_figure, False),
+    ("budget_annuel", budget_annuel, False),
+    ("controle_suppression", controle_suppression, False),
+    ("export_excel", export_excel, True),
+    ("ajouter_seance", ajouter_seance, False),
+    ("supprimer_seance", supprimer_seance, False),
+    ("sauvegarder_tout", sauvegarder_tout, True),
+    ("restauration_json", restauration_json, True),
+)
+
+
+def percentile(durees_triees, rang):
+    """Percentile au rang le plus proche d'une liste triée"""
+    return durees_triees[max(0, math.ceil(rang / 100 * len(durees_triees)) - 1)]
+
+
+def chronometrer(fonction, contexte, repetitions):
+    """Exécute une fois à vide puis `repetitions` fois, retourne les statistiques en ms"""
+    fonction(contexte, repetitions)
+    durees = []
+    for i in range(repetitions):
+        debut = time.perf_counter()
+        fonction(contexte, i)
+        durees.append((time.perf_counter() - debut) * 1000)
+    durees.sort()
+    return {
+        "repetitions": repetitions,
+        "mediane_ms": round(percentile(durees, 50), 3),
+        "p95_ms": round(percentile(durees, 95), 3),
+        "min_ms": round(durees[0], 3),
+        "max_ms": round(durees[-1], 3),
+    }
+
+
+def version_code():
+    """Commit courant (suffixé de + si l'arbre est modifié), None hors dépôt git"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        modifie = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=RACINE, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+" if modifie else "")
+
+
+def executer(tailles, moteurs, noms_cas, repetitions, graine):
+    resultats = []
+    for nb_seances in tailles:
+        for moteur in moteurs:
+            with tempfile.TemporaryDirectory() as dossier:
+                debut = time.perf_counter()
+                contexte = Contexte(dossier, nb_seances, moteur, graine)
+                print(f"{nb_seances} séances, {moteur} : données prêtes en {time.perf_counter() - debut:.1f} s",
+                      file=sys.stderr)
+                try:
+                    for nom, fonction, lourd in CAS:
+                        if noms_cas and nom not in noms_cas:
+                            continue
+                        resultat = {"cas": nom, "moteur": moteur, "seances": nb_seances}
+                        try:
+                            resultat.update(chronometrer(
+                                fonction, contexte, min(repetitions, REPETITIONS_LOURDES) if lourd else repetitions
+                            ))
+                        except ImportError as e:
+                            resultat["erreur"] = f"indisponible ({e.name})"
+                        resultats.append(resultat)
+                        afficher(resultat)
+                finally:
+                    contexte.fermer()
+    return resultats
+
+
+def afficher(resultat):
+    if "erreur" in resultat:
+        mesure = resultat["erreur"]
+    else:
+        mesure = f"{resultat['mediane_ms']:>10.2f} ms (p95 {resultat['p95_ms']:.2f})"
+    print(f"  {resultat['cas']:<22} {mesure}", file=sys.stderr)
+
+
+def comparer(resultats, reference, seuil):
+    """Affiche le rapport à la référence de chaque cas, retourne les cas ralentis au-delà du seuil"""
+    anciens = {
+        (r["cas"], r["moteur"], r["seances"]): r for r in reference["resultats"] if "mediane_ms" in r
+    }
+    ralentis = []
+    print(f"Comparaison à {reference.get('version')} ({reference.get('date')}), seuil ×{seuil}", file=sys.stderr)
+    for resultat in resultats:
+        ancien = anciens.get((resultat["cas"], resultat["moteur"], resultat["seances"]))
+        if ancien is None or "mediane_ms" not in resultat:
+            continue
+        rapport = resultat["mediane_ms"] / ancien["mediane_ms"] if ancien["mediane_ms"] else 1.0
+        ralenti = rapport > seuil and resultat["mediane_ms"] - ancien["mediane_ms"] > PLANCHER_MS
+        marque = " ← ralenti" if ralenti else ""
+        print(f"  {resultat['cas']:<22} {resultat['moteur']:<6} {resultat['seances']:>8} : "
+              f"{ancien['mediane_ms']:>9.2f} → {resultat['mediane_ms']:>9.2f} ms (×{rapport:.2f}){marque}",
+              file=sys.stderr)
+        if marque:
+            ralentis.append(resultat)
+    return ralentis
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai des chemins critiques")
+    parser.add_argument("--tailles", type=int, nargs="+", default=TAILLES)
+    parser.add_argument("--moteurs", nargs="+", choices=MOTEURS, default=MOTEURS)
+    parser.add_argument("--cas", nargs="+", choices=[nom for nom, _, _ in CAS])
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--sortie", help="fichier JSON des résultats (sortie standard par défaut)")
+    parser.add_argument("--comparer", help="résultats JSON d'une exécution précédente")
+    parser.add_argument("--seuil", type=float, default=SEUIL, help="rapport de médianes toléré")
+    arguments = parser.parse_args(arguments)
+
+    resultats = executer(arguments.tailles, arguments.moteurs, arguments.cas, arguments.repetitions, arguments.graine)
+    document = {
+        "version": version_code(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "graine": arguments.graine,
+        "resultats": resultats,
+    }
+    texte = json.dumps(document, ensure_ascii=False, indent=2)
+    if arguments.sortie:
+        with open(arguments.sortie, 'w', encoding='utf-8') as f:
+            f.write(texte + "\n")
+    else:
+        print(texte)
+
+    if arguments.comparer:
+        with open(arguments.comparer, encoding='utf-8') as f:
+            reference = json.load(f)
+        if comparer(resultats, reference, arguments.seuil):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""Cœur de l'application de planification (sans dépendance à Streamlit)
+
+Le paquet s'importe sans streamlit, plotly, pandas ni pyarrow (chargés à la demande
+par les seules fonctions qui en ont besoin) :
+
+- entites : schéma, libellés et règles d'intégrité des suppressions
+- stockage, stockage_sqlite, journal, verrou : persistance et cache
+- index, recherche : accès par id, relations et périodes
+- creneaux, seances : horaires des créneaux, séances compactes, coût et noms par jointure
+- budget, conflits, colonnes : agrégats budgétaires, chevauchements et instantané en colonnes (Arrow)
+- solveur, importation, restauration, export, ics : traitements en masse
+- cli, serveur_ics : points d'entrée hors de l'interface (lots, flux d'agenda)
+"""
@@ -0,0 +1,85 @@
+"""Agrégats budgétaires des séances tenus à jour à chaque écriture"""
+import math
+
+# Axe → fonction donnant la clé d'agrégation d'une séance
+AXES = {
+    "annee": lambda s: int(s["date"][:4]),
+    "mois": lambda s: s["date"][:7],
+    "enseignant": lambda s: s.get("enseignant_id"),
+    "promotion": lambda s: s.get("promo_id"),
+    "groupe": lambda s: s.get("groupe_id"),
+}
+
+# Écarts tolérés entre agrégats tenus et recalculés : les arrondis des sommes
+# courantes croissent avec les montants (relatif), l'absolu couvre les totaux nuls
+TOLERANCE_RELATIVE = 1e-9
+TOLERANCE = 1e-6
+
+
+def egaux(attendu, obtenu):
+    """Indique si deux montants ne diffèrent que par les arrondis des sommes flottantes"""
+    return math.isclose(attendu, obtenu, rel_tol=TOLERANCE_RELATIVE, abs_tol=TOLERANCE)
+
+
+class AgregatsBudget:
+    """Coûts cumulés par année, mois, enseignant, promotion et groupe
+
+    Chaque clé garde (coût total, nombre de séances) : une clé dont le nombre
+    retombe à zéro disparaît, sans résidu d'arrondi.
+    """
+
+    def __init__(self, seances=()):
+        self.reconstruire(seances)
+
+    def reconstruire(self, seances):
+        """Recalcule tous les agrégats à partir des séances"""
+        self.totaux = {axe: {} for axe in AXES}
+        self.total = 0.0
+        self.nombre = 0
+        for seance in seances:
+            self._cumuler(seance, 1)
+
+    def _cumuler(self, seance, signe):
+        cout = seance.get("cout") or 0
+        self.total += signe * cout
+        self.nombre += signe
+        for axe, cle_de in AXES.items():
+            cle = cle_de(seance)
+            if cle is None:
+                continue
+            totaux = self.totaux[axe]
+            total, nombre = totaux.get(cle, (0.0, 0))
+            total, nombre = total + signe * cout, nombre + signe
+            if nombre:
+                totaux[cle] = (total, nombre)
+            else:
+                del totaux[cle]
+        if not self.nombre:
+            self.total = 0.0
+
+    def mettre_a_jour(self, ancienne, nouvelle):
+        """Retire l'ancienne version d'une séance et ajoute la nouvelle (None si absente)"""
+        if ancienne is not None:
+            self._cumuler(ancienne, -1)
+        if nouvelle is not None:
+            self._cumuler(nouvelle, 1)
+
+    def budget_par(self, axe):
+        """Retourne {clé: coût total} pour un axe"""
+        return {cle: total for cle, (total, _) in self.totaux[axe].items()}
+
+    def ecarts(self, seances):
+        """Compare aux agrégats recalculés entièrement, retourne les différences
+
+        Chaque écart est un tuple (axe, clé, valeur attendue, valeur tenue).
+        """
+        reference = AgregatsBudget(seances)
+        differences = []
+        if not egaux(reference.total, self.total):
+            differences.append(("total", None, reference.total, self.total))
+        for axe in AXES:
+            attendu, obtenu = reference.budget_par(axe), self.budget_par(axe)
+            for cle in attendu.keys() | obtenu.keys():
+                if not egaux(attendu.get(cle, 0.0), obtenu.get(cle, 0.0)):
+                    differences.append((axe, cle, attendu.get(cle, 0.0), obtenu.get(cle, 0.0)))
+        return differences
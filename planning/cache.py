@@ -0,0 +1,71 @@
+"""Cache LRU borné invalidé par la version des données"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Cache LRU de valeurs coûteuses à construire (figures, exports...)
+
+    Chaque lecture indique la version courante du stockage : dès qu'une
+    version plus récente apparaît, tout le cache est vidé. Une lecture avec une
+    version plus ancienne (session en retard) construit la valeur sans la
+    garder. Les durées de construction et de lecture sont cumulées pour
+    comparer le coût d'un miss à celui d'un hit.
+    """
+
+    def __init__(self, capacite=64):
+        self.capacite = capacite
+        self._entrees = OrderedDict()
+        self._version = None
+        self._verrou = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.duree_construction = 0.0
+        self.duree_hits = 0.0
+
+    def obtenir(self, cle, version, construire):
+        """Retourne la valeur en cache ou la construit avec `construire()`"""
+        debut = time.perf_counter()
+        with self._verrou:
+            if self._version is None or version > self._version:
+                self._entrees.clear()
+                self._version = version
+            if version == self._version and cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                self.hits += 1
+                valeur = self._entrees[cle]
+                self.duree_hits += time.perf_counter() - debut
+                return valeur
+
+        # Construction hors verrou : les autres sessions ne sont pas bloquées
+        valeur = construire()
+        duree = time.perf_counter() - debut
+        with self._verrou:
+            self.misses += 1
+            self.duree_construction += duree
+            if version == self._version:
+                self._entrees[cle] = valeur
+                self._entrees.move_to_end(cle)
+                while len(self._entrees) > self.capacite:
+                    self._entrees.popitem(last=False)
+                    self.evictions += 1
+        return valeur
+
+    def vider(self):
+        """Vide le cache"""
+        with self._verrou:
+            self._entrees.clear()
+
+    def statistiques(self):
+        """Retourne les compteurs et les durées moyennes en millisecondes"""
+        with self._verrou:
+            return {
+                "entrees": len(self._entrees),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "construction_moyenne_ms": 1000 * self.duree_construction / self.misses if self.misses else 0.0,
+                "hit_moyen_ms": 1000 * self.duree_hits / self.hits if self.hits else 0.0
+            }
@@ -0,0 +1,319 @@
+"""Traitements par lots en ligne de commande, sans Streamlit
+
+Usage : python -m planning.cli [--stockage data/sauvegardes.json] <commande> ...
+
+Commandes :
+- exporter : classeur Excel (filtré comme dans l'onglet Export) ou CSV des séances
+- budget --par annee|mois|enseignant|promotion|groupe : coût et nombre de séances par clé
+- verifier : schéma, ids en double, références et chevauchements
+- importer : import de séances CSV/Excel (--simuler pour n'afficher que l'aperçu)
+- compacter : intègre le journal dans l'instantané (JSON) ou réorganise la base (SQLite)
+- migrer : réécrit les séances anciennes sans noms recopiés (état précédent archivé)
+- colonnes : crée ou met à jour l'instantané en colonnes des séances (fichiers Arrow)
+
+Les commandes de lecture parcourent le stockage élément par élément
+(`iterer_elements`) : seuls les référentiels (enseignants, groupes…) et les
+totaux sont gardés en mémoire, jamais la liste des séances. `--stockage`
+accepte aussi une archive ou une sauvegarde JSON. Le code de sortie vaut 1
+si des erreurs ont été trouvées.
+
+Une fois l'instantané en colonnes créé (commande colonnes), les écritures
+de la CLI le tiennent à jour et `budget --colonnes` agrège ses fichiers avec
+pyarrow, sans décoder les séances : utile sur une archive de plusieurs années.
+S'il ne reflète plus le fichier de données (écriture d'un processus qui ne le
+tient pas), `budget --colonnes` le met d'abord à jour.
+"""
+import argparse
+import csv
+import os
+import sys
+from datetime import date
+
+from planning.budget import AXES, AgregatsBudget
+from planning.colonnes import NOMS, dossier_colonnes, lire_colonnes
+from planning.conflits import scanner_conflits
+from planning.entites import REFERENCES, erreurs_element
+from planning.index import IndexDonnees
+from planning.journal import AJOUT
+from planning.seances import avec_noms
+from planning.stockage import COLLECTIONS, ENTITES_BUDGET, FICHIER_DONNEES, donnees_vides, ouvrir_stockage
+
+# Noms anglais acceptés pour les axes du budget
+ALIAS_AXES = {"year": "annee", "month": "mois", "teacher": "enseignant", "group": "groupe"}
+MAX_ERREURS = 50
+
+
+def _date(texte):
+    try:
+        return date.fromisoformat(texte)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date invalide « {texte} » (AAAA-MM-JJ attendu)")
+
+
+def _axe(texte):
+    axe = ALIAS_AXES.get(texte, texte)
+    if axe not in AXES:
+        raise argparse.ArgumentTypeError(f"axe inconnu « {texte} » ({', '.join(AXES)})")
+    return axe
+
+
+def exporter(stockage, arguments):
+    """Écrit le classeur Excel, ou les séances en CSV au fil de la lecture"""
+    if arguments.format == "xlsx":
+        from planning.export import exporter_excel
+
+        if not arguments.sortie:
+            raise SystemExit("--sortie est obligatoire pour un classeur Excel")
+        contenu = exporter_excel(stockage, arguments.debut, arguments.fin, arguments.promotion)
+        with open(arguments.sortie, 'wb') as f:
+            f.write(contenu)
+        print(f"{arguments.sortie} : {len(contenu)} octets", file=sys.stderr)
+        return 0
+
+    from planning.export import COLONNES_SEANCES
+
+    debut = arguments.debut.isoformat() if arguments.debut else ""
+    fin = arguments.fin.isoformat() if arguments.fin else "9999-12-31"
+    # Les entités précèdent les séances dans le flux : les noms sont résolus au passage
+    entites = donnees_vides()
+    referentiels = IndexDonnees(entites)
+    sortie = open(arguments.sortie, 'w', encoding='utf-8', newline='') if arguments.sortie else sys.stdout
+    try:
+        ecrivain = csv.writer(sortie)
+        ecrivain.writerow(COLONNES_SEANCES)
+        nombre = 0
+        for collection, element in stockage.iterer_elements():
+            if collection != "seances":
+                referentiels.appliquer(entites, {"op": AJOUT, "collection": collection, "element": element})
+                continue
+            if not debut <= element["date"] <= fin:
+                continue
+            if arguments.promotion is not None and element.get("promo_id") != arguments.promotion:
+                continue
+            ligne = avec_noms(referentiels, element)
+            ecrivain.writerow([ligne.get(colonne) for colonne in COLONNES_SEANCES])
+            nombre += 1
+    finally:
+        if sortie is not sys.stdout:
+            sortie.close()
+    print(f"{nombre} séance(s) exportée(s)", file=sys.stderr)
+    return 0
+
+
+def _totaux_colonnes(chemin, axe):
+    """Retourne ({clé: (coût, nombre)}, coût total, nombre) calculés par pyarrow sur l'instantané"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    dossier = dossier_colonnes(chemin)
+    if not os.path.isdir(dossier):
+        raise SystemExit(f"{dossier} absent : créez d'abord l'instantané avec la commande colonnes")
+    table = lire_colonnes(dossier)
+    if axe == "annee":
+        cles = pc.year(table["date"])
+    elif axe == "mois":
+        cles = pc.add(pc.multiply(pc.year(table["date"]), 100), pc.month(table["date"]))
+    else:
+        cles = table[NOMS[axe][1]]
+    groupes = pa.table({"cle": cles, "cout": table["cout"]}).group_by("cle").aggregate(
+        [("cout", "sum"), ("cout", "count")]
+    )
+    totaux = {}
+    for cle, total, nombre in zip(*(groupes[c].to_pylist() for c in ("cle", "cout_sum", "cout_count"))):
+        if cle is not None:
+            totaux[f"{cle // 100}-{cle % 100:02d}" if axe == "mois" else cle] = (total, nombre)
+    return totaux, pc.sum(table["cout"]).as_py() or 0.0, table.num_rows
+
+
+def budget(stockage, arguments):
+    """Cumule le coût des séances selon l'axe demandé, en une passe"""
+    collection_entites, libelle = ENTITES_BUDGET.get(arguments.par, (None, None))
+    entites = {}
+    if arguments.colonnes:
+        if not stockage.colonnes_a_jour():
+            mois = stockage.actualiser_colonnes()
+            print(f"Instantané en colonnes mis à jour : {len(mois)} mois réécrit(s)", file=sys.stderr)
+        totaux, total, nombre = _totaux_colonnes(stockage.chemin, arguments.par)
+        for collection, element in stockage.iterer_elements():
+            if collection == "seances":
+                # Les séances viennent en dernier : les entités sont toutes lues
+                break
+            if collection == collection_entites:
+                entites[element["id"]] = libelle(element)
+    else:
+        agregats = AgregatsBudget()
+        for collection, element in stockage.iterer_elements():
+            if collection == "seances":
+                agregats.mettre_a_jour(None, element)
+            elif collection == collection_entites:
+                entites[element["id"]] = libelle(element)
+        totaux, total, nombre = agregats.totaux[arguments.par], agregats.total, agregats.nombre
+
+    ecrivain = csv.writer(sys.stdout)
+    ecrivain.writerow([arguments.par, "libelle", "seances", "cout"])
+    for cle, (total_cle, nombre_cle) in sorted(totaux.items()):
+        nom = entites.get(cle, f"#{cle}") if collection_entites else cle
+        ecrivain.writerow([cle, nom, nombre_cle, round(total_cle, 2)])
+    print(f"Total : {nombre} séance(s), {total:.2f} €", file=sys.stderr)
+    return 0
+
+
+def _controler(elements, ids, references, signaler):
+    """Contrôle chaque élément au passage et ne laisse passer que les séances valides
+
+    Remplit `ids` (collection → ids vus) et `references` (collection cible →
+    {id référencé: premier élément qui le référence}) pour le contrôle final.
+    """
+    cles = {}
+    for collection, cle, cible in REFERENCES:
+        cles.setdefault(collection, []).append((cle, cible))
+    for collection, element in elements:
+        erreurs = erreurs_element(collection, element)
+        if not erreurs and element["id"] in ids[collection]:
+            erreurs = [f"{collection} #{element['id']} : id en double"]
+        for erreur in erreurs:
+            signaler(erreur)
+        if erreurs:
+            continue
+        ids[collection].add(element["id"])
+        for cle, cible in cles.get(collection, ()):
+            references[cible].setdefault(element.get(cle), (collection, element["id"], cle))
+        if collection == "seances":
+            yield element
+
+
+def verifier(stockage, arguments):
+    """Contrôle le schéma, les ids, les références et les chevauchements en une passe"""
+    nombre_erreurs = 0
+
+    def signaler(message):
+        nonlocal nombre_erreurs
+        nombre_erreurs += 1
+        if nombre_erreurs <= arguments.max_erreurs:
+            print(message)
+
+    ids = {collection: set() for collection in COLLECTIONS}
+    references = {cible: {} for _, _, cible in REFERENCES}
+    # Le balayage ne garde que des intervalles par (date, ressource), pas les séances
+    conflits = scanner_conflits(_controler(stockage.iterer_elements(), ids, references, signaler))
+
+    for cible, referencees in references.items():
+        for valeur, (collection, element_id, cle) in referencees.items():
+            if valeur not in ids[cible]:
+                signaler(f"{collection} #{element_id} : {cle} {valeur} inexistant dans {cible}")
+    for type_conflit, jour, ressource_id, seance_1, seance_2 in conflits:
+        signaler(f"Chevauchement {type_conflit} #{ressource_id} le {jour} : séances #{seance_1} et #{seance_2}")
+
+    resume = ", ".join(f"{len(ids[collection])} {collection}" for collection in COLLECTIONS)
+    print(f"{resume} ; {nombre_erreurs} problème(s)", file=sys.stderr)
+    return 1 if nombre_erreurs else 0
+
+
+def importer(stockage, arguments):
+    """Analyse le fichier puis ajoute ses séances valides en une écriture"""
+    from planning import importation
+
+    with open(arguments.fichier, 'rb') as f:
+        apercu = importation.analyser(stockage, importation.lire_lignes(f, arguments.fichier))
+    for numero, message in apercu.erreurs[:arguments.max_erreurs]:
+        print(f"Ligne {numero} : {message}")
+    print(f"{len(apercu.a_ajouter)} séance(s) à ajouter, {len(apercu.doublons)} doublon(s), "
+          f"{len(apercu.erreurs)} ligne(s) en erreur", file=sys.stderr)
+    if not arguments.simuler and apercu.a_ajouter:
+        ids = importation.importer(stockage, apercu)
+        print(f"{len(ids)} séance(s) importée(s)", file=sys.stderr)
+    return 1 if apercu.erreurs else 0
+
+
+def compacter(stockage, arguments):
+    """Compacte le stockage et affiche la taille du fichier avant et après"""
+    avant = os.path.getsize(stockage.chemin) if os.path.exists(stockage.chemin) else 0
+    stockage.compacter()
+    apres = os.path.getsize(stockage.chemin) if os.path.exists(stockage.chemin) else 0
+    print(f"{stockage.chemin} : {avant} → {apres} octets", file=sys.stderr)
+    return 0
+
+
+def migrer(stockage, arguments):
+    """Normalise les séances, puis compacte le stockage pour en récupérer la place"""
+    from planning.restauration import ErreurRestauration, migrer_seances
+
+    avant = os.path.getsize(stockage.chemin) if os.path.exists(stockage.chemin) else 0
+    try:
+        nombre, conserves = migrer_seances(stockage)
+    except ErreurRestauration as e:
+        for erreur in e.erreurs:
+            print(erreur)
+        return 1
+    stockage.compacter()
+    for champ, nombre_conserves in conserves.items():
+        print(f"« {champ} » conservé sur {nombre_conserves} séance(s) : non reconstructible")
+    print(f"{nombre} séance(s) migrée(s) ; {stockage.chemin} : {avant} → {os.path.getsize(stockage.chemin)} octets ; "
+          f"état précédent : {stockage.chemin_archive(1)}", file=sys.stderr)
+    return 0
+
+
+def colonnes(stockage, arguments):
+    """Crée ou met à jour l'instantané en colonnes, en ne réécrivant que les mois modifiés"""
+    mois = stockage.actualiser_colonnes()
+    print(f"{stockage.colonnes.dossier} : {len(mois)} mois réécrit(s) {' '.join(mois)}".rstrip(), file=sys.stderr)
+    return 0
+
+
+def creer_parser():
+    parser = argparse.ArgumentParser(prog="python -m planning.cli", description="Traitements par lots de la planification")
+    parser.add_argument("--stockage", default=os.environ.get("PLANNING_STOCKAGE", FICHIER_DONNEES),
+                        help="fichier de données, archive ou sauvegarde JSON")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    export = commandes.add_parser("exporter", aliases=["export"], help="export Excel ou CSV")
+    export.add_argument("--format", choices=("xlsx", "csv"), default="csv")
+    export.add_argument("--sortie", help="fichier de sortie (sortie standard par défaut pour le CSV)")
+    export.add_argument("--debut", type=_date)
+    export.add_argument("--fin", type=_date)
+    export.add_argument("--promotion", type=int, help="id de la promotion")
+    export.set_defaults(traitement=exporter)
+
+    budget_ = commandes.add_parser("budget", help="coût des séances par axe")
+    budget_.add_argument("--par", "--by", type=_axe, default="annee", help=", ".join(AXES))
+    budget_.add_argument("--colonnes", "--columnar", action="store_true",
+                         help="agrège l'instantané en colonnes (pyarrow) au lieu de lire les séances")
+    budget_.set_defaults(traitement=budget)
+
+    verification = commandes.add_parser("verifier", aliases=["check-integrity"], help="contrôle d'intégrité")
+    verification.add_argument("--max-erreurs", type=int, default=MAX_ERREURS)
+    verification.set_defaults(traitement=verifier)
+
+    importation = commandes.add_parser("importer", aliases=["import"], help="import de séances CSV/Excel")
+    importation.add_argument("fichier")
+    importation.add_argument("--simuler", action="store_true", help="aperçu seul, sans écriture")
+    importation.add_argument("--max-erreurs", type=int, default=MAX_ERREURS)
+    importation.set_defaults(traitement=importer)
+
+    compaction = commandes.add_parser("compacter", aliases=["compact"], help="compaction du stockage")
+    compaction.set_defaults(traitement=compacter)
+
+    migration = commandes.add_parser("migrer", aliases=["migrate"], help="normalisation des anciennes séances")
+    migration.set_defaults(traitement=migrer)
+
+    instantane = commandes.add_parser("colonnes", aliases=["columnar"], help="instantané en colonnes des séances")
+    instantane.set_defaults(traitement=colonnes, tenir_colonnes=True)
+    return parser
+
+
+def main(arguments=None):
+    arguments = creer_parser().parse_args(arguments)
+    # Un instantané en colonnes existant est tenu à jour par les écritures ; budget --colonnes le crée
+    tenir_colonnes = (
+        getattr(arguments, "tenir_colonnes", False) or getattr(arguments, "colonnes", False)
+        or os.path.isdir(dossier_colonnes(arguments.stockage))
+    )
+    stockage = ouvrir_stockage(arguments.stockage, colonnes=tenir_colonnes)
+    try:
+        return arguments.traitement(stockage, arguments)
+    finally:
+        stockage.fermer()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""Instantané en colonnes des séances (fichiers Arrow, un par mois)
+
+Les séances y sont rangées par colonnes typées : date en date32, créneau et
+matière en dictionnaire (catégoriels côté pandas), ids en entiers, coût en
+flottant. Les fichiers sont projetés en mémoire à la lecture : filtrer une
+période, agréger plusieurs années ou construire un DataFrame ne décode aucun
+JSON et ne crée aucun objet Python par séance.
+
+L'instantané est une vue des séances du stockage, comme les agrégats du
+budget : chaque mois porte une empreinte tenue à jour à chaque mutation, et
+`actualiser` ne réécrit que les fichiers dont l'empreinte a changé (une
+écriture ne réécrit que les séances de son mois). Le fichier `etat.json`
+retient la signature du fichier de données reflétée par l'instantané : la
+CLI sait sans rien décoder s'il est à jour.
+pyarrow (dépendance de streamlit) n'est importé qu'à l'écriture ou à la lecture.
+"""
+import json
+import os
+import zlib
+
+EXTENSION = ".arrow"
+FICHIER_ETAT = "etat.json"
+# Somme des empreintes des séances d'un mois, modulo 2**64
+MASQUE = (1 << 64) - 1
+# Colonne de noms ajoutée au DataFrame → (collection, colonne d'id)
+NOMS = {
+    "enseignant": ("enseignants", "enseignant_id"),
+    "groupe": ("groupes", "groupe_id"),
+    "promotion": ("promotions", "promo_id"),
+}
+
+
+def dossier_colonnes(chemin):
+    """Dossier de l'instantané en colonnes d'un fichier de données (ou d'une archive)"""
+    return os.path.splitext(chemin)[0] + '.colonnes'
+
+
+def _code(codes, valeur):
+    """Code stable d'un processus à l'autre (le hash des textes ne l'est pas)"""
+    code = codes.get(valeur)
+    if code is None:
+        code = codes[valeur] = zlib.crc32(str(valeur).encode('utf-8'))
+    return code
+
+
+def empreinte_seance(seance, codes):
+    """Empreinte d'une séance, identique d'un processus à l'autre pour un même contenu"""
+    return hash((
+        seance["id"], seance.get("version") or 0, _code(codes, seance["date"]), _code(codes, seance["creneau"]),
+        _code(codes, seance.get("groupe_id")), _code(codes, seance.get("promo_id")),
+        _code(codes, seance.get("enseignant_id")), _code(codes, seance.get("matiere")),
+        float(seance.get("cout") or 0)
+    )) & MASQUE
+
+
+def table_seances(seances, empreinte=0):
+    """Construit la table Arrow de séances (empreinte du mois en métadonnée)"""
+    import pyarrow as pa
+    from datetime import date
+
+    dates = {}
+    for seance in seances:
+        if seance["date"] not in dates:
+            dates[seance["date"]] = date.fromisoformat(seance["date"])
+    table = pa.table({
+        "id": pa.array([s["id"] for s in seances], pa.int64()),
+        "date": pa.array([dates[s["date"]] for s in seances], pa.date32()),
+        "creneau": pa.array([s["creneau"] for s in seances], pa.string()).dictionary_encode(),
+        "groupe_id": pa.array([s.get("groupe_id") for s in seances], pa.int64()),
+        "promo_id": pa.array([s.get("promo_id") for s in seances], pa.int64()),
+        "enseignant_id": pa.array([s.get("enseignant_id") for s in seances], pa.int64()),
+        "matiere": pa.array([s.get("matiere") for s in seances], pa.string()).dictionary_encode(),
+        "cout": pa.array([float(s.get("cout") or 0) for s in seances], pa.float64()),
+        "version": pa.array([s.get("version") or 0 for s in seances], pa.int64()),
+    })
+    return table.replace_schema_metadata({"empreinte": str(empreinte)})
+
+
+def _ecrire_table(chemin, table):
+    """Écrit le fichier Arrow à côté puis le renomme atomiquement"""
+    import pyarrow as pa
+
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(temporaire, 'wb') as sortie, pa.ipc.new_file(sortie, table.schema) as ecrivain:
+            ecrivain.write_table(table)
+        os.replace(temporaire, chemin)
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+
+
+def _fichiers(dossier):
+    """Retourne les (mois AAAA-MM, chemin) des fichiers de l'instantané, par mois croissant"""
+    if not os.path.isdir(dossier):
+        return []
+    return sorted(
+        (nom[:-len(EXTENSION)], os.path.join(dossier, nom)) for nom in os.listdir(dossier)
+        if nom.endswith(EXTENSION) and len(nom) == 7 + len(EXTENSION)
+    )
+
+
+def lire_empreinte(chemin):
+    """Retourne l'empreinte d'un fichier (seul le pied de fichier est lu), None s'il n'existe pas"""
+    import pyarrow as pa
+
+    if not os.path.exists(chemin):
+        return None
+    with pa.memory_map(chemin, 'r') as source:
+        metadonnees = pa.ipc.open_file(source).schema.metadata or {}
+    return int(metadonnees.get(b"empreinte", -1))
+
+
+def lire_empreintes(dossier):
+    """Retourne {mois: empreinte} des fichiers présents"""
+    return {mois: lire_empreinte(chemin) for mois, chemin in _fichiers(dossier)}
+
+
+def lire_etat(dossier):
+    """Retourne la signature des données enregistrée par `enregistrer_etat`, None si absente"""
+    try:
+        with open(os.path.join(dossier, FICHIER_ETAT), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def lire_colonnes(dossier, debut=None, fin=None, promos=None, groupe_id=None):
+    """Retourne la table Arrow des séances entre deux dates incluses, triée par date
+
+    Seuls les fichiers des mois de la période sont projetés en mémoire ; le
+    filtre (promotions, groupe) est appliqué par pyarrow, sans conversion en
+    objets Python.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    tables = []
+    for mois, chemin in _fichiers(dossier):
+        if (debut and mois < debut.isoformat()[:7]) or (fin and mois > fin.isoformat()[:7]):
+            continue
+        with pa.memory_map(chemin, 'r') as source:
+            tables.append(pa.ipc.open_file(source).read_all().replace_schema_metadata(None))
+    if not tables:
+        return table_seances([]).replace_schema_metadata(None)
+    table = pa.concat_tables(tables)
+
+    conditions = []
+    if debut:
+        conditions.append(pc.greater_equal(table["date"], pa.scalar(debut, pa.date32())))
+    if fin:
+        conditions.append(pc.less_equal(table["date"], pa.scalar(fin, pa.date32())))
+    if promos is not None:
+        conditions.append(pc.is_in(table["promo_id"], value_set=pa.array(sorted(promos), pa.int64())))
+    if groupe_id:
+        conditions.append(pc.equal(table["groupe_id"], groupe_id))
+    if not conditions:
+        return table
+    masque = conditions[0]
+    for condition in conditions[1:]:
+        masque = pc.and_(masque, condition)
+    return table.filter(masque)
+
+
+def vers_dataframe(table, index=None):
+    """Convertit une table de séances en DataFrame pandas
+
+    Les dates arrivent en datetime64 et les colonnes en dictionnaire en
+    catégoriels ; les colonnes numériques sans valeur manquante sont reprises
+    sans copie (`split_blocks`). Avec `index`, les noms actuels de
+    l'enseignant, du groupe et de la promotion sont ajoutés en catégoriels.
+    """
+    from planning.entites import libelle
+
+    df = table.to_pandas(split_blocks=True, date_as_object=False)
+    if index is not None:
+        for colonne, (collection, cle) in NOMS.items():
+            libelles = {}
+            for element_id in df[cle].dropna().unique():
+                element = index.element(collection, int(element_id))
+                libelles[element_id] = libelle(collection, element) if element else "N/A"
+            df[colonne] = df[cle].map(libelles).fillna("N/A").astype("category")
+    return df
+
+
+class InstantaneColonnes:
+    """Empreintes par mois des séances et fichiers Arrow correspondants
+
+    Vue des séances du stockage (`reconstruire`, `mettre_a_jour`) : les
+    empreintes se cumulent par somme, si bien qu'une mutation ne coûte que
+    l'empreinte de l'ancienne et de la nouvelle version. Les empreintes
+    écrites dans les fichiers sont gardées en mémoire : `a_jour` ne touche pas
+    au disque, et `actualiser` ne relit que les pieds des mois modifiés.
+    """
+
+    def __init__(self, dossier):
+        self.dossier = dossier
+        self.empreintes = {}
+        self.nombres = {}
+        self._codes = {}
+        # Empreintes des fichiers sur le disque, inconnues avant la première actualisation
+        self._sur_disque = None
+        # Dernière signature des données enregistrée dans etat.json
+        self._etat = None
+
+    def reconstruire(self, seances):
+        self.empreintes = {}
+        self.nombres = {}
+        for seance in seances:
+            self._cumuler(seance, 1)
+
+    def _cumuler(self, seance, signe):
+        mois = seance["date"][:7]
+        empreinte = empreinte_seance(seance, self._codes)
+        nombre = self.nombres.get(mois, 0) + signe
+        if nombre:
+            self.nombres[mois] = nombre
+            self.empreintes[mois] = (self.empreintes.get(mois, 0) + signe * empreinte) & MASQUE
+        else:
+            del self.nombres[mois]
+            del self.empreintes[mois]
+
+    def mettre_a_jour(self, ancienne, nouvelle):
+        """Retire l'ancienne version d'une séance et ajoute la nouvelle (None si absente)"""
+        if ancienne is not None:
+            self._cumuler(ancienne, -1)
+        if nouvelle is not None:
+            self._cumuler(nouvelle, 1)
+
+    def a_jour(self):
+        """Indique si les fichiers correspondent aux séances en mémoire"""
+        return self._sur_disque == self.empreintes
+
+    def actualiser(self, index):
+        """Réécrit les fichiers des mois modifiés et retourne ces mois
+
+        Tous les pieds de fichier ne sont lus qu'à la première actualisation ;
+        ensuite, seuls ceux des mois dont l'empreinte a changé en mémoire sont
+        relus, un autre processus ayant pu les réécrire entre-temps. À appeler
+        sous le verrou d'écriture du stockage.
+        """
+        if self._sur_disque is None or not os.path.isdir(self.dossier):
+            os.makedirs(self.dossier, exist_ok=True)
+            self._sur_disque = lire_empreintes(self.dossier)
+        reecrits = []
+        for mois in sorted(set(self.empreintes) | set(self._sur_disque)):
+            empreinte = self.empreintes.get(mois)
+            if empreinte == self._sur_disque.get(mois):
+                continue
+            chemin = os.path.join(self.dossier, f"{mois}{EXTENSION}")
+            if empreinte != lire_empreinte(chemin):
+                if empreinte is None:
+                    os.remove(chemin)
+                else:
+                    seances = index.seances_entre(f"{mois}-01", f"{mois}-31")
+                    _ecrire_table(chemin, table_seances(seances, empreinte))
+                reecrits.append(mois)
+        self._sur_disque = dict(self.empreintes)
+        return reecrits
+
+    def enregistrer_etat(self, signature):
+        """Retient la signature du fichier de données que reflètent désormais les fichiers"""
+        if signature == self._etat:
+            return
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = os.path.join(self.dossier, FICHIER_ETAT)
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(signature, f)
+        os.replace(temporaire, chemin)
+        self._etat = signature
@@ -0,0 +1,135 @@
+"""Détection des chevauchements de séances par enseignant et par groupe"""
+from bisect import bisect_left, insort
+
+from planning.creneaux import CRENEAUX
+
+# Type de conflit → clé de la ressource qui ne peut pas être à deux endroits
+RESSOURCES = {
+    "enseignant": "enseignant_id",
+    "groupe": "groupe_id",
+}
+
+
+def _minutes(heure):
+    return heure.hour * 60 + heure.minute
+
+
+# Créneau → intervalle [début, fin[ en minutes
+INTERVALLES = {libelle: (_minutes(c.debut), _minutes(c.fin)) for libelle, c in CRENEAUX.items()}
+
+
+class ChevauchementRefuse(ValueError):
+    """La séance chevauche des séances existantes (même enseignant ou même groupe)"""
+
+    def __init__(self, conflits):
+        super().__init__(f"{len(conflits)} chevauchement(s) avec des séances existantes")
+        self.conflits = conflits
+
+
+def _cles(seance):
+    """Retourne les (type, (date, id de ressource)) occupés par une séance"""
+    return [
+        (type_conflit, (seance["date"], seance.get(cle)))
+        for type_conflit, cle in RESSOURCES.items()
+        if seance.get(cle) is not None
+    ]
+
+
+class IndexConflits:
+    """Intervalles occupés par (date, enseignant) et par (date, groupe)
+
+    Chaque clé garde la liste triée de ses intervalles (début, fin, id de
+    séance) : vérifier une séance coûte une recherche dans un dictionnaire
+    puis une dichotomie sur les quelques créneaux de la journée.
+    """
+
+    def __init__(self, seances=()):
+        self.reconstruire(seances)
+
+    def reconstruire(self, seances):
+        """Reconstruit l'index à partir des séances"""
+        self.intervalles = {type_conflit: {} for type_conflit in RESSOURCES}
+        for seance in seances:
+            self._indexer(seance)
+
+    def _indexer(self, seance):
+        intervalle = INTERVALLES.get(seance.get("creneau"))
+        if intervalle is None:
+            return
+        for type_conflit, cle in _cles(seance):
+            insort(self.intervalles[type_conflit].setdefault(cle, []), intervalle + (seance["id"],))
+
+    def _desindexer(self, seance):
+        intervalle = INTERVALLES.get(seance.get("creneau"))
+        if intervalle is None:
+            return
+        for type_conflit, cle in _cles(seance):
+            occupes = self.intervalles[type_conflit][cle]
+            del occupes[bisect_left(occupes, intervalle + (seance["id"],))]
+            if not occupes:
+                del self.intervalles[type_conflit][cle]
+
+    def mettre_a_jour(self, ancienne, nouvelle):
+        """Retire l'ancienne version d'une séance et ajoute la nouvelle (None si absente)"""
+        if ancienne is not None:
+            self._desindexer(ancienne)
+        if nouvelle is not None:
+            self._indexer(nouvelle)
+
+    def conflits(self, seance):
+        """Retourne les (type, id de séance) en chevauchement avec la séance donnée
+
+        La séance elle-même (même id) est ignorée, ce qui permet de vérifier
+        une modification avant de l'enregistrer.
+        """
+        intervalle = INTERVALLES.get(seance.get("creneau"))
+        if intervalle is None:
+            return []
+        debut, fin = intervalle
+        resultats = []
+        for type_conflit, cle in _cles(seance):
+            occupes = self.intervalles[type_conflit].get(cle, [])
+            # Premier intervalle commençant à fin ou après : aucun au-delà ne chevauche
+            limite = bisect_left(occupes, (fin,))
+            for debut_occupe, fin_occupe, seance_id in occupes[:limite]:
+                if fin_occupe > debut and seance_id != seance.get("id"):
+                    resultats.append((type_conflit, seance_id))
+        return resultats
+
+
+def verifier_chevauchements(index_conflits, seance):
+    """Lève ChevauchementRefuse (avec les (type, id de séance)) si la séance en chevauche d'autres"""
+    conflits = index_conflits.conflits(seance)
+    if conflits:
+        raise ChevauchementRefuse(conflits)
+
+
+def scanner_conflits(seances):
+    """Retourne tous les conflits existants en une passe
+
+    Les séances sont regroupées par (date, ressource), puis chaque groupe est
+    balayé par ordre de début : une séance est en conflit avec les séances
+    encore « ouvertes » à son début. Chaque conflit est un tuple
+    (type, date, id de ressource, id séance 1, id séance 2).
+    """
+    groupes = {type_conflit: {} for type_conflit in RESSOURCES}
+    for seance in seances:
+        intervalle = INTERVALLES.get(seance.get("creneau"))
+        if intervalle is None:
+            continue
+        for type_conflit, cle in _cles(seance):
+            groupes[type_conflit].setdefault(cle, []).append(intervalle + (seance["id"],))
+
+    conflits = []
+    for type_conflit, par_cle in groupes.items():
+        for (jour, ressource_id), intervalles in par_cle.items():
+            if len(intervalles) < 2:
+                continue
+            intervalles.sort()
+            ouverts = []
+            for debut, fin, seance_id in intervalles:
+                ouverts = [(f, i) for f, i in ouverts if f > debut]
+                for _, autre_id in ouverts:
+                    conflits.append((type_conflit, jour, ressource_id, autre_id, seance_id))
+                ouverts.append((fin, seance_id))
+    return conflits
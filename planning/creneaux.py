@@ -0,0 +1,62 @@
+"""Table des créneaux horaires et conversions associées"""
+from collections import namedtuple
+from datetime import date, datetime, time
+
+Creneau = namedtuple("Creneau", ["debut", "fin", "duree"])
+
+# Libellé affiché → horaires et durée en heures.
+# Table explicite : plus de déduction par sous-chaîne ("1", "4h"...).
+CRENEAUX = {
+    "Matin (4h)": Creneau(time(8, 30), time(12, 30), 4),
+    "Matin 1 (2h)": Creneau(time(8, 30), time(10, 30), 2),
+    "Matin 2 (2h)": Creneau(time(10, 30), time(12, 30), 2),
+    "Soir (4h)": Creneau(time(14, 30), time(18, 30), 4),
+    "Soir 1 (2h)": Creneau(time(14, 30), time(16, 30), 2),
+    "Soir 2 (2h)": Creneau(time(16, 30), time(18, 30), 2),
+}
+
+JOURS = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
+
+# Jour fictif portant les heures pour l'axe du calendrier (celui de strptime)
+JOUR_REFERENCE = date(1900, 1, 1)
+
+HEURES_DEBUT = {libelle: datetime.combine(JOUR_REFERENCE, c.debut) for libelle, c in CRENEAUX.items()}
+HEURES_FIN = {libelle: datetime.combine(JOUR_REFERENCE, c.fin) for libelle, c in CRENEAUX.items()}
+DUREES = {libelle: c.duree for libelle, c in CRENEAUX.items()}
+
+
+def heure_debut(creneau):
+    """Retourne l'heure de début du créneau (au jour de référence)"""
+    return HEURES_DEBUT[creneau]
+
+
+def heure_fin(creneau):
+    """Retourne l'heure de fin du créneau (au jour de référence)"""
+    return HEURES_FIN[creneau]
+
+
+def duree(creneau):
+    """Retourne la durée du créneau en heures"""
+    return DUREES[creneau]
+
+
+def ajouter_colonnes_horaires(df):
+    """Ajoute les colonnes Jour, Début et Fin à un DataFrame de séances
+
+    `df` doit contenir une colonne 'Date' de type datetime et une colonne
+    'creneau'. Les conversions sont vectorisées : correspondance par
+    dictionnaire pour les horaires, codes catégoriels pour les jours.
+    """
+    import pandas as pd
+
+    df['Jour'] = pd.Categorical.from_codes(df['Date'].dt.weekday, categories=JOURS, ordered=True)
+    if isinstance(df['creneau'].dtype, pd.CategoricalDtype):
+        # Créneaux catégoriels : une correspondance par catégorie, étendue aux lignes par les codes
+        codes = df['creneau'].cat.codes.to_numpy()
+        categories = df['creneau'].cat.categories
+        df['Début'] = categories.map(HEURES_DEBUT).to_numpy()[codes]
+        df['Fin'] = categories.map(HEURES_FIN).to_numpy()[codes]
+    else:
+        df['Début'] = df['creneau'].map(HEURES_DEBUT)
+        df['Fin'] = df['creneau'].map(HEURES_FIN)
+    return df
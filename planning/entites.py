@@ -0,0 +1,131 @@
+"""Entités de la planification : schéma, libellés et règles d'intégrité"""
+from collections.abc import Mapping
+from datetime import date
+
+from planning.creneaux import CRENEAUX
+
+# Type d'entité (singulier, tel qu'employé par l'interface) → collection
+COLLECTIONS_PAR_TYPE = {
+    "seance": "seances",
+    "enseignant": "enseignants",
+    "groupe": "groupes",
+    "promotion": "promotions",
+    "session": "sessions",
+}
+
+# Collection → nom affiché d'un élément
+LIBELLES = {
+    "enseignants": lambda e: f"{e['prenom']} {e['nom']}",
+    "sessions": lambda s: s["nom"],
+    "promotions": lambda p: p["nom"],
+    "groupes": lambda g: g["nom"],
+}
+
+# Collection → message quand une suppression laisserait des références orphelines
+MESSAGES_SUPPRESSION = {
+    "enseignants": "Cet enseignant a des séances planifiées. Supprimez d'abord ses séances.",
+    "groupes": "Ce groupe a des séances planifiées. Supprimez d'abord ses séances.",
+    "promotions": "Cette promotion a des groupes associés. Supprimez d'abord les groupes.",
+    "sessions": "Cette session a des promotions associées. Supprimez d'abord les promotions.",
+}
+
+
+class SuppressionRefusee(ValueError):
+    """L'élément est encore référencé par d'autres entités"""
+
+
+def _entier(valeur):
+    return isinstance(valeur, int) and not isinstance(valeur, bool)
+
+
+def _nombre(valeur):
+    return isinstance(valeur, (int, float)) and not isinstance(valeur, bool)
+
+
+def _texte(valeur):
+    return isinstance(valeur, str) and valeur.strip() != ""
+
+
+def _date_iso(valeur):
+    try:
+        return isinstance(valeur, str) and date.fromisoformat(valeur).isoformat() == valeur
+    except ValueError:
+        return False
+
+
+def _positif(valeur):
+    return _nombre(valeur) and valeur >= 0
+
+
+def _optionnel(controle):
+    return lambda valeur: valeur is None or controle(valeur)
+
+
+# Collection → champ → (contrôle, description). Les champs absents du schéma sont tolérés.
+SCHEMA = {
+    "enseignants": {
+        "id": (_entier, "entier"),
+        "nom": (_texte, "texte non vide"),
+        "prenom": (_texte, "texte non vide"),
+        "tarif": (_positif, "nombre positif"),
+    },
+    "sessions": {
+        "id": (_entier, "entier"),
+        "nom": (_texte, "texte non vide"),
+        "annee": (_optionnel(_entier), "entier"),
+    },
+    "promotions": {
+        "id": (_entier, "entier"),
+        "nom": (_texte, "texte non vide"),
+        "session_id": (_entier, "entier"),
+    },
+    "groupes": {
+        "id": (_entier, "entier"),
+        "nom": (_texte, "texte non vide"),
+        "promo_id": (_entier, "entier"),
+    },
+    "seances": {
+        "id": (_entier, "entier"),
+        "date": (_date_iso, "date AAAA-MM-JJ"),
+        "creneau": (lambda c: c in CRENEAUX, "créneau connu"),
+        "groupe_id": (_entier, "entier"),
+        "promo_id": (_optionnel(_entier), "entier"),
+        "enseignant_id": (_entier, "entier"),
+        "matiere": (_texte, "texte non vide"),
+        "duree": (_optionnel(_positif), "nombre positif"),
+        "tarif": (_optionnel(_positif), "nombre positif"),
+        "cout": (_positif, "nombre positif"),
+    },
+}
+
+# (collection, clé étrangère, collection référencée) : vérifiées à la restauration,
+# elles interdisent aussi de supprimer une entité encore référencée
+REFERENCES = (
+    ("groupes", "promo_id", "promotions"),
+    ("promotions", "session_id", "sessions"),
+    ("seances", "groupe_id", "groupes"),
+    ("seances", "enseignant_id", "enseignants"),
+)
+
+
+def libelle(collection, element):
+    """Retourne le nom affiché d'un élément"""
+    return LIBELLES[collection](element)
+
+
+def erreurs_element(collection, element):
+    """Retourne les écarts d'un élément au schéma de sa collection"""
+    if not isinstance(element, Mapping):
+        return [f"{collection} : élément qui n'est pas un objet"]
+    erreurs = []
+    for champ, (controle, description) in SCHEMA[collection].items():
+        if not controle(element.get(champ)):
+            erreurs.append(f"{collection} #{element.get('id')} : « {champ} » doit être {description}")
+    return erreurs
+
+
+def verifier_suppression(index, collection, element_id):
+    """Lève SuppressionRefusee si des éléments référencent encore celui-ci"""
+    for collection_source, cle, cible in REFERENCES:
+        if cible == collection and index.references(collection_source, cle, element_id):
+            raise SuppressionRefusee(MESSAGES_SUPPRESSION[collection])
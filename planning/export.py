@@ -0,0 +1,96 @@
+"""Export Excel des données, construit en mémoire"""
+import io
+
+from planning.seances import COLONNES, avec_noms
+
+# Collection → nom de la feuille, dans l'ordre du classeur
+FEUILLES = {
+    "enseignants": "Enseignants",
+    "sessions": "Sessions",
+    "promotions": "Promotions",
+    "groupes": "Groupes",
+    "seances": "Séances",
+}
+TYPE_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# Colonnes de la feuille des séances : noms, durée et tarif résolus par jointure
+COLONNES_SEANCES = (
+    "id", "date", "creneau", "duree", "groupe", "groupe_id", "promotion", "promo_id",
+    "enseignant", "enseignant_id", "matiere", "tarif", "cout", "version"
+)
+
+
+def selection_export(stockage, debut=None, fin=None, promo_id=None):
+    """Retourne les collections à exporter, restreintes à la période et à la promotion
+
+    Sans filtre, tout est exporté. Avec un filtre, les séances sont celles de
+    la période (index des dates) et/ou de la promotion, et les autres feuilles
+    ne gardent que les entités auxquelles elles se rapportent.
+    """
+    data = stockage.charger()
+    if debut is None and fin is None and promo_id is None:
+        return data
+    index = stockage.index
+
+    if debut is not None or fin is not None:
+        seances = index.seances_entre(
+            debut.isoformat() if debut else "",
+            fin.isoformat() if fin else "9999-12-31"
+        )
+        if promo_id is not None:
+            seances = [s for s in seances if s.get("promo_id") == promo_id]
+    elif promo_id is not None:
+        seances = sorted(index.references("seances", "promo_id", promo_id), key=lambda s: (s["date"], s["id"]))
+    else:
+        seances = data["seances"]
+
+    if promo_id is not None:
+        promotion = index.element("promotions", promo_id)
+        promotions = [promotion] if promotion else []
+        groupes = index.references("groupes", "promo_id", promo_id)
+    else:
+        promotions = data["promotions"]
+        groupes = data["groupes"]
+    sessions_ids = {p.get("session_id") for p in promotions}
+    enseignants_ids = {s.get("enseignant_id") for s in seances}
+    return {
+        "enseignants": [e for e in data["enseignants"] if e["id"] in enseignants_ids],
+        "sessions": [s for s in data["sessions"] if s["id"] in sessions_ids],
+        "promotions": promotions,
+        "groupes": groupes,
+        "seances": seances,
+    }
+
+
+def exporter_excel(stockage, debut=None, fin=None, promo_id=None):
+    """Retourne le classeur Excel (octets) des données sélectionnées
+
+    Le classeur est écrit dans un tampon propre à l'appel, en mode mémoire
+    constante : les lignes sont écrites dans l'ordre et vidées au fur et à
+    mesure, quelle que soit la taille de la feuille des séances.
+    """
+    import xlsxwriter
+
+    data = selection_export(stockage, debut, fin, promo_id)
+    tampon = io.BytesIO()
+    classeur = xlsxwriter.Workbook(tampon, {"constant_memory": True})
+    gras = classeur.add_format({"bold": True})
+    for collection, nom_feuille in FEUILLES.items():
+        elements = data[collection]
+        if not elements:
+            continue
+        # Colonnes connues d'abord, puis les éventuels champs supplémentaires
+        colonnes = list(COLONNES_SEANCES if collection == "seances" else COLONNES[collection])
+        for element in elements:
+            for cle in element:
+                if cle not in colonnes:
+                    colonnes.append(cle)
+        feuille = classeur.add_worksheet(nom_feuille)
+        feuille.write_row(0, 0, colonnes, gras)
+        for ligne, element in enumerate(elements, start=1):
+            if collection == "seances":
+                element = avec_noms(stockage.index, element)
+            feuille.write_row(ligne, 0, [element.get(colonne) for colonne in colonnes])
+        feuille.freeze_panes(1, 0)
+        feuille.autofilter(0, 0, len(elements), len(colonnes) - 1)
+    classeur.close()
+    return tampon.getvalue()
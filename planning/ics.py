@@ -0,0 +1,167 @@
+"""Flux iCalendar (.ics) des séances par enseignant, groupe, promotion ou session
+
+Chaque séance devient un VEVENT d'UID stable (dérivé de son id) : les
+agendas abonnés mettent à jour l'événement au lieu de le dupliquer, son
+SEQUENCE (la version de la séance) croissant à chaque modification. Le texte
+de chaque VEVENT est gardé en cache tant que la séance ne change pas, et
+chaque flux est mis en cache par version des données avec son ETag.
+"""
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+from planning.cache import CacheLRU
+from planning.creneaux import heure_debut, heure_fin
+from planning.entites import libelle
+from planning.seances import noms
+from planning.stockage import version_element
+
+# Type de flux → (collection de l'entité, clé de filtrage des séances)
+FILTRES = {
+    "enseignant": ("enseignants", "enseignant_id"),
+    "groupe": ("groupes", "groupe_id"),
+    "promotion": ("promotions", "promo_id"),
+    "session": ("sessions", None),
+}
+DOMAINE_UID = "planning-cesi"
+TYPE_MIME = "text/calendar; charset=utf-8"
+
+# Fuseau des créneaux, déclaré une fois par flux (RFC 5545 §3.6.5)
+VTIMEZONE = (
+    "BEGIN:VTIMEZONE",
+    "TZID:Europe/Paris",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:+0100",
+    "TZOFFSETTO:+0200",
+    "TZNAME:CEST",
+    "DTSTART:19700329T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0100",
+    "TZNAME:CET",
+    "DTSTART:19701025T030000",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+)
+
+
+def echapper(texte):
+    """Échappe un texte pour une propriété iCalendar"""
+    texte = str(texte).replace("\r\n", "\n").replace("\r", "\n")
+    return (texte.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def plier(ligne):
+    """Coupe une ligne à 75 octets, les suites commençant par une espace"""
+    octets = ligne.encode("utf-8")
+    if len(octets) <= 75:
+        return ligne
+    morceaux, debut = [], 0
+    while debut < len(octets):
+        fin = min(debut + (75 if not morceaux else 74), len(octets))
+        # Ne pas couper au milieu d'un caractère UTF-8
+        while fin < len(octets) and octets[fin] & 0xC0 == 0x80:
+            fin -= 1
+        morceaux.append(octets[debut:fin].decode("utf-8"))
+        debut = fin
+    return "\r\n ".join(morceaux)
+
+
+def _horodatage(jour, heure):
+    return datetime.combine(datetime.strptime(jour, "%Y-%m-%d").date(), heure.time()).strftime("%Y%m%dT%H%M%S")
+
+
+class FluxICS:
+    """Générateur de flux ICS en cache pour un stockage"""
+
+    def __init__(self, stockage, capacite=512):
+        self.stockage = stockage
+        self.cache = CacheLRU(capacite)
+        self._evenements = {}
+        self._verrou = threading.Lock()
+
+    def seances(self, index, type_flux, valeur):
+        """Retourne les séances d'un flux, triées par date, via les index inverses"""
+        if type_flux == "session":
+            seances = [
+                s for promotion in index.references("promotions", "session_id", valeur)
+                for s in index.references("seances", "promo_id", promotion["id"])
+            ]
+        else:
+            seances = index.references("seances", FILTRES[type_flux][1], valeur)
+        return sorted(seances, key=lambda s: (s["date"], heure_debut(s["creneau"]), s["id"]))
+
+    def evenement(self, seance, noms_seance):
+        """Retourne le VEVENT d'une séance, reconstruit seulement si elle a changé"""
+        signature = (
+            seance["date"], seance["creneau"], seance.get("matiere"), version_element(seance)
+        ) + noms_seance
+        with self._verrou:
+            en_cache = self._evenements.get(seance["id"])
+        if en_cache and en_cache[0] == signature:
+            return en_cache[1]
+
+        jour, creneau, matiere, version, enseignant, groupe, promotion = signature
+        debut = _horodatage(jour, heure_debut(creneau))
+        description = f"Enseignant : {enseignant}\nPromotion : {promotion}"
+        lignes = [
+            "BEGIN:VEVENT",
+            f"UID:seance-{seance['id']}@{DOMAINE_UID}",
+            # Instant (UTC) de construction de l'événement, gardé en cache avec lui
+            f"DTSTAMP:{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}",
+            # Les agendas n'appliquent une modification d'un UID connu que si SEQUENCE augmente
+            f"SEQUENCE:{version - 1}",
+            f"DTSTART;TZID=Europe/Paris:{debut}",
+            f"DTEND;TZID=Europe/Paris:{_horodatage(jour, heure_fin(creneau))}",
+            f"SUMMARY:{echapper(f'{matiere} — {groupe}')}",
+            f"DESCRIPTION:{echapper(description)}",
+            "END:VEVENT",
+        ]
+        texte = "\r\n".join(plier(ligne) for ligne in lignes)
+        with self._verrou:
+            self._evenements[seance["id"]] = (signature, texte)
+        return texte
+
+    def _lire(self, index, type_flux, valeur):
+        """Retourne le nom de l'entité du flux et ses (séance, noms), lus sous le verrou du stockage"""
+        collection = FILTRES[type_flux][0]
+        entite = index.element(collection, valeur)
+        nom = libelle(collection, entite) if entite else f"{type_flux} {valeur}"
+        self._elaguer(index)
+        return nom, [(seance, noms(index, seance)) for seance in self.seances(index, type_flux, valeur)]
+
+    def _construire(self, type_flux, valeur):
+        nom, seances = self.stockage.consulter(lambda index: self._lire(index, type_flux, valeur))
+        lignes = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:-//{DOMAINE_UID}//Planification//FR",
+            "CALSCALE:GREGORIAN",
+            f"X-WR-CALNAME:{echapper(f'Planning {nom}')}",
+            *VTIMEZONE,
+        ]
+        lignes.extend(self.evenement(seance, noms_seance) for seance, noms_seance in seances)
+        lignes.append("END:VCALENDAR")
+        contenu = ("\r\n".join(lignes) + "\r\n").encode("utf-8")
+        etag = '"' + hashlib.sha1(contenu).hexdigest() + '"'
+        return contenu, etag
+
+    def _elaguer(self, index):
+        """Oublie les VEVENT des séances supprimées quand ils deviennent nombreux"""
+        seances = index.par_id.get("seances", {})
+        with self._verrou:
+            if len(self._evenements) > 2 * len(seances) + 1000:
+                self._evenements = {i: e for i, e in self._evenements.items() if i in seances}
+
+    def flux(self, type_flux, valeur):
+        """Retourne (contenu, ETag) du flux, en cache tant que les données ne changent pas"""
+        if type_flux not in FILTRES:
+            raise ValueError(f"Type de flux inconnu : {type_flux}")
+        self.stockage.charger()
+        return self.cache.obtenir(
+            (type_flux, valeur), self.stockage.version, lambda: self._construire(type_flux, valeur)
+        )
@@ -0,0 +1,217 @@
+"""Import en masse de séances depuis un fichier CSV ou Excel
+
+Le fichier est lu ligne à ligne, chaque ligne est convertie en séance comme
+le formulaire de saisie (durée et coût compris), puis l'ensemble est validé
+avant toute écriture : l'aperçu sépare les séances à ajouter, les doublons
+de séances existantes et les lignes en erreur. Les séances valides sont
+ensuite ajoutées en une seule écriture.
+
+Colonnes attendues (l'ordre, la casse et les accents des en-têtes sont
+libres) : Date, Créneau, Groupe, Enseignant, Matière.
+"""
+import csv
+import io
+import unicodedata
+from collections import namedtuple
+from datetime import date, datetime
+
+from planning.conflits import IndexConflits
+from planning.creneaux import CRENEAUX
+from planning.seances import construire_seance
+from planning.stockage import ConflitVersion
+
+COLONNES = ("date", "creneau", "groupe", "enseignant", "matiere")
+FORMATS_DATE = ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y")
+# Champs comparés pour reconnaître une séance déjà présente
+CLE_DOUBLON = ("date", "creneau", "groupe_id", "enseignant_id", "matiere")
+
+Apercu = namedtuple("Apercu", ["a_ajouter", "doublons", "erreurs", "version"])
+
+
+class ErreurImport(ValueError):
+    """Fichier illisible ou colonnes manquantes"""
+
+
+def normaliser(texte):
+    """Minuscules sans accents ni espaces superflus, pour comparer des noms"""
+    texte = unicodedata.normalize("NFKD", str(texte or "")).encode("ascii", "ignore").decode("ascii")
+    return " ".join(texte.casefold().split())
+
+
+def _entetes(ligne):
+    """Associe chaque colonne attendue à sa position dans la ligne d'en-tête"""
+    positions = {normaliser(nom): i for i, nom in enumerate(ligne)}
+    manquantes = [colonne for colonne in COLONNES if colonne not in positions]
+    if manquantes:
+        raise ErreurImport(f"Colonne(s) manquante(s) : {', '.join(manquantes)}")
+    return {colonne: positions[colonne] for colonne in COLONNES}
+
+
+def _lignes_csv(fichier):
+    texte = io.TextIOWrapper(fichier, encoding="utf-8-sig", newline="")
+    debut = texte.read(4096)
+    try:
+        dialecte = csv.Sniffer().sniff(debut, delimiters=",;\t")
+    except csv.Error:
+        dialecte = csv.excel
+    texte.seek(0)
+    yield from csv.reader(texte, dialecte)
+
+
+def _lignes_excel(fichier):
+    from openpyxl import load_workbook
+
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        yield from classeur.active.iter_rows(values_only=True)
+    finally:
+        classeur.close()
+
+
+def lire_lignes(fichier, nom_fichier):
+    """Itère sur les lignes du fichier sous forme de dictionnaires (colonnes attendues)
+
+    Chaque ligne est produite avec son numéro dans le fichier (en-tête = 1).
+    Le fichier est lu au fur et à mesure : seul l'aperçu final est en mémoire.
+    """
+    if nom_fichier.lower().endswith((".xlsx", ".xlsm")):
+        lignes = _lignes_excel(fichier)
+    else:
+        lignes = _lignes_csv(fichier)
+    entete = next(lignes, None)
+    if entete is None:
+        raise ErreurImport("Fichier vide")
+    positions = _entetes(entete)
+    for numero, ligne in enumerate(lignes, start=2):
+        if not any(valeur not in (None, "") for valeur in ligne):
+            continue
+        yield numero, {
+            colonne: ligne[position] if position < len(ligne) else None
+            for colonne, position in positions.items()
+        }
+
+
+def _date_iso(valeur):
+    if isinstance(valeur, datetime):
+        return valeur.date().isoformat()
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    texte = str(valeur or "").strip()
+    for format_date in FORMATS_DATE:
+        try:
+            return datetime.strptime(texte, format_date).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"date invalide « {texte} »")
+
+
+class Resolveur:
+    """Tables nom normalisé → id des groupes, enseignants et créneaux
+
+    Construites une fois par import : chaque ligne est résolue par de simples
+    accès à des dictionnaires. Un nom porté par plusieurs entités est ambigu.
+    """
+
+    def __init__(self, index):
+        self.groupes = self._table(
+            (g["id"], [g["nom"]]) for g in index.par_id.get("groupes", {}).values()
+        )
+        self.enseignants = self._table(
+            (e["id"], [f"{e['prenom']} {e['nom']}", f"{e['nom']} {e['prenom']}"])
+            for e in index.par_id.get("enseignants", {}).values()
+        )
+        self.creneaux = {normaliser(libelle): libelle for libelle in CRENEAUX}
+
+    @staticmethod
+    def _table(entites):
+        table = {}
+        for element_id, noms in entites:
+            for nom in {normaliser(nom) for nom in noms}:
+                table.setdefault(nom, set()).add(element_id)
+        return table
+
+    @staticmethod
+    def _resoudre(table, nom, nature):
+        ids = table.get(normaliser(nom))
+        if not ids:
+            raise ValueError(f"{nature} inconnu « {nom} »")
+        if len(ids) > 1:
+            raise ValueError(f"{nature} ambigu « {nom} »")
+        return next(iter(ids))
+
+    def groupe(self, nom):
+        return self._resoudre(self.groupes, nom, "groupe")
+
+    def enseignant(self, nom):
+        return self._resoudre(self.enseignants, nom, "enseignant")
+
+    def creneau(self, libelle):
+        creneau = self.creneaux.get(normaliser(libelle))
+        if creneau is None:
+            raise ValueError(f"créneau inconnu « {libelle} »")
+        return creneau
+
+
+def analyser(stockage, lignes):
+    """Valide les lignes sans rien écrire et retourne l'aperçu de l'import
+
+    `lignes` est l'itérable produit par `lire_lignes`. Les chevauchements sont
+    recherchés dans les séances existantes (index des conflits du stockage) et
+    entre les lignes du fichier. Une ligne identique à une séance existante est
+    un doublon, ignoré à l'import. Les erreurs sont des couples (numéro de
+    ligne, message) ; `a_ajouter` contient des couples (numéro, séance).
+    `version` est celle du stockage au moment de l'analyse.
+    """
+    stockage.charger()
+    version = stockage.version
+    index = stockage.index
+    resolveur = Resolveur(index)
+    importees = IndexConflits()
+    a_ajouter, doublons, erreurs = [], [], []
+
+    for numero, ligne in lignes:
+        try:
+            matiere = str(ligne["matiere"] or "").strip()
+            if not matiere:
+                raise ValueError("matière manquante")
+            # Id provisoire négatif : distingue les lignes du fichier des séances existantes
+            seance = construire_seance(
+                index, _date_iso(ligne["date"]), resolveur.creneau(ligne["creneau"]),
+                resolveur.groupe(ligne["groupe"]), resolveur.enseignant(ligne["enseignant"]),
+                matiere, seance_id=-numero
+            )
+        except ValueError as e:
+            erreurs.append((numero, str(e)))
+            continue
+
+        existants = [index.element("seances", seance_id) for _, seance_id in stockage.conflits.conflits(seance)]
+        cle = tuple(seance[champ] for champ in CLE_DOUBLON)
+        if any(tuple(s[champ] for champ in CLE_DOUBLON) == cle for s in existants):
+            doublons.append((numero, seance))
+            continue
+        if existants:
+            erreurs.append((numero, f"chevauche la séance existante du {seance['date']} ({existants[0]['creneau']})"))
+            continue
+        internes = importees.conflits(seance)
+        if internes:
+            erreurs.append((numero, f"chevauche la ligne {-internes[0][1]} du fichier"))
+            continue
+        importees.mettre_a_jour(None, seance)
+        a_ajouter.append((numero, seance))
+
+    return Apercu(a_ajouter, doublons, erreurs, version)
+
+
+def importer(stockage, apercu):
+    """Ajoute les séances valides de l'aperçu en une seule écriture, retourne leurs ids
+
+    L'aperçu est refusé si les données ont changé depuis l'analyse : les
+    chevauchements vérifiés ne seraient plus garantis. La version est
+    comparée sous le verrou d'écriture, par ajouter_lot.
+    """
+    try:
+        return stockage.ajouter_lot(
+            "seances", [dict(seance, id=None) for _, seance in apercu.a_ajouter], version_attendue=apercu.version
+        )
+    except ConflitVersion:
+        raise ErreurImport("Les données ont été modifiées depuis l'aperçu : relancez l'analyse")
@@ -0,0 +1,142 @@
+"""Index en mémoire des entités par id et des relations entre collections"""
+from bisect import bisect_left, bisect_right, insort
+
+from planning.journal import SUPPRESSION
+from planning.seances import Seance
+
+# (collection, clé étrangère) indexées en sens inverse
+RELATIONS = (
+    ("seances", "groupe_id"),
+    ("seances", "enseignant_id"),
+    ("seances", "promo_id"),
+    ("groupes", "promo_id"),
+    ("promotions", "session_id"),
+)
+# Collection → représentation compacte de ses éléments en mémoire
+REPRESENTATIONS = {"seances": Seance}
+
+
+def compteurs_ids(data, *compteurs):
+    """Prochain id de chaque collection, au-delà des ids présents et des compteurs donnés
+
+    Les compteurs sont enregistrés avec les données : l'id d'un élément
+    supprimé, même le plus grand, n'est jamais réattribué après relecture.
+    """
+    resultat = {collection: max((e["id"] for e in elements), default=0) + 1 for collection, elements in data.items()}
+    for enregistres in compteurs:
+        for collection, prochain_id in (enregistres or {}).items():
+            resultat[collection] = max(resultat.get(collection, 1), prochain_id)
+    return resultat
+
+
+class IndexDonnees:
+    """Index id → entité, relations inverses, dates des séances et compteurs d'id
+
+    Construit une fois par chargement puis tenu à jour à chaque mutation, il
+    remplace les parcours linéaires (`next(...)`, compréhensions de liste,
+    `max(ids) + 1`) par des accès en O(1) ou O(k). Les séances sont aussi
+    gardées triées par (date ISO, id) pour répondre aux requêtes par période
+    en O(log n + k).
+    """
+
+    def __init__(self, data=None):
+        self.par_id = {}
+        self.inverses = {}
+        self.dates_seances = []
+        self.prochains_ids = {}
+        if data is not None:
+            self.reconstruire(data)
+
+    def reconstruire(self, data, compteurs=None):
+        """Reconstruit tous les index à partir des données et des compteurs d'id enregistrés"""
+        self.par_id = {collection: {e["id"]: e for e in elements} for collection, elements in data.items()}
+        self.inverses = {relation: {} for relation in RELATIONS}
+        for collection, cle in RELATIONS:
+            inverse = self.inverses[(collection, cle)]
+            for element in data.get(collection, []):
+                inverse.setdefault(element.get(cle), {})[element["id"]] = element
+        self.dates_seances = sorted((s["date"], s["id"]) for s in data.get("seances", []))
+        self.prochains_ids = compteurs_ids(data, compteurs)
+
+    def element(self, collection, element_id):
+        """Retourne l'élément d'id donné ou None"""
+        return self.par_id.get(collection, {}).get(element_id)
+
+    def references(self, collection, cle, valeur):
+        """Retourne les éléments de la collection dont la clé vaut `valeur`"""
+        return list(self.inverses[(collection, cle)].get(valeur, {}).values())
+
+    def seances_entre(self, debut, fin):
+        """Retourne les séances entre deux dates ISO incluses, triées par date"""
+        seances = self.par_id.get("seances", {})
+        premier = bisect_left(self.dates_seances, (debut,))
+        dernier = bisect_right(self.dates_seances, (fin, float("inf")), lo=premier)
+        return [seances[seance_id] for _, seance_id in self.dates_seances[premier:dernier]]
+
+    def prochain_id(self, collection):
+        """Retourne le prochain id libre d'une collection (jamais réutilisé)"""
+        return self.prochains_ids.get(collection, 1)
+
+    def _indexer(self, collection, element):
+        self.par_id.setdefault(collection, {})[element["id"]] = element
+        for relation_collection, cle in RELATIONS:
+            if relation_collection == collection:
+                self.inverses[(collection, cle)].setdefault(element.get(cle), {})[element["id"]] = element
+        if collection == "seances":
+            insort(self.dates_seances, (element["date"], element["id"]))
+        self.prochains_ids[collection] = max(self.prochain_id(collection), element["id"] + 1)
+
+    def _desindexer(self, collection, element):
+        del self.par_id[collection][element["id"]]
+        for relation_collection, cle in RELATIONS:
+            if relation_collection == collection:
+                inverse = self.inverses[(collection, cle)]
+                elements = inverse[element.get(cle)]
+                del elements[element["id"]]
+                if not elements:
+                    del inverse[element.get(cle)]
+        if collection == "seances":
+            cle = (element["date"], element["id"])
+            del self.dates_seances[bisect_left(self.dates_seances, cle)]
+
+    def appliquer(self, data, operation):
+        """Applique une opération du journal aux données et aux index
+
+        L'ajout et la modification remplacent l'élément de même id s'il existe,
+        ce qui rend le rejeu idempotent après une compaction interrompue.
+        Retourne une copie de l'élément remplacé ou supprimé (None sinon).
+        """
+        collection = operation["collection"]
+        elements = data.setdefault(collection, [])
+        if operation["op"] == SUPPRESSION:
+            existant = self.element(collection, operation["id"])
+            if existant is None:
+                return None
+            self._desindexer(collection, existant)
+            # Recherche par identité : aucune comparaison de contenu
+            for i, element in enumerate(elements):
+                if element is existant:
+                    del elements[i]
+                    break
+            return existant
+
+        nouvel_element = operation["element"]
+        representation = REPRESENTATIONS.get(collection)
+        existant = self.element(collection, nouvel_element["id"])
+        if existant is None:
+            if representation is not None:
+                nouvel_element = representation(nouvel_element)
+            elements.append(nouvel_element)
+            self._indexer(collection, nouvel_element)
+            return None
+
+        # Mise à jour sur place : la position dans la liste est conservée
+        ancien = dict(existant)
+        self._desindexer(collection, existant)
+        if isinstance(existant, dict):
+            existant.clear()
+            existant.update(nouvel_element)
+        else:
+            existant.remplacer(nouvel_element)
+        self._indexer(collection, existant)
+        return ancien
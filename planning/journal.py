@@ -0,0 +1,110 @@
+"""Journal d'écriture anticipée des mutations et écriture atomique des instantanés"""
+import json
+import os
+import tempfile
+
+# Politiques de synchronisation disque
+FSYNC_TOUJOURS = "toujours"        # fsync après chaque mutation journalisée
+FSYNC_COMPACTION = "compaction"    # fsync uniquement lors de l'écriture d'un instantané
+FSYNC_JAMAIS = "jamais"            # laisse le système vider ses tampons
+POLITIQUES_FSYNC = (FSYNC_TOUJOURS, FSYNC_COMPACTION, FSYNC_JAMAIS)
+
+AJOUT = "ajout"
+MODIFICATION = "modification"
+SUPPRESSION = "suppression"
+
+
+def _fsync_dossier(dossier):
+    """Synchronise l'entrée de répertoire après un renommage (POSIX uniquement)"""
+    if os.name != "posix":
+        return
+    fd = os.open(dossier or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _mode_fichier(chemin):
+    """Mode du fichier remplacé, ou celui d'un nouveau fichier (0o666 moins le umask)"""
+    try:
+        return os.stat(chemin).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def ecrire_instantane(chemin, data, fsync=FSYNC_COMPACTION):
+    """Écrit les données dans un fichier temporaire puis le renomme atomiquement"""
+    dossier = os.path.dirname(chemin)
+    if dossier and not os.path.exists(dossier):
+        os.makedirs(dossier)
+    fd, chemin_temp = tempfile.mkstemp(dir=dossier or ".", prefix=".sauvegarde-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            # default=dict : les séances compactes (Mapping) s'écrivent comme des objets
+            json.dump(data, f, ensure_ascii=False, indent=4, default=dict)
+            if fsync != FSYNC_JAMAIS:
+                f.flush()
+                os.fsync(f.fileno())
+        # mkstemp crée le fichier en 0600 : le fichier remplacé garde ses droits
+        os.chmod(chemin_temp, _mode_fichier(chemin))
+        os.replace(chemin_temp, chemin)
+    except BaseException:
+        if os.path.exists(chemin_temp):
+            os.remove(chemin_temp)
+        raise
+    if fsync != FSYNC_JAMAIS:
+        _fsync_dossier(dossier)
+
+
+class Journal:
+    """Fichier JSON lines des mutations survenues depuis le dernier instantané"""
+
+    def __init__(self, chemin, fsync=FSYNC_COMPACTION):
+        if fsync not in POLITIQUES_FSYNC:
+            raise ValueError(f"Politique fsync inconnue : {fsync}")
+        self.chemin = chemin
+        self.fsync = fsync
+
+    def ajouter_lot(self, operations):
+        """Ajoute plusieurs opérations en fin de journal en une seule écriture
+
+        Retourne le nombre d'octets écrits.
+        """
+        ligne = "".join(json.dumps(operation, ensure_ascii=False) + "\n" for operation in operations).encode('utf-8')
+        dossier = os.path.dirname(self.chemin)
+        if dossier and not os.path.exists(dossier):
+            os.makedirs(dossier)
+        fd = os.open(self.chemin, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, ligne)
+            if self.fsync == FSYNC_TOUJOURS:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        return len(ligne)
+
+    def relire(self, position=0):
+        """Retourne (opérations, nouvelle position) à partir d'un décalage en octets
+
+        Une dernière ligne incomplète (écriture en cours ou interrompue) est
+        ignorée et sera relue au prochain appel.
+        """
+        if not os.path.exists(self.chemin):
+            return [], 0
+        with open(self.chemin, 'rb') as f:
+            f.seek(position)
+            contenu = f.read()
+        fin = contenu.rfind(b"\n") + 1
+        operations = []
+        for ligne in contenu[:fin].splitlines():
+            if ligne.strip():
+                operations.append(json.loads(ligne))
+        return operations, position + fin
+
+    def vider(self):
+        """Supprime le journal une fois son contenu intégré à un instantané"""
+        if os.path.exists(self.chemin):
+            os.remove(self.chemin)
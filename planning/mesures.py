@@ -0,0 +1,123 @@
+"""Chronométrage des portions critiques (spans), journalisé en JSON lines
+
+Désactivé par défaut, pour un coût quasi nul : `chronometre(nom)` laisse la
+fonction décorée telle quelle et `mesurer(nom)` retourne un contexte vide
+partagé. PLANNING_MESURES=chemin.jsonl l'active au démarrage du processus :
+chaque span terminé ajoute au fichier une ligne
+{"ts", "span", "ms", "parent", "pid", "thread", ...attributs}, et les
+dernières durées de chaque span restent en mémoire pour les percentiles
+(p50, p95) du panneau d'administration. Le parent est le span englobant
+dans le même thread : le temps propre d'un span (widgets émis par un
+onglet, par exemple) est sa durée moins celle de ses enfants.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Durées gardées en mémoire par span pour les percentiles
+NB_DUREES = 500
+
+
+def percentile(durees_triees, rang):
+    """Percentile au rang le plus proche d'une liste triée"""
+    return durees_triees[max(0, -(-rang * len(durees_triees) // 100) - 1)]
+
+
+class Mesures:
+    """Durées des spans : fichier JSON lines et dernières valeurs par nom"""
+
+    def __init__(self, chemin=None, nb_durees=NB_DUREES):
+        self.chemin = chemin
+        self.nb_durees = nb_durees
+        self.durees = {}
+        self._verrou = threading.Lock()
+        self._local = threading.local()
+        self._fichier = None
+        if chemin:
+            dossier = os.path.dirname(chemin)
+            if dossier:
+                os.makedirs(dossier, exist_ok=True)
+            # Une ligne par écriture : les lignes restent entières si le processus s'arrête
+            self._fichier = open(chemin, 'a', encoding='utf-8', buffering=1)
+
+    @contextlib.contextmanager
+    def span(self, nom, **attributs):
+        """Chronomètre le bloc, y compris s'il se termine par une exception (st.rerun)"""
+        pile = self._local.__dict__.setdefault("pile", [])
+        parent = pile[-1] if pile else None
+        pile.append(nom)
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = (time.perf_counter() - debut) * 1000
+            pile.pop()
+            self.enregistrer(nom, duree, parent, attributs)
+
+    def enregistrer(self, nom, duree, parent=None, attributs=None):
+        """Ajoute une durée (ms) au span `nom` et au fichier"""
+        with self._verrou:
+            if nom not in self.durees:
+                self.durees[nom] = deque(maxlen=self.nb_durees)
+            self.durees[nom].append(duree)
+            if self._fichier is not None:
+                ligne = {
+                    "ts": round(time.time(), 3), "span": nom, "ms": round(duree, 3), "parent": parent,
+                    "pid": os.getpid(), "thread": threading.current_thread().name,
+                }
+                ligne.update(attributs or {})
+                self._fichier.write(json.dumps(ligne, ensure_ascii=False, default=str) + "\n")
+
+    def statistiques(self):
+        """Retourne les (span, nombre, p50, p95, max) en ms, du p95 le plus élevé au plus faible"""
+        with self._verrou:
+            durees = {nom: sorted(valeurs) for nom, valeurs in self.durees.items()}
+        lignes = [
+            (nom, len(valeurs), percentile(valeurs, 50), percentile(valeurs, 95), valeurs[-1])
+            for nom, valeurs in durees.items()
+        ]
+        return sorted(lignes, key=lambda ligne: ligne[3], reverse=True)
+
+    def fermer(self):
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
+
+
+_mesures = Mesures(os.environ["PLANNING_MESURES"]) if os.environ.get("PLANNING_MESURES") else None
+_VIDE = contextlib.nullcontext()
+
+
+def actives():
+    """Indique si les mesures ont été activées au démarrage (PLANNING_MESURES)"""
+    return _mesures is not None
+
+
+def mesurer(nom, **attributs):
+    """Contexte chronométrant un bloc ; contexte vide partagé si les mesures sont désactivées"""
+    if _mesures is None:
+        return _VIDE
+    return _mesures.span(nom, **attributs)
+
+
+def chronometre(nom):
+    """Décorateur chronométrant chaque appel ; sans mesures, la fonction est retournée inchangée"""
+    def decorer(fonction):
+        if _mesures is None:
+            return fonction
+
+        @functools.wraps(fonction)
+        def fonction_chronometree(*args, **kwargs):
+            with _mesures.span(nom):
+                return fonction(*args, **kwargs)
+        return fonction_chronometree
+    return decorer
+
+
+def statistiques():
+    """Retourne les percentiles des spans mesurés par ce processus ([] sans mesures)"""
+    return _mesures.statistiques() if _mesures is not None else []
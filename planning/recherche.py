@@ -0,0 +1,27 @@
+"""Filtrage et pagination des séances pour les listes de l'interface"""
+
+
+def filtrer_seances(stockage, debut, fin, groupe_id=None, enseignant_id=None, recherche=""):
+    """Retourne les séances de la période correspondant aux filtres, triées par date
+
+    La période est résolue par l'index des dates ; les autres filtres ne
+    parcourent que les séances de la période.
+    """
+    seances = stockage.seances_entre(debut, fin, groupe_id=groupe_id)
+    if enseignant_id:
+        seances = [s for s in seances if s["enseignant_id"] == enseignant_id]
+    if recherche:
+        recherche = recherche.casefold()
+        seances = [s for s in seances if recherche in (s.get("matiere") or "").casefold()]
+    return seances
+
+
+def nombre_pages(nb_elements, taille_page):
+    """Retourne le nombre de pages (au moins une)"""
+    return max(1, -(-nb_elements // taille_page))
+
+
+def paginer(elements, page, taille_page):
+    """Retourne les éléments de la page demandée (numérotée à partir de 1)"""
+    debut = (page - 1) * taille_page
+    return elements[debut:debut + taille_page]
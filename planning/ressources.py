@@ -0,0 +1,84 @@
+"""Ressources statiques (logo) servies depuis la mémoire sans bloquer l'affichage"""
+import os
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+DOSSIER_CACHE = os.path.join('data', 'cache')
+
+
+class RessourceStatique:
+    """Fichier livré avec l'application, éventuellement remplacé par une URL
+
+    Le fichier local est lu une seule fois puis servi depuis la mémoire. Si une
+    URL est fournie, la dernière version téléchargée (gardée sur disque avec
+    son ETag) est servie et revalidée en arrière-plan au plus une fois par
+    `intervalle` secondes : l'appel à `contenu()` ne fait jamais d'accès réseau.
+    """
+
+    def __init__(self, chemin_local, url=None, dossier_cache=DOSSIER_CACHE, delai=5, intervalle=3600):
+        self.chemin_local = chemin_local
+        self.url = url
+        self.delai = delai
+        self.intervalle = intervalle
+        nom = os.path.basename(chemin_local)
+        self.chemin_cache = os.path.join(dossier_cache, nom)
+        self.chemin_etag = self.chemin_cache + '.etag'
+        self._verrou = threading.Lock()
+        self._contenu = None
+        self._derniere_revalidation = 0.0
+        self._revalidation_en_cours = False
+
+    def contenu(self):
+        """Retourne les octets de la ressource"""
+        with self._verrou:
+            if self._contenu is None:
+                self._contenu = self._lire_disque()
+            if self.url and not self._revalidation_en_cours \
+                    and time.monotonic() - self._derniere_revalidation >= self.intervalle:
+                self._revalidation_en_cours = True
+                threading.Thread(target=self._revalider, daemon=True).start()
+            return self._contenu
+
+    def _lire_disque(self):
+        """Lit la copie téléchargée si elle existe, sinon le fichier livré"""
+        chemin = self.chemin_cache if self.url and os.path.exists(self.chemin_cache) else self.chemin_local
+        with open(chemin, 'rb') as f:
+            return f.read()
+
+    def _revalider(self):
+        """Télécharge la ressource si elle a changé (If-None-Match)"""
+        try:
+            requete = Request(self.url)
+            if os.path.exists(self.chemin_etag) and os.path.exists(self.chemin_cache):
+                with open(self.chemin_etag, 'r', encoding='utf-8') as f:
+                    requete.add_header('If-None-Match', f.read().strip())
+            try:
+                with urlopen(requete, timeout=self.delai) as reponse:
+                    contenu = reponse.read()
+                    etag = reponse.headers.get('ETag')
+            except HTTPError as e:
+                if e.code == 304:
+                    return
+                raise
+
+            os.makedirs(os.path.dirname(self.chemin_cache), exist_ok=True)
+            chemin_temp = self.chemin_cache + '.tmp'
+            with open(chemin_temp, 'wb') as f:
+                f.write(contenu)
+            os.replace(chemin_temp, self.chemin_cache)
+            if etag:
+                with open(self.chemin_etag, 'w', encoding='utf-8') as f:
+                    f.write(etag)
+            elif os.path.exists(self.chemin_etag):
+                os.remove(self.chemin_etag)
+            with self._verrou:
+                self._contenu = contenu
+        except (URLError, OSError, ValueError):
+            # Hors ligne ou URL invalide : on garde la version courante
+            pass
+        finally:
+            with self._verrou:
+                self._derniere_revalidation = time.monotonic()
+                self._revalidation_en_cours = False
@@ -0,0 +1,232 @@
+"""Lecture validée des sauvegardes JSON avant restauration
+
+Le fichier est décodé élément par élément (sans jamais tenir le texte
+complet en mémoire), chaque élément est contrôlé contre le schéma de sa
+collection, puis l'intégrité référentielle est vérifiée une fois les cinq
+collections lues : groupe → promotion, promotion → session,
+séance → groupe et enseignant.
+
+`migrer_seances` réécrit les séances d'un stockage ancien au format
+normalisé (sans noms recopiés), l'état précédent étant archivé.
+"""
+import io
+import json
+from collections.abc import Mapping
+
+from planning.entites import REFERENCES, erreurs_element
+from planning.seances import normaliser_seance
+from planning.stockage import CLE_COMPTEURS, COLLECTIONS, EXTENSIONS_SQLITE, ouvrir_stockage
+
+TAILLE_BLOC = 1 << 16
+MAX_ERREURS = 50
+ESPACES = " \t\r\n"
+
+
+class ErreurRestauration(ValueError):
+    """Sauvegarde refusée ; `erreurs` liste les problèmes trouvés"""
+
+    def __init__(self, erreurs):
+        super().__init__(f"{len(erreurs)} erreur(s) dans la sauvegarde : {erreurs[0]}")
+        self.erreurs = erreurs
+
+
+class _LecteurJSON:
+    """Décode un flux JSON par morceaux, une valeur à la fois"""
+
+    def __init__(self, fichier):
+        if isinstance(fichier, io.TextIOBase):
+            self.texte = fichier
+        else:
+            self.texte = io.TextIOWrapper(fichier, encoding="utf-8-sig")
+        self.decodeur = json.JSONDecoder()
+        self.tampon = ""
+        self.position = 0
+
+    def _remplir(self):
+        bloc = self.texte.read(TAILLE_BLOC)
+        self.tampon = self.tampon[self.position:] + bloc
+        self.position = 0
+        return bloc != ""
+
+    def caractere(self):
+        """Retourne le prochain caractère significatif sans le consommer ("" en fin de flux)"""
+        while True:
+            while self.position < len(self.tampon) and self.tampon[self.position] in ESPACES:
+                self.position += 1
+            if self.position < len(self.tampon):
+                return self.tampon[self.position]
+            if not self._remplir():
+                return ""
+
+    def consommer(self, *attendus):
+        caractere = self.caractere()
+        if caractere not in attendus or caractere == "":
+            trouve = f"« {caractere} »" if caractere else "la fin du fichier"
+            raise ErreurRestauration([f"JSON invalide : {' ou '.join(attendus)} attendu, {trouve} trouvé"])
+        self.position += 1
+        return caractere
+
+    def valeur(self):
+        """Décode la valeur suivante, en relisant le flux si elle est coupée par le tampon"""
+        self.caractere()
+        while True:
+            try:
+                valeur, fin = self.decodeur.raw_decode(self.tampon, self.position)
+            except json.JSONDecodeError as e:
+                if self._remplir():
+                    continue
+                raise ErreurRestauration([f"JSON invalide : {e.msg}"])
+            # Un nombre en fin de tampon peut continuer dans le bloc suivant
+            if fin == len(self.tampon) and self._remplir():
+                continue
+            self.position = fin
+            return valeur
+
+
+def iterer_sauvegarde(fichier, presentes=None):
+    """Itère sur les (collection, élément) d'une sauvegarde sans la charger entièrement
+
+    Les noms des collections rencontrées, même vides, sont ajoutés à `presentes`.
+    """
+    presentes = set() if presentes is None else presentes
+    lecteur = _LecteurJSON(fichier)
+    lecteur.consommer("{")
+    if lecteur.caractere() == "}":
+        lecteur.consommer("}")
+        return
+    while True:
+        collection = lecteur.valeur()
+        if collection == CLE_COMPTEURS:
+            # Compteurs d'id de l'instantané : le stockage restauré garde les siens
+            lecteur.consommer(":")
+            lecteur.valeur()
+            if lecteur.consommer(",", "}") == "}":
+                break
+            continue
+        if collection not in COLLECTIONS:
+            raise ErreurRestauration([f"Collection inconnue : {collection}"])
+        presentes.add(collection)
+        lecteur.consommer(":")
+        lecteur.consommer("[")
+        if lecteur.caractere() == "]":
+            lecteur.consommer("]")
+        else:
+            while True:
+                yield collection, lecteur.valeur()
+                if lecteur.consommer(",", "]") == "]":
+                    break
+        if lecteur.consommer(",", "}") == "}":
+            break
+    if lecteur.caractere() != "":
+        raise ErreurRestauration(["JSON invalide : contenu après la fin du document"])
+
+
+def erreurs_references(data):
+    """Retourne les références vers des entités absentes"""
+    ids = {collection: {e["id"] for e in data.get(collection, [])} for collection in COLLECTIONS}
+    erreurs = []
+    for collection, cle, cible in REFERENCES:
+        for element in data.get(collection, []):
+            if element.get(cle) not in ids[cible]:
+                erreurs.append(f"{collection} #{element['id']} : {cle} {element.get(cle)} inexistant dans {cible}")
+    return erreurs
+
+
+def verifier_donnees(data, max_erreurs=MAX_ERREURS):
+    """Contrôle des données déjà décodées (schéma, ids en double, références)"""
+    erreurs = []
+    for collection in COLLECTIONS:
+        if collection not in data:
+            erreurs.append(f"Collection manquante : {collection}")
+            continue
+        vus = set()
+        for element in data[collection]:
+            erreurs.extend(erreurs_element(collection, element))
+            if isinstance(element, Mapping):
+                if element.get("id") in vus:
+                    erreurs.append(f"{collection} #{element.get('id')} : id en double")
+                vus.add(element.get("id"))
+        if len(erreurs) >= max_erreurs:
+            return erreurs[:max_erreurs]
+    if not erreurs:
+        erreurs = erreurs_references(data)
+    return erreurs[:max_erreurs]
+
+
+def lire_sauvegarde(fichier, max_erreurs=MAX_ERREURS):
+    """Décode et valide une sauvegarde, lève ErreurRestauration si elle est refusée
+
+    Les éléments sont contrôlés au fil de la lecture : la lecture s'arrête dès
+    `max_erreurs` problèmes trouvés.
+    """
+    data = {collection: [] for collection in COLLECTIONS}
+    vus = {collection: set() for collection in COLLECTIONS}
+    presentes = set()
+    erreurs = []
+    for collection, element in iterer_sauvegarde(fichier, presentes):
+        erreurs_trouvees = erreurs_element(collection, element)
+        if not erreurs_trouvees and element["id"] in vus[collection]:
+            erreurs_trouvees = [f"{collection} #{element['id']} : id en double"]
+        if erreurs_trouvees:
+            erreurs.extend(erreurs_trouvees)
+            if len(erreurs) >= max_erreurs:
+                raise ErreurRestauration(erreurs[:max_erreurs])
+            continue
+        vus[collection].add(element["id"])
+        data[collection].append(element)
+    erreurs.extend(f"Collection manquante : {collection}" for collection in COLLECTIONS if collection not in presentes)
+    if erreurs:
+        raise ErreurRestauration(erreurs[:max_erreurs])
+
+    erreurs = erreurs_references(data)
+    if erreurs:
+        raise ErreurRestauration(erreurs[:max_erreurs])
+    return data
+
+
+def restaurer_fichier(stockage, fichier):
+    """Valide une sauvegarde puis remplace les données, l'état courant étant archivé"""
+    data = lire_sauvegarde(fichier)
+    stockage.restaurer(data)
+    return data
+
+
+def restaurer_archive(stockage, numero):
+    """Revient à l'archive `numero` (1 = la plus récente) après l'avoir vérifiée"""
+    chemin = stockage.chemin_archive(numero)
+    # Une archive SQLite est lue telle quelle : ni schéma ajouté, ni passage en WAL
+    options = {"lecture_seule": True} if chemin.lower().endswith(EXTENSIONS_SQLITE) else {}
+    archive = ouvrir_stockage(chemin, **options)
+    try:
+        data = archive.charger()
+    finally:
+        archive.fermer()
+    erreurs = verifier_donnees(data)
+    if erreurs:
+        raise ErreurRestauration(erreurs)
+    stockage.restaurer(data)
+    return data
+
+
+def migrer_seances(stockage):
+    """Retire des séances les noms, durées et tarifs recopiés, sans perte
+
+    Les données doivent d'abord être intègres (toute séance référence un
+    groupe et un enseignant existants). Un champ qui ne peut pas être
+    reconstruit est conservé (voir `normaliser_seance`) par une sauvegarde
+    JSON ; une base SQLite n'a pas de colonne pour lui. L'état précédent
+    devient l'archive n°1 : `restaurer_archive(stockage, 1)` annule la
+    migration. Retourne (nombre de séances, {champ conservé: nombre}).
+    """
+    data = stockage.charger()
+    erreurs = verifier_donnees(data)
+    if erreurs:
+        raise ErreurRestauration(erreurs)
+    seances, conserves = [], {}
+    for seance in data["seances"]:
+        seance, champs = normaliser_seance(stockage.index, seance)
+        seances.append(seance)
+        for champ in champs:
+            conserves[champ] = conserves.get(champ, 0) + 1
+    stockage.restaurer(dict(data, seances=seances))
+    return len(seances), conserves
@@ -0,0 +1,177 @@
+"""Séances : construction, représentation compacte et noms résolus par jointure
+
+Une séance ne garde que des ids, sa date, son créneau, sa matière et son
+coût (figé à la création). Les noms de l'enseignant, du groupe et de la
+promotion, la durée et le tarif sont retrouvés à l'affichage : renommer une
+entité se voit aussitôt sur toutes ses séances.
+"""
+import sys
+from collections.abc import Mapping
+
+from planning.creneaux import duree
+from planning.entites import libelle
+
+CHAMPS = ("id", "date", "creneau", "groupe_id", "promo_id", "enseignant_id", "matiere", "cout", "version")
+# Collection → colonnes enregistrées (tables SQLite, feuilles de l'export)
+COLONNES = {
+    "enseignants": ("id", "nom", "prenom", "tarif", "version"),
+    "sessions": ("id", "nom", "annee", "version"),
+    "promotions": ("id", "nom", "session_id", "version"),
+    "groupes": ("id", "nom", "promo_id", "version"),
+    "seances": CHAMPS
+}
+# Champs recopiés par les anciennes séances, reconstruits par `avec_noms`
+CHAMPS_DENORMALISES = ("duree", "groupe", "promotion", "enseignant", "tarif")
+# Textes très répétés, partagés entre séances plutôt que dupliqués
+CHAMPS_PARTAGES = frozenset(("date", "creneau", "matiere"))
+TOLERANCE = 1e-6
+
+_CHAMPS = frozenset(CHAMPS)
+_ABSENT = object()
+
+
+class Seance(Mapping):
+    """Séance en mémoire : emplacements fixes (`__slots__`) au lieu d'un dict
+
+    Se lit comme un dictionnaire (`s["date"]`, `s.get(...)`, `dict(s)`,
+    égalité avec un dict). Un champ hors de CHAMPS (sauvegarde ancienne ou
+    enrichie) est conservé dans un petit dict annexe : la conversion ne perd
+    rien. `remplacer` met à jour la séance sur place, sans changer d'identité.
+    """
+
+    __slots__ = CHAMPS + ("_autres",)
+
+    def __init__(self, element):
+        self.remplacer(element)
+
+    def remplacer(self, element):
+        """Remplace tout le contenu de la séance par celui de `element`"""
+        presents = 0
+        for champ in CHAMPS:
+            valeur = element.get(champ, _ABSENT)
+            if valeur is not _ABSENT:
+                presents += 1
+                if champ in CHAMPS_PARTAGES and type(valeur) is str:
+                    valeur = sys.intern(valeur)
+            setattr(self, champ, valeur)
+        self._autres = None
+        if len(element) > presents:
+            self._autres = {cle: valeur for cle, valeur in element.items() if cle not in _CHAMPS}
+
+    def __getitem__(self, cle):
+        if cle in _CHAMPS:
+            valeur = getattr(self, cle)
+            if valeur is _ABSENT:
+                raise KeyError(cle)
+            return valeur
+        if self._autres is None:
+            raise KeyError(cle)
+        return self._autres[cle]
+
+    def get(self, cle, defaut=None):
+        if cle in _CHAMPS:
+            valeur = getattr(self, cle)
+            return defaut if valeur is _ABSENT else valeur
+        return defaut if self._autres is None else self._autres.get(cle, defaut)
+
+    def __contains__(self, cle):
+        return self.get(cle, _ABSENT) is not _ABSENT
+
+    def __iter__(self):
+        for champ in CHAMPS:
+            if getattr(self, champ) is not _ABSENT:
+                yield champ
+        if self._autres:
+            yield from self._autres
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Seance({dict(self)!r})"
+
+
+def calculer_cout(creneau, tarif):
+    """Coût d'une séance : durée du créneau × tarif horaire"""
+    return duree(creneau) * tarif
+
+
+def construire_seance(index, date_seance, creneau, groupe_id, enseignant_id, matiere, seance_id=None):
+    """Construit une séance à partir des ids, comme le formulaire de saisie
+
+    `date_seance` est une date ISO ; le coût vient de la durée du créneau et du
+    tarif horaire actuel de l'enseignant, la promotion du groupe. Sans
+    `seance_id`, l'id est attribué par le stockage à l'ajout.
+    """
+    enseignant = index.element("enseignants", enseignant_id)
+    tarif = float(enseignant["tarif"]) if enseignant else 0
+    groupe = index.element("groupes", groupe_id)
+    return {
+        "id": seance_id,
+        "date": date_seance,
+        "creneau": creneau,
+        "groupe_id": groupe_id,
+        "promo_id": groupe["promo_id"] if groupe else None,
+        "enseignant_id": enseignant_id,
+        "matiere": matiere,
+        "cout": calculer_cout(creneau, tarif)
+    }
+
+
+def noms(index, seance):
+    """Retourne les noms actuels (enseignant, groupe, promotion) d'une séance
+
+    Les noms recopiés par une ancienne séance ne servent que si l'entité
+    n'existe pas (ou plus) dans l'index.
+    """
+    enseignant = index.element("enseignants", seance.get("enseignant_id"))
+    groupe = index.element("groupes", seance.get("groupe_id"))
+    promotion = index.element("promotions", seance.get("promo_id"))
+    return (
+        libelle("enseignants", enseignant) if enseignant else seance.get("enseignant", "N/A"),
+        groupe["nom"] if groupe else seance.get("groupe", "N/A"),
+        promotion["nom"] if promotion else seance.get("promotion", "N/A"),
+    )
+
+
+def avec_noms(index, seance):
+    """Retourne un dict de la séance complété des noms, de la durée et du tarif
+
+    Forme détaillée pour l'affichage et les exports ; le tarif est celui
+    appliqué à la création (coût ÷ durée).
+    """
+    enseignant, groupe, promotion = noms(index, seance)
+    heures = duree(seance["creneau"])
+    ligne = dict(seance)
+    ligne.update(
+        duree=seance.get("duree", heures), groupe=groupe, promotion=promotion, enseignant=enseignant,
+        tarif=seance.get("tarif", seance["cout"] / heures if heures else 0.0)
+    )
+    return ligne
+
+
+def normaliser_seance(index, seance):
+    """Retire d'une séance les champs dénormalisés reconstructibles, sans perte
+
+    Un nom n'est retiré que si l'entité référencée existe, la durée que si elle
+    est celle du créneau, le tarif que si durée × tarif redonne le coût.
+    Retourne (séance normalisée, champs conservés faute de pouvoir les
+    reconstruire).
+    """
+    enseignant_id, groupe_id, promo_id = seance.get("enseignant_id"), seance.get("groupe_id"), seance.get("promo_id")
+    heures = duree(seance["creneau"])
+    reconstructibles = {
+        "enseignant": index.element("enseignants", enseignant_id) is not None,
+        "groupe": index.element("groupes", groupe_id) is not None,
+        "promotion": index.element("promotions", promo_id) is not None,
+        "duree": seance.get("duree") == heures,
+        "tarif": abs((seance.get("tarif") or 0) * heures - (seance.get("cout") or 0)) <= TOLERANCE,
+    }
+    normalisee, conserves = {}, []
+    for cle, valeur in seance.items():
+        if cle in CHAMPS_DENORMALISES:
+            if reconstructibles[cle]:
+                continue
+            conserves.append(cle)
+        normalisee[cle] = valeur
+    return normalisee, conserves
@@ -0,0 +1,75 @@
+"""Serveur HTTP des flux ICS pour les abonnements d'agenda
+
+Usage : python -m planning.serveur_ics [--hote 127.0.0.1] [--port 8502] [--stockage data/sauvegardes.json]
+
+Les flux sont servis sous /<type>/<id>.ics, type parmi enseignant, groupe,
+promotion et session. Un client qui renvoie l'ETag reçu (If-None-Match)
+obtient 304 sans corps tant que son flux n'a pas changé.
+
+Le serveur n'écoute que la machine locale par défaut : les flux ne sont pas
+authentifiés, `--hote 0.0.0.0` ne doit servir que derrière un proxy qui
+contrôle l'accès.
+"""
+import argparse
+import os
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from planning.ics import FILTRES, TYPE_MIME, FluxICS
+from planning.stockage import FICHIER_DONNEES, ouvrir_stockage
+
+CHEMIN_FLUX = re.compile(r"^/(?P<type>[a-z]+)/(?P<id>\d+)\.ics$")
+
+
+def etag_reconnu(if_none_match, etag):
+    """Indique si l'en-tête If-None-Match désigne l'ETag (liste, `*` ou ETag faible W/)"""
+    if not if_none_match:
+        return False
+    etags = [valeur.strip() for valeur in if_none_match.split(",")]
+    return "*" in etags or etag in (e[2:] if e.startswith("W/") else e for e in etags)
+
+
+def creer_gestionnaire(generateur):
+    """Retourne la classe de gestion des requêtes liée au générateur de flux"""
+
+    class GestionnaireICS(BaseHTTPRequestHandler):
+        def do_GET(self):
+            correspondance = CHEMIN_FLUX.match(self.path.split("?", 1)[0])
+            if not correspondance or correspondance["type"] not in FILTRES:
+                self.send_error(404, "Flux inconnu")
+                return
+            contenu, etag = generateur.flux(correspondance["type"], int(correspondance["id"]))
+            if etag_reconnu(self.headers.get("If-None-Match"), etag):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", TYPE_MIME)
+            self.send_header("Content-Length", str(len(contenu)))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(contenu)
+
+        def log_message(self, format, *args):
+            pass
+
+    return GestionnaireICS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sert les flux ICS de la planification")
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--stockage", default=os.environ.get("PLANNING_STOCKAGE", FICHIER_DONNEES))
+    arguments = parser.parse_args()
+
+    generateur = FluxICS(ouvrir_stockage(arguments.stockage))
+    serveur = ThreadingHTTPServer((arguments.hote, arguments.port), creer_gestionnaire(generateur))
+    print(f"Flux ICS servis sur http://{arguments.hote}:{arguments.port}/<type>/<id>.ics")
+    serveur.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
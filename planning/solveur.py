@@ -0,0 +1,246 @@
+"""Génération automatique des séances à partir des besoins d'enseignement
+
+Un besoin décrit un volume d'heures à placer pour un groupe et une matière :
+
+    {"groupe_id": 3, "matiere": "Réseaux", "enseignants": [2, 5],
+     "heures": 40, "debut": "2025-01-06", "fin": "2025-06-27"}
+
+(`enseignant_id` peut remplacer la liste `enseignants`.) Les heures sont
+découpées en séances de 4h, plus une de 2h si le volume l'exige, puis placées
+sur les créneaux de même durée sans chevauchement par enseignant ni par
+groupe, en respectant les indisponibilités des enseignants.
+
+Le placement est glouton (enseignant le moins cher d'abord, dates réparties
+sur la période), puis une recherche locale en « min-conflits » déloge les
+séances gênantes pour placer les restantes, dans la limite d'un budget de
+temps.
+"""
+import random
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from planning.conflits import INTERVALLES, IndexConflits
+from planning.creneaux import CRENEAUX
+from planning.seances import construire_seance
+
+# Durée d'une séance → créneaux utilisables
+CRENEAUX_PAR_DUREE = {}
+for _libelle, _creneau in CRENEAUX.items():
+    CRENEAUX_PAR_DUREE.setdefault(_creneau.duree, []).append(_libelle)
+
+JOURNEE = (0, 24 * 60)
+JOURS_OUVRES = (0, 1, 2, 3, 4)
+ECHANTILLON = 64
+
+Resultat = namedtuple("Resultat", ["seances", "non_placees", "cout", "duree_calcul"])
+
+
+class Unite:
+    """Séance à placer, issue du découpage d'un besoin"""
+
+    __slots__ = ("numero", "besoin", "duree", "enseignants", "dates", "cible")
+
+    def __init__(self, numero, besoin, duree, enseignants, dates, cible):
+        self.numero = numero
+        self.besoin = besoin
+        self.duree = duree
+        self.enseignants = enseignants
+        self.dates = dates
+        self.cible = cible
+
+
+def decouper_heures(heures):
+    """Découpe un volume d'heures en durées de séances (4h puis 2h)"""
+    heures = int(heures)
+    if heures <= 0 or heures % 2:
+        raise ValueError(f"Volume d'heures invalide : {heures} (multiple de 2 attendu)")
+    return [4] * (heures // 4) + [2] * (heures % 4 // 2)
+
+
+def _dates_ouvrees(debut, fin, jours):
+    jour, fin = date.fromisoformat(debut), date.fromisoformat(fin)
+    dates = []
+    while jour <= fin:
+        if jour.weekday() in jours:
+            dates.append(jour.isoformat())
+        jour += timedelta(days=1)
+    return dates
+
+
+def _indisponibilites_par_date(indisponibilites):
+    """{enseignant_id: [date ISO ou (date ISO, créneau)]} → {(enseignant_id, date): [intervalles]}"""
+    resultat = {}
+    for enseignant_id, entrees in (indisponibilites or {}).items():
+        for entree in entrees:
+            if isinstance(entree, str):
+                jour, intervalle = entree, JOURNEE
+            else:
+                jour, intervalle = entree[0], INTERVALLES[entree[1]]
+            resultat.setdefault((enseignant_id, jour), []).append(intervalle)
+    return resultat
+
+
+class Solveur:
+    """État du placement : affectations et occupation des ressources"""
+
+    def __init__(self, index, besoins, seances_existantes=(), indisponibilites=None,
+                 minimiser_cout=True, jours=JOURS_OUVRES, graine=0):
+        self.index = index
+        self.besoins = besoins
+        self.hasard = random.Random(graine)
+        self.indisponibles = _indisponibilites_par_date(indisponibilites)
+        # Les séances existantes sont fixes ; les séances placées ont des ids négatifs
+        self.occupation = IndexConflits(seances_existantes)
+        self.affectations = {}
+        self.tarifs = {}
+        self.unites = []
+
+        for numero_besoin, besoin in enumerate(besoins):
+            enseignants = list(besoin.get("enseignants") or [besoin["enseignant_id"]])
+            for enseignant_id in enseignants:
+                enseignant = index.element("enseignants", enseignant_id)
+                self.tarifs[enseignant_id] = float(enseignant["tarif"]) if enseignant else 0.0
+            if minimiser_cout:
+                enseignants.sort(key=lambda e: self.tarifs[e])
+            dates = _dates_ouvrees(besoin["debut"], besoin["fin"], jours)
+            durees = decouper_heures(besoin["heures"])
+            for rang, duree_unite in enumerate(durees):
+                # Date visée : répartition régulière des séances sur la période
+                cible = (rang + 0.5) * len(dates) / len(durees)
+                self.unites.append(Unite(len(self.unites), numero_besoin, duree_unite, enseignants, dates, cible))
+
+    def _seance(self, unite, enseignant_id, jour, creneau):
+        return {
+            "id": -(unite.numero + 1),
+            "date": jour,
+            "creneau": creneau,
+            "groupe_id": self.besoins[unite.besoin]["groupe_id"],
+            "enseignant_id": enseignant_id,
+        }
+
+    def _indisponible(self, enseignant_id, jour, creneau):
+        debut, fin = INTERVALLES[creneau]
+        return any(d < fin and f > debut for d, f in self.indisponibles.get((enseignant_id, jour), ()))
+
+    def _candidats(self, unite):
+        """Emplacements (enseignant, date, créneau) par préférence décroissante"""
+        ordre = sorted(range(len(unite.dates)), key=lambda i: abs(i + 0.5 - unite.cible))
+        for enseignant_id in unite.enseignants:
+            for i in ordre:
+                for creneau in CRENEAUX_PAR_DUREE[unite.duree]:
+                    yield enseignant_id, unite.dates[i], creneau
+
+    def _bloqueurs(self, unite, emplacement):
+        """Ids des séances gênant un emplacement, None s'il est interdit (indisponibilité, séance fixe)"""
+        if self._indisponible(*emplacement):
+            return None
+        ids = {seance_id for _, seance_id in self.occupation.conflits(self._seance(unite, *emplacement))}
+        if any(seance_id > 0 for seance_id in ids):
+            return None
+        return ids
+
+    def placer(self, unite, emplacement):
+        self.affectations[unite.numero] = emplacement
+        self.occupation.mettre_a_jour(None, self._seance(unite, *emplacement))
+
+    def retirer(self, unite):
+        emplacement = self.affectations.pop(unite.numero)
+        self.occupation.mettre_a_jour(self._seance(unite, *emplacement), None)
+
+    def placer_glouton(self, unite):
+        """Place l'unité au premier emplacement libre, retourne False s'il n'y en a pas"""
+        for emplacement in self._candidats(unite):
+            if self._bloqueurs(unite, emplacement) == set():
+                self.placer(unite, emplacement)
+                return True
+        return False
+
+    def deloger(self, unite, tabou):
+        """Place l'unité en délogeant le moins de séances possible, retourne les délogées"""
+        emplacements = list(self._candidats(unite))
+        if len(emplacements) > ECHANTILLON:
+            emplacements = self.hasard.sample(emplacements, ECHANTILLON)
+        meilleur, meilleurs_bloqueurs = None, None
+        for emplacement in emplacements:
+            bloqueurs = self._bloqueurs(unite, emplacement)
+            if bloqueurs is None or bloqueurs & tabou:
+                continue
+            if meilleur is None or len(bloqueurs) < len(meilleurs_bloqueurs):
+                meilleur, meilleurs_bloqueurs = emplacement, bloqueurs
+        if meilleur is None:
+            return None
+        deloges = [self.unites[-seance_id - 1] for seance_id in meilleurs_bloqueurs]
+        for deloge in deloges:
+            self.retirer(deloge)
+        self.placer(unite, meilleur)
+        return deloges
+
+    def cout(self):
+        return sum(self.unites[numero].duree * self.tarifs[emplacement[0]]
+                   for numero, emplacement in self.affectations.items())
+
+    def resoudre(self, budget_temps):
+        """Placement glouton puis réparation jusqu'à épuisement du budget de temps"""
+        limite = time.perf_counter() + budget_temps
+        # Les unités les plus contraintes (peu de dates) d'abord
+        ordre = sorted(self.unites, key=lambda u: (len(u.dates) * len(u.enseignants), u.numero))
+        restantes = [unite for unite in ordre if not self.placer_glouton(unite)]
+
+        meilleures = dict(self.affectations), len(restantes)
+        tabou = {}
+        iteration = 0
+        while restantes and time.perf_counter() < limite:
+            iteration += 1
+            unite = restantes.pop(self.hasard.randrange(len(restantes)))
+            if self.placer_glouton(unite):
+                deloges = []
+            else:
+                # Les séances récemment placées ne sont pas délogées tout de suite
+                interdits = {-(numero + 1) for numero, fin in tabou.items() if fin > iteration}
+                deloges = self.deloger(unite, interdits)
+                if deloges is None:
+                    restantes.append(unite)
+                    continue
+                tabou[unite.numero] = iteration + 10
+            for deloge in deloges:
+                if not self.placer_glouton(deloge):
+                    restantes.append(deloge)
+            if len(restantes) < meilleures[1]:
+                meilleures = dict(self.affectations), len(restantes)
+
+        if len(restantes) > meilleures[1]:
+            for numero in list(self.affectations):
+                self.retirer(self.unites[numero])
+            for numero, emplacement in meilleures[0].items():
+                self.placer(self.unites[numero], emplacement)
+
+    def resultat(self, debut_calcul):
+        seances = []
+        for numero in sorted(self.affectations, key=lambda n: self.affectations[n][1:]):
+            unite = self.unites[numero]
+            besoin = self.besoins[unite.besoin]
+            enseignant_id, jour, creneau = self.affectations[numero]
+            seances.append(construire_seance(
+                self.index, jour, creneau, besoin["groupe_id"], enseignant_id, besoin["matiere"]
+            ))
+        non_placees = [(u.besoin, u.duree) for u in self.unites if u.numero not in self.affectations]
+        return Resultat(seances, non_placees, self.cout(), time.perf_counter() - debut_calcul)
+
+
+def resoudre(index, besoins, seances_existantes=(), indisponibilites=None, budget_temps=5.0,
+             minimiser_cout=True, jours=JOURS_OUVRES, graine=0):
+    """Génère les séances couvrant les besoins
+
+    `seances_existantes` sont des séances déjà planifiées, jamais déplacées.
+    `indisponibilites` associe à un enseignant des dates ISO (journée entière)
+    ou des couples (date ISO, créneau). Avec `minimiser_cout`, l'enseignant le
+    moins cher parmi les candidats d'un besoin est essayé en premier.
+
+    Retourne un Resultat : séances sans id (à ajouter au stockage), unités non
+    placées sous forme (indice du besoin, durée), coût total et durée du calcul.
+    """
+    debut_calcul = time.perf_counter()
+    solveur = Solveur(index, besoins, seances_existantes, indisponibilites, minimiser_cout, jours, graine)
+    solveur.resoudre(budget_temps)
+    return solveur.resultat(debut_calcul)
@@ -0,0 +1,620 @@
+"""Stockage des données de planification avec cache partagé entre les reruns"""
+import json
+import os
+import shutil
+import threading
+
+from planning.budget import AXES as AXES_BUDGET, AgregatsBudget
+from planning.colonnes import InstantaneColonnes, dossier_colonnes, lire_colonnes, lire_etat
+from planning.conflits import IndexConflits, verifier_chevauchements
+from planning.entites import LIBELLES, verifier_suppression
+from planning.index import REPRESENTATIONS, IndexDonnees, compteurs_ids
+from planning.journal import (
+    AJOUT, MODIFICATION, SUPPRESSION, FSYNC_COMPACTION,
+    Journal, ecrire_instantane
+)
+from planning.mesures import chronometre
+from planning.verrou import VerrouFichier
+
+FICHIER_DONNEES = os.path.join('data', 'sauvegardes.json')
+# Les séances en dernier : un parcours en flux connaît déjà les entités qu'elles référencent
+COLLECTIONS = ("enseignants", "sessions", "promotions", "groupes", "seances")
+# Prochain id de chaque collection, enregistré avec les données (jamais réattribué)
+CLE_COMPTEURS = "compteurs"
+EXTENSIONS_SQLITE = ('.db', '.sqlite', '.sqlite3')
+# Nombre d'instantanés précédents conservés lors d'une restauration
+NB_ARCHIVES = 5
+# Collection et libellé des entités désignées par les axes du budget
+ENTITES_BUDGET = {
+    "enseignant": ("enseignants", LIBELLES["enseignants"]),
+    "promotion": ("promotions", LIBELLES["promotions"]),
+    "groupe": ("groupes", LIBELLES["groupes"]),
+}
+
+
+class ConflitVersion(Exception):
+    """L'élément a été modifié ou supprimé par un autre utilisateur depuis sa lecture"""
+
+    def __init__(self, collection, element_id, version_attendue, version_actuelle):
+        if element_id is None:
+            message = (f"{collection} : données en version {version_actuelle}, "
+                       f"version {version_attendue} attendue")
+        elif version_actuelle is None:
+            message = f"{collection} #{element_id} a été supprimé entre-temps"
+        else:
+            message = (f"{collection} #{element_id} est en version {version_actuelle}, "
+                       f"version {version_attendue} attendue")
+        super().__init__(message)
+        self.collection = collection
+        self.element_id = element_id
+        self.version_attendue = version_attendue
+        self.version_actuelle = version_actuelle
+
+
+def version_element(element):
+    """Retourne la version d'un élément (1 pour les données antérieures aux versions)"""
+    return element.get("version") or 1
+
+
+def donnees_vides():
+    """Retourne une structure de données vide"""
+    return {collection: [] for collection in COLLECTIONS}
+
+
+def _signature_fichier(chemin):
+    """Retourne (mtime, taille) du fichier ou None s'il n'existe pas"""
+    try:
+        infos = os.stat(chemin)
+    except FileNotFoundError:
+        return None
+    return (infos.st_mtime_ns, infos.st_size)
+
+
+def _extraire_ajouts(derniers, collection):
+    """Retire de `derniers` les éléments restants d'une collection, produits en (collection, élément)"""
+    for cle in [cle for cle in derniers if cle[0] == collection]:
+        element = derniers.pop(cle)
+        if element is not None:
+            yield collection, element
+
+
+def ouvrir_stockage(chemin=FICHIER_DONNEES, **options):
+    """Ouvre le moteur de stockage adapté à l'extension du fichier"""
+    if chemin.lower().endswith(EXTENSIONS_SQLITE):
+        from planning.stockage_sqlite import StockageSQLite
+        return StockageSQLite(chemin, **options)
+    return StockageJSON(chemin, **options)
+
+
+class Stockage:
+    """Interface commune aux moteurs de stockage
+
+    `charger()` retourne le document complet (les cinq collections) mis en
+    cache avec son `index`, ses `agregats` budgétaires et l'index des
+    `conflits` d'horaires ; la requête
+    `seances_entre` peut être surchargée par les moteurs capables de ne lire
+    que les lignes utiles.
+
+    Les moteurs implémentent `_rafraichir()` (synchronise le cache avec le
+    disque, via `_reconstruire`) et `_ecrire(operation)` (persiste une
+    mutation et l'applique au cache via `_appliquer`).
+
+    Chaque élément porte un numéro de `version` incrémenté à chaque
+    modification. Les écritures se font sous un verrou de fichier commun à
+    tous les processus : relecture, attribution des ids, comparaison des
+    versions et écriture sont atomiques (compare-and-swap). Le prochain id de
+    chaque collection est enregistré avec les données : l'id d'un élément
+    supprimé n'est jamais réattribué, même après relecture.
+
+    Avec `colonnes=True`, un instantané en colonnes des séances (fichiers
+    Arrow par mois, voir planning.colonnes) est réécrit après chaque
+    écriture pour les seuls mois touchés ; `colonnes_entre` le lit.
+    """
+
+    def __init__(self, chemin, colonnes=False):
+        self.chemin = chemin
+        self._verrou = threading.RLock()
+        self._verrou_ecriture = VerrouFichier(os.path.splitext(chemin)[0] + '.lock')
+        self._donnees = None
+        self.index = IndexDonnees()
+        self.agregats = AgregatsBudget()
+        self.conflits = IndexConflits()
+        self.colonnes = InstantaneColonnes(dossier_colonnes(chemin)) if colonnes else None
+        # Vues dérivées des séances, tenues à jour à chaque mutation
+        self._vues_seances = (self.agregats, self.conflits) + ((self.colonnes,) if colonnes else ())
+        # Incrémenté à chaque changement du contenu (lecture ou écriture)
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.rechargements = 0
+
+    def _rafraichir(self):
+        """Synchronise le cache avec le disque, retourne True s'il était à jour"""
+        raise NotImplementedError
+
+    def _ecrire(self, operation):
+        """Persiste une mutation et l'applique au cache"""
+        raise NotImplementedError
+
+    def _ecrire_lot(self, operations):
+        """Persiste plusieurs mutations ; les moteurs peuvent les regrouper en une écriture"""
+        for operation in operations:
+            self._ecrire(operation)
+
+    def _reconstruire(self, data, compteurs=None):
+        """Reconstruit l'index et les vues des séances après un chargement complet
+
+        Les séances sont d'abord converties en représentation compacte (Seance) ;
+        `compteurs` sont les prochains ids enregistrés avec les données.
+        """
+        for collection, representation in REPRESENTATIONS.items():
+            if collection in data:
+                data[collection] = [
+                    e if isinstance(e, representation) else representation(e) for e in data[collection]
+                ]
+        self.index.reconstruire(data, compteurs)
+        for vue in self._vues_seances:
+            vue.reconstruire(data.get("seances", []))
+
+    def _appliquer(self, operation):
+        """Applique une mutation aux données en cache, à l'index et aux vues des séances"""
+        ancien = self.index.appliquer(self._donnees, operation)
+        if operation["collection"] == "seances":
+            nouveau = None
+            if operation["op"] != SUPPRESSION:
+                nouveau = self.index.element("seances", operation["element"]["id"])
+            for vue in self._vues_seances:
+                vue.mettre_a_jour(ancien, nouveau)
+
+    def signature_donnees(self):
+        """Retourne une valeur JSON qui change à chaque écriture des données, par tout processus"""
+        raise NotImplementedError
+
+    def _actualiser_colonnes(self):
+        """Réécrit les mois modifiés de l'instantané en colonnes (sous le verrou d'écriture)
+
+        La signature des fichiers de données est ensuite enregistrée avec
+        l'instantané (voir `colonnes_a_jour`).
+        """
+        if self.colonnes is None:
+            return []
+        mois = [] if self.colonnes.a_jour() else self.colonnes.actualiser(self.index)
+        self.colonnes.enregistrer_etat(self.signature_donnees())
+        return mois
+
+    def colonnes_a_jour(self):
+        """Indique, sans lire les données, si l'instantané en colonnes reflète les fichiers de données
+
+        Faux si un processus qui ne tient pas l'instantané a écrit depuis, si
+        le journal a été compacté depuis, ou si l'instantané n'existe pas.
+        """
+        return lire_etat(dossier_colonnes(self.chemin)) == self.signature_donnees()
+
+    def charger(self):
+        """Retourne les données, en ne relisant le disque que s'il a changé"""
+        with self._verrou:
+            premier_chargement = self._donnees is None
+            if self._rafraichir():
+                self.hits += 1
+            elif premier_chargement:
+                self.misses += 1
+            else:
+                self.rechargements += 1
+            return self._donnees
+
+    @chronometre("stockage.ajouter")
+    def ajouter(self, collection, element, refuser_chevauchements=False):
+        """Ajoute un élément à une collection et retourne son id
+
+        Un id est attribué sous verrou si l'élément n'en a pas. Avec
+        `refuser_chevauchements`, une séance qui en chevauche d'autres est
+        refusée par ChevauchementRefuse (vérification sous verrou, après
+        relecture).
+        """
+        with self._verrou, self._verrou_ecriture:
+            self._rafraichir()
+            if refuser_chevauchements and collection == "seances":
+                verifier_chevauchements(self.conflits, element)
+            if element.get("id") is None:
+                element = dict(element, id=self.index.prochain_id(collection))
+            element = dict(element, version=1)
+            self._ecrire({"op": AJOUT, "collection": collection, "element": element})
+            self._actualiser_colonnes()
+            return element["id"]
+
+    @chronometre("stockage.ajouter_lot")
+    def ajouter_lot(self, collection, elements, version_attendue=None):
+        """Ajoute plusieurs éléments en une seule écriture et retourne leurs ids
+
+        Avec `version_attendue` (la `version` du stockage lue avec les données
+        ayant servi à préparer le lot), l'ajout est refusé par ConflitVersion
+        si les données ont changé depuis : la comparaison se fait sous le
+        verrou d'écriture, après relecture.
+        """
+        with self._verrou, self._verrou_ecriture:
+            self._rafraichir()
+            if version_attendue is not None and self.version != version_attendue:
+                raise ConflitVersion(collection, None, version_attendue, self.version)
+            prochain_id = self.index.prochain_id(collection)
+            operations = []
+            for element in elements:
+                element = dict(element, version=1)
+                if element.get("id") is None:
+                    element["id"] = prochain_id
+                prochain_id = max(prochain_id, element["id"] + 1)
+                operations.append({"op": AJOUT, "collection": collection, "element": element})
+            self._ecrire_lot(operations)
+            self._actualiser_colonnes()
+            return [operation["element"]["id"] for operation in operations]
+
+    def _verifier_version(self, collection, element_id, version_attendue):
+        """Lève ConflitVersion si l'élément a disparu ou changé de version, retourne l'actuel"""
+        actuel = self.index.element(collection, element_id)
+        if actuel is None:
+            raise ConflitVersion(collection, element_id, version_attendue, None)
+        if version_attendue is not None and version_element(actuel) != version_attendue:
+            raise ConflitVersion(collection, element_id, version_attendue, version_element(actuel))
+        return actuel
+
+    @chronometre("stockage.modifier")
+    def modifier(self, collection, element, version_attendue=None, refuser_chevauchements=False):
+        """Remplace l'élément de même id dans une collection et retourne sa nouvelle version
+
+        Avec `version_attendue` (la version lue avant l'édition), la
+        modification est refusée par ConflitVersion si quelqu'un d'autre a
+        enregistré l'élément entre-temps. Avec `refuser_chevauchements`, elle
+        est refusée par ChevauchementRefuse comme pour `ajouter`.
+        """
+        with self._verrou, self._verrou_ecriture:
+            self._rafraichir()
+            actuel = self._verifier_version(collection, element["id"], version_attendue)
+            if refuser_chevauchements and collection == "seances":
+                verifier_chevauchements(self.conflits, element)
+            element = dict(element, version=version_element(actuel) + 1)
+            self._ecrire({"op": MODIFICATION, "collection": collection, "element": element})
+            self._actualiser_colonnes()
+            return element["version"]
+
+    @chronometre("stockage.supprimer")
+    def supprimer(self, collection, element_id, version_attendue=None):
+        """Supprime l'élément d'id donné d'une collection
+
+        Avec `version_attendue`, la suppression est refusée par ConflitVersion
+        si l'élément a été modifié depuis sa lecture. Elle est refusée par
+        SuppressionRefusee si d'autres éléments le référencent encore.
+        """
+        with self._verrou, self._verrou_ecriture:
+            self._rafraichir()
+            verifier_suppression(self.index, collection, element_id)
+            if version_attendue is not None:
+                self._verifier_version(collection, element_id, version_attendue)
+            self._ecrire({"op": SUPPRESSION, "collection": collection, "id": element_id})
+            self._actualiser_colonnes()
+
+    def sauvegarder(self, data, compteurs=None):
+        """Remplace entièrement les données (restauration d'une sauvegarde)
+
+        Les compteurs d'id ne reculent pas : les ids déjà attribués, présents
+        dans `data`, dans `compteurs` ou dans le cache, ne le seront plus.
+        """
+        raise NotImplementedError
+
+    def _compteurs(self, data, compteurs=None):
+        """Compteurs d'id à enregistrer avec `data` (voir `sauvegarder`)"""
+        return compteurs_ids({c: data.get(c, []) for c in COLLECTIONS}, self.index.prochains_ids, compteurs)
+
+    def _archiver(self, chemin):
+        """Copie l'état courant complet dans le fichier donné"""
+        raise NotImplementedError
+
+    def iterer_elements(self):
+        """Parcourt les (collection, élément) de toutes les collections
+
+        Les moteurs capables de lire leurs éléments au fil de l'eau évitent
+        ainsi de tenir le document complet en mémoire (traitements par lots).
+        """
+        data = self.charger()
+        for collection in COLLECTIONS:
+            for element in data.get(collection, []):
+                yield collection, element
+
+    def compacter(self):
+        """Réorganise le fichier de données (sans effet par défaut)"""
+
+    def fermer(self):
+        """Libère les ressources du moteur"""
+
+    def chemin_archive(self, numero):
+        """Chemin de l'archive `numero` (1 = la plus récente), même extension que les données"""
+        racine, extension = os.path.splitext(self.chemin)
+        return f"{racine}.{numero}{extension}"
+
+    def archives(self):
+        """Retourne les (numéro, chemin) des archives existantes, de la plus récente à la plus ancienne"""
+        return [
+            (numero, self.chemin_archive(numero)) for numero in range(1, NB_ARCHIVES + 1)
+            if os.path.exists(self.chemin_archive(numero))
+        ]
+
+    @chronometre("stockage.restaurer")
+    def restaurer(self, data, conserver=NB_ARCHIVES):
+        """Archive l'état courant puis remplace les données
+
+        Les archives sont décalées (la plus ancienne au-delà de `conserver`
+        est écrasée) avant que l'état courant devienne l'archive n°1.
+        """
+        with self._verrou, self._verrou_ecriture:
+            if conserver:
+                for numero in range(conserver - 1, 0, -1):
+                    if os.path.exists(self.chemin_archive(numero)):
+                        os.replace(self.chemin_archive(numero), self.chemin_archive(numero + 1))
+                self._archiver(self.chemin_archive(1))
+            self.sauvegarder(data)
+            self._actualiser_colonnes()
+
+    def seances_entre(self, debut, fin, session_id=None, groupe_id=None):
+        """Retourne les séances dont la date est comprise entre debut et fin inclus
+
+        Les séances sont triées par date ; seules celles de la période sont
+        parcourues grâce à l'index des dates.
+        """
+        with self._verrou:
+            self.charger()
+            seances = self.index.seances_entre(debut.isoformat(), fin.isoformat())
+        promos = None
+        if session_id:
+            promos = {p["id"] for p in self.index.references("promotions", "session_id", session_id)}
+        return [
+            s for s in seances
+            if (promos is None or s["promo_id"] in promos)
+            and (not groupe_id or s["groupe_id"] == groupe_id)
+        ]
+
+    def consulter(self, lecture):
+        """Appelle `lecture(index)` sous verrou, après rechargement, et retourne son résultat
+
+        Les écritures de ce processus attendent la fin de la lecture : le
+        résultat ne mélange pas deux versions des données.
+        """
+        with self._verrou:
+            self.charger()
+            return lecture(self.index)
+
+    def actualiser_colonnes(self):
+        """Met l'instantané en colonnes à jour du disque, retourne les mois réécrits"""
+        with self._verrou, self._verrou_ecriture:
+            self._rafraichir()
+            return self._actualiser_colonnes()
+
+    def colonnes_entre(self, debut, fin, session_id=None, groupe_id=None):
+        """Retourne la table Arrow des séances entre debut et fin inclus, triée par date
+
+        Même filtre que `seances_entre`, lu dans l'instantané en colonnes
+        (stockage ouvert avec `colonnes=True`). Les mois modifiés par un
+        processus qui ne tient pas l'instantané sont d'abord réécrites.
+        """
+        if self.colonnes is None:
+            raise ValueError("Instantané en colonnes non activé (colonnes=True)")
+        with self._verrou:
+            self.charger()
+            if not self.colonnes.a_jour():
+                self.actualiser_colonnes()
+            promos = None
+            if session_id:
+                promos = {p["id"] for p in self.index.references("promotions", "session_id", session_id)}
+        return lire_colonnes(self.colonnes.dossier, debut, fin, promos, groupe_id)
+
+    def budget_par(self, axe):
+        """Retourne la liste triée des (clé, coût total) selon l'axe demandé
+
+        Les totaux sont tenus à jour à chaque écriture : le coût ne dépend pas
+        du nombre de séances. Les entités sont désignées par leur nom actuel.
+        """
+        if axe not in AXES_BUDGET:
+            raise ValueError(f"Axe de budget inconnu : {axe}")
+        with self._verrou:
+            self.charger()
+            totaux = self.agregats.budget_par(axe)
+            if axe not in ENTITES_BUDGET:
+                return sorted(totaux.items())
+            collection, libelle = ENTITES_BUDGET[axe]
+            lignes = []
+            for cle, total in totaux.items():
+                entite = self.index.element(collection, cle)
+                lignes.append((libelle(entite) if entite else f"#{cle}", total))
+        return sorted(lignes)
+
+    def cout_total(self):
+        """Retourne le coût total des séances"""
+        with self._verrou:
+            self.charger()
+            return self.agregats.total
+
+    def verifier_budget(self):
+        """Compare les agrégats tenus à jour à un recalcul complet, retourne les écarts"""
+        with self._verrou:
+            return self.agregats.ecarts(self.charger()["seances"])
+
+    def statistiques(self):
+        """Retourne les compteurs du cache"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rechargements": self.rechargements,
+            "version": self.version
+        }
+
+
+class StockageJSON(Stockage):
+    """Cache de processus du fichier de sauvegarde et de son journal
+
+    Les données sont un instantané JSON complété par un journal des mutations.
+    Le cache n'est relu que si la date de modification ou la taille de l'un des
+    deux fichiers change ; si seul le journal a grandi, seule sa fin est rejouée.
+    Chaque mutation ajoute une ligne au journal, qui est compacté dans
+    l'instantané tous les `seuil_compaction` enregistrements.
+    """
+
+    def __init__(self, chemin=FICHIER_DONNEES, fsync=FSYNC_COMPACTION, seuil_compaction=1000, colonnes=False):
+        super().__init__(chemin, colonnes)
+        self.journal = Journal(os.path.splitext(chemin)[0] + '.journal', fsync)
+        self.seuil_compaction = seuil_compaction
+        self._signature = None
+        self._position_journal = 0
+        self._operations_journal = 0
+
+    def _lire(self):
+        """Décode l'instantané"""
+        if not os.path.exists(self.chemin):
+            return donnees_vides()
+        with open(self.chemin, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _rafraichir(self):
+        signature = (_signature_fichier(self.chemin), _signature_fichier(self.journal.chemin))
+        if self._donnees is not None and signature == self._signature:
+            return True
+
+        if self._donnees is not None and signature[0] == self._signature[0]:
+            # Seul le journal a changé : on rejoue les nouvelles opérations
+            operations, self._position_journal = self.journal.relire(self._position_journal)
+        else:
+            self._donnees = self._lire()
+            self._reconstruire(self._donnees, self._donnees.pop(CLE_COMPTEURS, None))
+            self._operations_journal = 0
+            operations, self._position_journal = self.journal.relire(0)
+
+        for operation in operations:
+            self._appliquer(operation)
+        self._operations_journal += len(operations)
+        self._signature = signature
+        self.version += 1
+        return False
+
+    def signature_donnees(self):
+        """(date de modification, taille) de l'instantané et du journal"""
+        return [
+            list(signature) if signature else None
+            for signature in (_signature_fichier(self.chemin), _signature_fichier(self.journal.chemin))
+        ]
+
+    def _ecrire(self, operation):
+        """Ajoute une mutation au journal et l'applique au cache"""
+        self._ecrire_lot([operation])
+
+    def _ecrire_lot(self, operations):
+        """Ajoute des mutations au journal en une écriture, puis les applique au cache
+
+        Le cache n'est modifié qu'une fois l'écriture réussie : une erreur
+        disque ne laisse pas en mémoire des mutations absentes du fichier.
+        """
+        with self._verrou:
+            position_avant = self._position_journal
+            longueur = self.journal.ajouter_lot(operations)
+            for operation in operations:
+                self._appliquer(operation)
+            self._operations_journal += len(operations)
+            self.version += 1
+
+            signature_journal = _signature_fichier(self.journal.chemin)
+            if signature_journal and signature_journal[1] == position_avant + longueur:
+                # Personne d'autre n'a écrit entre-temps : inutile de relire notre ligne
+                self._position_journal = signature_journal[1]
+                self._signature = (self._signature[0], signature_journal)
+
+            if self._operations_journal >= self.seuil_compaction:
+                self.compacter()
+
+    @chronometre("stockage.compacter")
+    def compacter(self):
+        """Intègre le journal dans un nouvel instantané puis le vide"""
+        with self._verrou, self._verrou_ecriture:
+            self._rafraichir()
+            self._ecrire_instantane(self._donnees)
+
+    def iterer_elements(self):
+        """Lit l'instantané élément par élément et y applique le journal au passage
+
+        Le journal, borné par la compaction, est relu en premier : un élément
+        modifié est remplacé par sa dernière version, un élément supprimé est
+        omis, et les éléments ajoutés depuis l'instantané sont produits à la
+        fin de leur collection ; ceux des entités toujours avant les séances.
+        """
+        operations, _ = self.journal.relire(0)
+        derniers = {}
+        for operation in operations:
+            if operation["op"] == SUPPRESSION:
+                derniers[(operation["collection"], operation["id"])] = None
+            else:
+                derniers[(operation["collection"], operation["element"]["id"])] = operation["element"]
+        precedente = None
+        for collection, element in self._iterer_instantane():
+            if collection != precedente:
+                yield from _extraire_ajouts(derniers, precedente)
+                if collection == "seances":
+                    # Entités ajoutées à une collection vide de l'instantané
+                    for entites in COLLECTIONS[:-1]:
+                        yield from _extraire_ajouts(derniers, entites)
+                precedente = collection
+            cle = (collection, element.get("id"))
+            if cle in derniers:
+                element = derniers.pop(cle)
+                if element is None:
+                    continue
+            yield collection, element
+        yield from _extraire_ajouts(derniers, precedente)
+        for collection in COLLECTIONS:
+            yield from _extraire_ajouts(derniers, collection)
+
+    def _iterer_instantane(self):
+        """Parcourt les (collection, élément) de l'instantané, séances après les entités
+
+        Les fichiers écrits avant l'ordre de COLLECTIONS placent les séances
+        avant les promotions et les groupes jusqu'à leur première compaction :
+        leurs séances sont alors mises de côté et produites à la fin.
+        """
+        from planning.restauration import iterer_sauvegarde
+
+        if not os.path.exists(self.chemin):
+            return
+        entites = set(COLLECTIONS) - {"seances"}
+        presentes = set()
+        en_attente = []
+        with open(self.chemin, 'rb') as f:
+            for collection, element in iterer_sauvegarde(f, presentes):
+                if collection == "seances" and not entites <= presentes:
+                    en_attente.append(element)
+                    continue
+                yield collection, element
+        for element in en_attente:
+            yield "seances", element
+
+    @chronometre("stockage.sauvegarder")
+    def sauvegarder(self, data, compteurs=None):
+        with self._verrou, self._verrou_ecriture:
+            self._ecrire_instantane(data, compteurs)
+            self.version += 1
+
+    def _archiver(self, chemin):
+        # Le journal est d'abord intégré pour que la copie soit complète
+        self.compacter()
+        shutil.copyfile(self.chemin, chemin)
+
+    def _ecrire_instantane(self, data, compteurs=None):
+        """Écrit un instantané atomique (compteurs d'id compris) et repart d'un journal vide"""
+        compteurs = self._compteurs(data, compteurs)
+        instantane = {c: data.get(c, []) for c in COLLECTIONS}
+        instantane[CLE_COMPTEURS] = compteurs
+        ecrire_instantane(self.chemin, instantane, self.journal.fsync)
+        self.journal.vider()
+        if data is not self._donnees:
+            self._reconstruire(data, compteurs)
+        self._donnees = data
+        self._position_journal = 0
+        self._operations_journal = 0
+        self._signature = (_signature_fichier(self.chemin), None)
+
+    def statistiques(self):
+        statistiques = super().statistiques()
+        statistiques["operations_journal"] = self._operations_journal
+        return statistiques
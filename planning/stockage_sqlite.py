@@ -0,0 +1,319 @@
+"""Moteur de stockage SQLite indexé
+
+Migration ponctuelle depuis la sauvegarde JSON :
+    python -m planning.stockage_sqlite data/sauvegardes.json data/planning.db
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+from planning.journal import AJOUT, SUPPRESSION
+from planning.mesures import chronometre
+from planning.seances import CHAMPS_DENORMALISES, COLONNES
+from planning.stockage import COLLECTIONS, Stockage, StockageJSON, version_element
+
+# Les clés étrangères sont déclarées et indexées mais pas imposées
+# (PRAGMA foreign_keys reste désactivé) pour accepter les anciennes sauvegardes ;
+# l'intégrité est vérifiée par l'application avant chaque suppression.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS enseignants (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL,
+    prenom TEXT NOT NULL,
+    tarif REAL NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL,
+    annee INTEGER,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS promotions (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL,
+    session_id INTEGER REFERENCES sessions(id),
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS groupes (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL,
+    promo_id INTEGER REFERENCES promotions(id),
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS seances (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    creneau TEXT NOT NULL,
+    groupe_id INTEGER REFERENCES groupes(id),
+    promo_id INTEGER REFERENCES promotions(id),
+    enseignant_id INTEGER REFERENCES enseignants(id),
+    matiere TEXT,
+    cout REAL NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 1
+);
+-- Prochain id de chaque collection : l'id d'une ligne supprimée n'est pas réattribué
+CREATE TABLE IF NOT EXISTS compteurs (
+    collection TEXT PRIMARY KEY,
+    prochain_id INTEGER NOT NULL
+);
+-- Numéro de la dernière transaction d'écriture, lu par la CLI (instantané en colonnes à jour ?)
+CREATE TABLE IF NOT EXISTS ecritures (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    numero INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_seances_date ON seances(date);
+CREATE INDEX IF NOT EXISTS idx_seances_groupe ON seances(groupe_id);
+CREATE INDEX IF NOT EXISTS idx_seances_enseignant ON seances(enseignant_id);
+CREATE INDEX IF NOT EXISTS idx_seances_promo ON seances(promo_id);
+CREATE INDEX IF NOT EXISTS idx_promotions_session ON promotions(session_id);
+CREATE INDEX IF NOT EXISTS idx_groupes_promo ON groupes(promo_id);
+"""
+
+def _requete_insertion(collection, remplacer=False):
+    """Construit la requête INSERT d'une collection"""
+    colonnes = COLONNES[collection]
+    verbe = "INSERT OR REPLACE" if remplacer else "INSERT"
+    return f"{verbe} INTO {collection} ({', '.join(colonnes)}) VALUES ({', '.join('?' * len(colonnes))})"
+
+
+def _requete_lecture(collection, presentes=None):
+    """Construit la requête SELECT des colonnes connues d'une collection
+
+    Avec `presentes` (colonnes de la table), celles qui manquent à une
+    ancienne base ouverte en lecture seule sont lues comme NULL.
+    """
+    colonnes = [
+        colonne if presentes is None or colonne in presentes else f"NULL AS {colonne}"
+        for colonne in COLONNES[collection]
+    ]
+    return f"SELECT {', '.join(colonnes)} FROM {collection}"
+
+
+REQUETE_ECRITURE = "INSERT INTO ecritures (id, numero) VALUES (1, 1) ON CONFLICT(id) DO UPDATE SET numero = numero + 1"
+# Les compteurs ne font qu'avancer
+REQUETE_COMPTEUR = """
+INSERT INTO compteurs (collection, prochain_id) VALUES (?, ?)
+ON CONFLICT(collection) DO UPDATE SET prochain_id = max(prochain_id, excluded.prochain_id)
+"""
+
+
+def _ligne(collection, element):
+    """Convertit un élément en tuple de valeurs dans l'ordre des colonnes"""
+    return tuple(
+        version_element(element) if colonne == "version" else element.get(colonne)
+        for colonne in COLONNES[collection]
+    )
+
+
+class StockageSQLite(Stockage):
+    """Stockage dans une base SQLite avec index sur les séances
+
+    Le document complet reste en cache pour les onglets de gestion ; il n'est
+    relu que si une autre connexion a modifié la base (PRAGMA data_version).
+    Le calendrier interroge directement la base via l'index des dates.
+
+    Avec `lecture_seule` (archive à restaurer), la base est ouverte en
+    mode=ro, sans création du schéma, passage en WAL ni migration.
+    """
+
+    def __init__(self, chemin, colonnes=False, lecture_seule=False):
+        super().__init__(chemin, colonnes)
+        self.lecture_seule = lecture_seule
+        if lecture_seule:
+            self._connexion = sqlite3.connect(
+                Path(chemin).absolute().as_uri() + "?mode=ro", uri=True,
+                check_same_thread=False, isolation_level=None
+            )
+        else:
+            self._connexion = sqlite3.connect(chemin, check_same_thread=False, isolation_level=None)
+        self._connexion.row_factory = sqlite3.Row
+        self._colonnes_presentes = {}
+        if lecture_seule:
+            for collection in COLLECTIONS:
+                self._colonnes_presentes[collection] = self._colonnes(collection)
+        else:
+            self._connexion.execute("PRAGMA journal_mode=WAL")
+            self._connexion.executescript(SCHEMA)
+            self._migrer_versions()
+        self._data_version = None
+
+    def _colonnes(self, table):
+        """Retourne les noms des colonnes d'une table"""
+        return {ligne["name"] for ligne in self._connexion.execute(f"PRAGMA table_info({table})")}
+
+    def _lecture(self, collection):
+        """Requête SELECT d'une collection, adaptée aux colonnes d'une base en lecture seule"""
+        return _requete_lecture(collection, self._colonnes_presentes.get(collection))
+
+    def _migrer_versions(self):
+        """Ajoute la colonne version aux bases créées avant les versions d'éléments"""
+        for collection in COLLECTIONS:
+            if "version" not in self._colonnes(collection):
+                self._connexion.execute(f"ALTER TABLE {collection} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    def _executer(self, requete, parametres=()):
+        with self._verrou:
+            return self._connexion.execute(requete, parametres).fetchall()
+
+    def _data_version_courante(self):
+        return self._connexion.execute("PRAGMA data_version").fetchone()[0]
+
+    def _rafraichir(self):
+        data_version = self._data_version_courante()
+        if self._donnees is not None and data_version == self._data_version:
+            return True
+
+        self._donnees = {
+            collection: [
+                dict(ligne) for ligne in
+                self._connexion.execute(self._lecture(collection) + " ORDER BY id")
+            ]
+            for collection in COLLECTIONS
+        }
+        self._reconstruire(self._donnees, self._lire_compteurs())
+        self._data_version = data_version
+        self.version += 1
+        return False
+
+    def _lire_compteurs(self):
+        """Retourne les compteurs d'id enregistrés, par collection"""
+        if self.lecture_seule and not self._colonnes("compteurs"):
+            # Archive antérieure aux compteurs : ils sont déduits des ids
+            return {}
+        return dict(self._connexion.execute("SELECT collection, prochain_id FROM compteurs").fetchall())
+
+    def signature_donnees(self):
+        """Numéro de la dernière transaction d'écriture (les fichiers changent aussi à la fermeture)"""
+        ligne = self._connexion.execute("SELECT numero FROM ecritures").fetchone()
+        return ligne[0] if ligne else 0
+
+    def _ecrire(self, operation):
+        """Exécute l'écriture SQL puis la répercute sur le cache"""
+        self._ecrire_lot([operation])
+
+    def _ecrire_lot(self, operations):
+        """Exécute les écritures SQL dans une transaction puis les répercute sur le cache"""
+        with self._verrou:
+            self._connexion.execute("BEGIN")
+            try:
+                compteurs = {}
+                for operation in operations:
+                    collection = operation["collection"]
+                    if operation["op"] == AJOUT:
+                        compteurs[collection] = max(compteurs.get(collection, 1), operation["element"]["id"] + 1)
+                    if operation["op"] == SUPPRESSION:
+                        self._connexion.execute(f"DELETE FROM {collection} WHERE id = ?", (operation["id"],))
+                    else:
+                        # INSERT OR REPLACE : même sémantique que le rejeu du journal JSON
+                        self._connexion.execute(
+                            _requete_insertion(collection, remplacer=True),
+                            _ligne(collection, operation["element"])
+                        )
+                self._connexion.executemany(REQUETE_COMPTEUR, compteurs.items())
+                self._connexion.execute(REQUETE_ECRITURE)
+                self._connexion.execute("COMMIT")
+            except BaseException:
+                self._connexion.execute("ROLLBACK")
+                raise
+            if self._data_version_courante() == self._data_version:
+                for operation in operations:
+                    self._appliquer(operation)
+            else:
+                # Une autre connexion a écrit entre-temps : relecture complète
+                self._rafraichir()
+            self.version += 1
+
+    @chronometre("stockage.sauvegarder")
+    def sauvegarder(self, data, compteurs=None):
+        with self._verrou, self._verrou_ecriture:
+            compteurs = self._compteurs(data, compteurs)
+            self._connexion.execute("BEGIN")
+            try:
+                for collection in COLLECTIONS:
+                    self._connexion.execute(f"DELETE FROM {collection}")
+                    self._connexion.executemany(
+                        _requete_insertion(collection),
+                        (_ligne(collection, element) for element in data.get(collection, []))
+                    )
+                self._connexion.executemany(REQUETE_COMPTEUR, compteurs.items())
+                self._connexion.execute(REQUETE_ECRITURE)
+                self._connexion.execute("COMMIT")
+            except BaseException:
+                self._connexion.execute("ROLLBACK")
+                raise
+            self._supprimer_colonnes_denormalisees()
+            self._donnees = None
+            self._rafraichir()
+
+    def _supprimer_colonnes_denormalisees(self):
+        """Supprime les colonnes de noms recopiés des anciennes bases
+
+        Appelé après une réécriture complète : ces colonnes, que l'application
+        ne lit plus, sont alors vides.
+        """
+        colonnes = self._colonnes("seances")
+        for colonne in CHAMPS_DENORMALISES:
+            if colonne in colonnes:
+                self._connexion.execute(f"ALTER TABLE seances DROP COLUMN {colonne}")
+
+    def _archiver(self, chemin):
+        # Copie cohérente de la base, journal WAL compris ; l'archive repasse
+        # en journal classique pour être relue en lecture seule sans fichiers -wal/-shm
+        cible = sqlite3.connect(chemin)
+        try:
+            self._connexion.backup(cible)
+            cible.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            cible.close()
+
+    def seances_entre(self, debut, fin, session_id=None, groupe_id=None):
+        requete = self._lecture("seances") + " WHERE date BETWEEN ? AND ?"
+        parametres = [debut.isoformat(), fin.isoformat()]
+        if session_id:
+            requete += " AND promo_id IN (SELECT id FROM promotions WHERE session_id = ?)"
+            parametres.append(session_id)
+        if groupe_id:
+            requete += " AND groupe_id = ?"
+            parametres.append(groupe_id)
+        return [dict(ligne) for ligne in self._executer(requete + " ORDER BY date", parametres)]
+
+    def iterer_elements(self):
+        """Parcourt les tables par curseur, sans charger le document en cache"""
+        for collection in COLLECTIONS:
+            for ligne in self._connexion.execute(self._lecture(collection) + " ORDER BY id"):
+                yield collection, dict(ligne)
+
+    @chronometre("stockage.compacter")
+    def compacter(self):
+        """Intègre le journal WAL à la base puis récupère l'espace libéré"""
+        with self._verrou, self._verrou_ecriture:
+            self._connexion.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._connexion.execute("VACUUM")
+
+    def fermer(self):
+        """Ferme la connexion à la base"""
+        with self._verrou:
+            self._connexion.close()
+
+
+def migrer_json_vers_sqlite(chemin_json, chemin_sqlite):
+    """Copie une sauvegarde JSON (instantané et journal) dans une base SQLite
+
+    Retourne le nombre d'éléments copiés par collection.
+    """
+    source = StockageJSON(chemin_json)
+    data = source.charger()
+    stockage = StockageSQLite(chemin_sqlite)
+    try:
+        stockage.sauvegarder(data, source.index.prochains_ids)
+    finally:
+        stockage.fermer()
+    return {collection: len(data.get(collection, [])) for collection in COLLECTIONS}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage : python -m planning.stockage_sqlite <sauvegarde.json> <base.db>")
+    for collection, nombre in migrer_json_vers_sqlite(sys.argv[1], sys.argv[2]).items():
+        print(f"{collection}: {nombre}")
@@ -0,0 +1,39 @@
+"""Verrou d'écriture partagé entre processus (fichier verrouillé par flock)"""
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows : seul le verrou interne au processus s'applique
+    fcntl = None
+
+
+class VerrouFichier:
+    """Verrou exclusif sur un fichier `.lock`, réentrant dans un même thread
+
+    Les écritures de tous les processus (sessions Streamlit, CLI, serveur ICS)
+    passent par ce verrou : relire l'état, vérifier les versions et écrire
+    forment une seule section critique. Il doit être pris sous le verrou
+    interne du stockage, qui protège le compteur de réentrance.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._fd = None
+        self._profondeur = 0
+
+    def __enter__(self):
+        if self._profondeur == 0 and fcntl is not None:
+            dossier = os.path.dirname(self.chemin)
+            if dossier and not os.path.exists(dossier):
+                os.makedirs(dossier, exist_ok=True)
+            self._fd = os.open(self.chemin, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._profondeur += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._profondeur -= 1
+        if self._profondeur == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -1,128 +1,141 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 from datetime import datetime, date, timedelta, time
-import pandas as pd
 import json
 import os
-import plotly.express as px
-from urllib.request import urlopen
-
-# Configuration de la page
-st.set_page_config(
-    page_title="Planification École d'Ingénieurs",
-    page_icon="📚",
-    layout="wide"
-)
+from planning.cache import CacheLRU
+from planning.conflits import ChevauchementRefuse, scanner_conflits
+from planning.creneaux import CRENEAUX, JOUR_REFERENCE, JOURS, ajouter_colonnes_horaires
+from planning.entites import COLLECTIONS_PAR_TYPE, SuppressionRefusee, libelle
+from planning.export import TYPE_MIME, exporter_excel
+from planning.ics import TYPE_MIME as TYPE_MIME_ICS, FluxICS
+from planning.importation import ErreurImport, analyser, importer, lire_lignes
+from planning.mesures import actives as mesures_actives, chronometre, mesurer, statistiques as statistiques_mesures
+from planning.recherche import filtrer_seances, nombre_pages, paginer
+from planning.ressources import RessourceStatique
+from planning.restauration import ErreurRestauration, restaurer_archive, restaurer_fichier
+from planning.seances import construire_seance, noms
+from planning.solveur import resoudre
+from planning.stockage import FICHIER_DONNEES, ConflitVersion, ouvrir_stockage, version_element
+
+TAILLES_PAGE = [25, 50, 100]
+CHEMIN_LOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logo.png')
 
 # Fonction pour charger le logo
-def load_logo(url):
-    return urlopen(url).read()
+@st.cache_resource
+def get_logo():
+    """Retourne le logo livré avec l'application, remplaçable par PLANNING_LOGO_URL"""
+    return RessourceStatique(CHEMIN_LOGO, url=os.environ.get("PLANNING_LOGO_URL"))
 
-# Fonctions utilitaires
-def charger_donnees():
-    """Charge les données depuis le fichier de sauvegarde"""
-    if os.path.exists('data/sauvegardes.json'):
-        with open('data/sauvegardes.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {
-        "enseignants": [],
-        "sessions": [],
-        "seances": [],
-        "promotions": [],
-        "groupes": []
-    }
+@chronometre("logo")
+def load_logo():
+    """Retourne les octets du logo sans accès réseau bloquant"""
+    return get_logo().contenu()
 
-def sauvegarder_donnees(data):
-    """Sauvegarde les données dans un fichier JSON"""
-    if not os.path.exists('data'):
-        os.makedirs('data')
-    with open('data/sauvegardes.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-
-def get_jour_semaine(date_obj):
-    """Retourne le jour de la semaine en français"""
-    jours = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
-    return jours[date_obj.weekday()]
-
-def get_heure_debut(creneau):
-    """Retourne l'heure de début en fonction du créneau"""
-    if "matin" in creneau.lower():
-        return datetime.strptime("08:30", "%H:%M") if "1" in creneau or "4h" in creneau else datetime.strptime("10:30", "%H:%M")
-    else:
-        return datetime.strptime("14:30", "%H:%M") if "1" in creneau or "4h" in creneau else datetime.strptime("16:30", "%H:%M")
+# Fonctions utilitaires
+@st.cache_resource
+def get_stockage():
+    """Retourne le stockage partagé par tous les reruns et toutes les sessions
 
-def get_heure_fin(creneau):
-    """Retourne l'heure de fin en fonction du créneau"""
-    if "matin" in creneau.lower():
-        return datetime.strptime("10:30", "%H:%M") if "1" in creneau else datetime.strptime("12:30", "%H:%M")
-    else:
-        return datetime.strptime("16:30", "%H:%M") if "1" in creneau else datetime.strptime("18:30", "%H:%M")
+    PLANNING_STOCKAGE permet de choisir le fichier : un chemin en .db/.sqlite
+    sélectionne le moteur SQLite, sinon la sauvegarde JSON est utilisée.
+    L'instantané en colonnes des séances, lu par le calendrier, est tenu à jour.
+    """
+    return ouvrir_stockage(os.environ.get("PLANNING_STOCKAGE", FICHIER_DONNEES), colonnes=True)
 
-def afficher_calendrier_semaine(seances, date_debut, session_id=None, groupe_id=None):
-    """Affiche un calendrier semaine interactif"""
+@chronometre("charger_donnees")
+def charger_donnees():
+    """Charge les données depuis le cache, relu seulement si le fichier a changé"""
+    return get_stockage().charger()
+
+@st.cache_resource
+def get_cache_figures():
+    """Retourne le cache LRU des figures Plotly partagé par toutes les sessions"""
+    return CacheLRU(capacite=64)
+
+@st.cache_resource
+def get_cache_exports():
+    """Retourne le cache des exports Excel (peu d'entrées : ce sont des fichiers entiers)"""
+    return CacheLRU(capacite=8)
+
+@st.cache_resource
+def get_flux_ics():
+    """Retourne le générateur de flux ICS partagé (VEVENT et flux en cache)"""
+    return FluxICS(get_stockage())
+
+def figure_en_cache(cle, construire):
+    """Retourne la figure en cache pour la version courante des données, ou la construit"""
+    return get_cache_figures().obtenir(cle, get_stockage().version, construire)
+
+@chronometre("figure.calendrier")
+def construire_calendrier_semaine(stockage, date_debut, session_id=None, groupe_id=None):
+    """Construit la figure du calendrier d'une semaine (None si aucune séance)"""
+    import plotly.express as px
+    from planning.colonnes import vers_dataframe
     date_fin = date_debut + timedelta(days=6)
 
-    # Filtrer les séances par session et groupe si spécifiés
-    if session_id:
-        seances = [s for s in seances if s["promo_id"] in [p["id"] for p in data["promotions"] if p["session_id"] == session_id]]
-    if groupe_id:
-        seances = [s for s in seances if s["groupe_id"] == groupe_id]
-
-    # Création du DataFrame
-    df = pd.DataFrame(seances)
-    if df.empty:
-        st.warning("Aucune séance planifiée pour cette semaine")
-        return
-
-    # Conversion des dates
-    df['Date'] = pd.to_datetime(df['date'])
-    df = df[(df['Date'] >= pd.to_datetime(date_debut)) & (df['Date'] <= pd.to_datetime(date_fin))]
-
-    if df.empty:
-        st.warning("Aucune séance planifiée pour cette semaine")
-        return
+    # Seules les séances de la semaine (filtrées par session et groupe) sont lues,
+    # dans l'instantané en colonnes : dates déjà typées, créneaux catégoriels
+    with mesurer("calendrier.lecture"):
+        seances = stockage.colonnes_entre(date_debut, date_fin, session_id, groupe_id)
+    if seances.num_rows == 0:
+        return None
 
-    # Préparation des données pour le calendrier
-    df['Jour'] = df['Date'].apply(lambda x: get_jour_semaine(x.date()))
-    df['Début'] = df['creneau'].apply(lambda x: get_heure_debut(x))
-    df['Fin'] = df['creneau'].apply(lambda x: get_heure_fin(x))
+    with mesurer("calendrier.dataframe"):
+        # Création du DataFrame (noms des entités résolus par jointure sur les ids)
+        df = vers_dataframe(seances, stockage.index)
+        df['Date'] = df['date']
 
-    # Tri des jours de la semaine
-    jours_ordre = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-    df['Jour'] = pd.Categorical(df['Jour'], categories=jours_ordre, ordered=True)
-    df = df.sort_values(['Jour', 'Début'])
+        # Préparation des données pour le calendrier (jours ordonnés, horaires des créneaux)
+        ajouter_colonnes_horaires(df)
+        df = df.sort_values(['Jour', 'Début'])
 
     # Création du calendrier
-    fig = px.timeline(
-        df,
-        x_start="Début",
-        x_end="Fin",
-        y="Jour",
-        color="enseignant",
-        hover_name="matiere",
-        hover_data=["groupe", "promotion", "cout"],
-        title=f"Emploi du temps - Semaine du {date_debut.strftime('%d/%m/%Y')}",
-        color_discrete_sequence=px.colors.qualitative.Pastel,
-        text="matiere"
-    )
+    with mesurer("calendrier.plotly"):
+        fig = px.timeline(
+            df,
+            x_start="Début",
+            x_end="Fin",
+            y="Jour",
+            color="enseignant",
+            hover_name="matiere",
+            hover_data=["groupe", "promotion", "cout"],
+            title=f"Emploi du temps - Semaine du {date_debut.strftime('%d/%m/%Y')}",
+            color_discrete_sequence=px.colors.qualitative.Pastel,
+            text="matiere"
+        )
 
-    # Personnalisation du calendrier
-    fig.update_yaxes(title='', categoryorder='array', categoryarray=jours_ordre)
-    fig.update_xaxes(
-        title='',
-        tickformat="%H:%M",
-        range=[datetime.combine(date.today(), time(8, 30)), datetime.combine(date.today(), time(17, 30))]
-    )
-    fig.update_layout(
-        height=600,
-        showlegend=True,
-        legend_title_text='Enseignants'
+        # Personnalisation du calendrier
+        fig.update_yaxes(title='', categoryorder='array', categoryarray=JOURS)
+        fig.update_xaxes(
+            title='',
+            tickformat="%H:%M",
+            range=[datetime.combine(JOUR_REFERENCE, time(8, 30)), datetime.combine(JOUR_REFERENCE, time(18, 30))]
+        )
+        fig.update_layout(
+            height=600,
+            showlegend=True,
+            legend_title_text='Enseignants'
+        )
+        fig.update_traces(textposition='inside', textfont_size=10)
+    return fig
+
+def afficher_calendrier_semaine(stockage, date_debut, session_id=None, groupe_id=None):
+    """Affiche un calendrier semaine interactif"""
+    fig = figure_en_cache(
+        ("calendrier", date_debut, session_id, groupe_id),
+        lambda: construire_calendrier_semaine(stockage, date_debut, session_id, groupe_id)
     )
-    fig.update_traces(textposition='inside', textfont_size=10)
+    if fig is None:
+        st.warning("Aucune séance planifiée pour cette semaine")
+        return
 
     st.plotly_chart(fig, use_container_width=True)
 
 def afficher_formulaire_seance(data, edit_id=None):
     """Affiche le formulaire d'ajout/modification de séance"""
+    if edit_id:
+        version_en_edition("seances", edit_id)
     with st.form("form_seance", clear_on_submit=edit_id is None):
         # Sélection de la date et du créneau
         col1, col2 = st.columns(2)
@@ -131,8 +144,7 @@ def afficher_formulaire_seance(data, edit_id=None):
         with col2:
             creneau = st.selectbox(
                 "Créneau horaire*",
-                options=["Matin (4h)", "Matin 1 (2h)", "Matin 2 (2h)",
-                        "Soir (4h)", "Soir 1 (2h)", "Soir 2 (2h)"]
+                options=list(CRENEAUX)
             )
 
         # Sélection du groupe
@@ -145,7 +157,7 @@ def afficher_formulaire_seance(data, edit_id=None):
         )
 
         # Sélection de l'enseignant
-        enseignant_options = [(e["id"], f"{e['prenom']} {e['nom']}") for e in data["enseignants"]]
+        enseignant_options = [(e["id"], libelle("enseignants", e)) for e in data["enseignants"]]
         enseignant_id = st.selectbox(
             "Enseignant*",
             options=enseignant_options,
@@ -155,6 +167,7 @@ def afficher_formulaire_seance(data, edit_id=None):
 
         # Matière et boutons
         matiere = st.text_input("Matière*", value="")
+        forcer = st.checkbox("Enregistrer même en cas de chevauchement")
 
         col1, col2 = st.columns(2)
         with col1:
@@ -163,107 +176,546 @@ def afficher_formulaire_seance(data, edit_id=None):
                     st.error("La matière est obligatoire")
                     return False
 
-                # Calcul du coût
-                tarif = next((float(e["tarif"]) for e in data["enseignants"] if e["id"] == enseignant_id[0]), 0)
-                cout = (4 if "4h" in creneau else 2) * tarif
-
-                # Création/mise à jour de la séance
-                nouvelle_seance = {
-                    "id": edit_id if edit_id else max([s["id"] for s in data["seances"]], default=0) + 1,
-                    "date": date_seance.isoformat(),
-                    "creneau": creneau,
-                    "duree": 4 if "4h" in creneau else 2,
-                    "groupe": groupe_id[1],
-                    "groupe_id": groupe_id[0],
-                    "promotion": next((p["nom"] for p in data["promotions"] if p["id"] == next((g["promo_id"] for g in data["groupes"] if g["id"] == groupe_id[0]), None)), "N/A"),
-                    "promo_id": next((g["promo_id"] for g in data["groupes"] if g["id"] == groupe_id[0]), None),
-                    "enseignant": enseignant_id[1],
-                    "enseignant_id": enseignant_id[0],
-                    "matiere": matiere,
-                    "tarif": tarif,
-                    "cout": cout
-                }
+                # Création/mise à jour de la séance : durée, coût et promotion
+                # (l'id d'une nouvelle séance est attribué par le stockage)
+                nouvelle_seance = construire_seance(
+                    get_stockage().index, date_seance.isoformat(), creneau,
+                    groupe_id[0], enseignant_id[0], matiere, seance_id=edit_id
+                )
 
-                if edit_id:
-                    # Mise à jour de la séance existante
-                    for i, s in enumerate(data["seances"]):
-                        if s["id"] == edit_id:
-                            data["seances"][i] = nouvelle_seance
-                            break
-                else:
-                    # Ajout d'une nouvelle séance
-                    data["seances"].append(nouvelle_seance)
+                # Les chevauchements (enseignant ou groupe déjà occupé) sont
+                # vérifiés par le stockage sous verrou, puis l'enregistrement
+                # est refait sans vérification si l'utilisateur le force
+                conflits = []
+                for refuser in (True, False):
+                    try:
+                        if edit_id:
+                            # Mise à jour, refusée si un autre utilisateur a enregistré la séance entre-temps
+                            if not enregistrer_modification("seances", nouvelle_seance, refuser_chevauchements=refuser):
+                                return False
+                        else:
+                            # Ajout d'une nouvelle séance
+                            get_stockage().ajouter("seances", nouvelle_seance, refuser_chevauchements=refuser)
+                        break
+                    except ChevauchementRefuse as e:
+                        conflits = e.conflits
+                        message = "\n".join(f"- {decrire_conflit(type_conflit, seance_id)}" for type_conflit, seance_id in conflits)
+                        if not forcer:
+                            st.error(f"Cette séance chevauche des séances existantes :\n{message}")
+                            return False
+                if conflits:
+                    st.warning(f"Séance enregistrée malgré les chevauchements :\n{message}")
 
-                sauvegarder_donnees(data)
                 st.success("Séance enregistrée avec succès!")
                 return True
 
         with col2:
             if edit_id and st.form_submit_button("Annuler"):
+                terminer_edition("seances")
                 return True
 
     return False
 
-def supprimer_element(data, element_type, element_id):
-    """Supprime un élément de la base de données"""
-    if element_type == "seance":
-        data["seances"] = [s for s in data["seances"] if s["id"] != element_id]
-    elif element_type == "enseignant":
-        # Vérifier si l'enseignant a des séances planifiées
-        seances_enseignant = [s for s in data["seances"] if s["enseignant_id"] == element_id]
-        if seances_enseignant:
-            st.error("Cet enseignant a des séances planifiées. Supprimez d'abord ses séances.")
-            return False
-        data["enseignants"] = [e for e in data["enseignants"] if e["id"] != element_id]
-    elif element_type == "groupe":
-        # Vérifier si le groupe a des séances planifiées
-        seances_groupe = [s for s in data["seances"] if s["groupe_id"] == element_id]
-        if seances_groupe:
-            st.error("Ce groupe a des séances planifiées. Supprimez d'abord ses séances.")
-            return False
-        data["groupes"] = [g for g in data["groupes"] if g["id"] != element_id]
-    elif element_type == "promotion":
-        # Vérifier si la promotion a des groupes
-        groupes_promo = [g for g in data["groupes"] if g["promo_id"] == element_id]
-        if groupes_promo:
-            st.error("Cette promotion a des groupes associés. Supprimez d'abord les groupes.")
-            return False
-        data["promotions"] = [p for p in data["promotions"] if p["id"] != element_id]
-    elif element_type == "session":
-        # Vérifier si la session a des promotions
-        promotions_session = [p for p in data["promotions"] if p["session_id"] == element_id]
-        if promotions_session:
-            st.error("Cette session a des promotions associées. Supprimez d'abord les promotions.")
-            return False
-        data["sessions"] = [s for s in data["sessions"] if s["id"] != element_id]
-
-    sauvegarder_donnees(data)
+def version_en_edition(collection, element_id):
+    """Retourne la version de l'élément lue à l'ouverture de son formulaire d'édition
+
+    Elle est gardée d'un rerun à l'autre jusqu'à l'enregistrement ou
+    l'annulation, pour détecter les enregistrements d'autres utilisateurs.
+    """
+    versions = st.session_state.setdefault("versions_edition", {})
+    if versions.get(collection, (None,))[0] != element_id:
+        element = get_stockage().index.element(collection, element_id)
+        versions[collection] = (element_id, version_element(element) if element else None)
+    return versions[collection][1]
+
+def terminer_edition(collection):
+    """Oublie la version lue à l'ouverture du formulaire d'édition"""
+    st.session_state.setdefault("versions_edition", {}).pop(collection, None)
+
+def relancer_fragment():
+    """Relance seulement le fragment en cours, ou toute la page lors d'une exécution complète
+
+    Un clic dans un fragment ne relance que lui ; sa première exécution fait
+    partie d'une exécution complète, où scope="fragment" est refusé.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def enregistrer_modification(collection, element, refuser_chevauchements=False):
+    """Enregistre une modification par compare-and-swap, retourne False en cas de conflit
+
+    ChevauchementRefuse est propagée sans oublier la version en édition, pour
+    pouvoir enregistrer à nouveau avec la même vérification de version.
+    """
+    try:
+        get_stockage().modifier(
+            collection, element, version_attendue=version_en_edition(collection, element["id"]),
+            refuser_chevauchements=refuser_chevauchements
+        )
+    except ConflitVersion:
+        terminer_edition(collection)
+        st.error(
+            "Cet élément a été modifié ou supprimé par un autre utilisateur pendant votre saisie. "
+            "Annulez pour recharger les valeurs actuelles, ou enregistrez à nouveau pour les remplacer."
+        )
+        return False
+    terminer_edition(collection)
     return True
 
-def afficher_budget_annuel(seances):
-    """Affiche le budget par année civile"""
+def decrire_conflit(type_conflit, seance_id):
+    """Retourne une description lisible d'une séance en conflit"""
+    seance = get_stockage().index.element("seances", seance_id)
+    if seance is None:
+        return f"séance {seance_id}"
+    enseignant, groupe, _ = noms(get_stockage().index, seance)
+    ressource = enseignant if type_conflit == "enseignant" else f"le groupe {groupe}"
+    return f"{ressource} a déjà {seance['matiere']} le {date.fromisoformat(seance['date']).strftime('%d/%m/%Y')} ({seance['creneau']})"
+
+def ligne_seance(seance):
+    """Retourne la ligne d'un tableau de séances (noms résolus par jointure)"""
+    enseignant, groupe, _ = noms(get_stockage().index, seance)
+    return {
+        "Date": date.fromisoformat(seance["date"]).strftime('%d/%m/%Y'),
+        "Créneau": seance["creneau"],
+        "Matière": seance["matiere"],
+        "Enseignant": enseignant,
+        "Groupe": groupe,
+        "Coût": seance["cout"]
+    }
+
+def version_affichee(collection, element):
+    """Retourne la version de l'élément à son affichage précédent, et retient l'actuelle
+
+    Un clic n'est traité qu'à l'exécution suivante, après relecture des
+    données : la suppression compare la version que l'utilisateur avait sous
+    les yeux, pas celle relue.
+    """
+    versions = st.session_state.setdefault("versions_affichees", {})
+    cle = (collection, element["id"])
+    precedente = versions.get(cle, version_element(element))
+    versions[cle] = version_element(element)
+    return precedente
+
+def supprimer_element(data, element_type, element_id, version_attendue=None):
+    """Supprime un élément, sauf s'il est encore référencé (règles de planning.entites)
+
+    Avec `version_attendue`, la suppression est refusée si un autre
+    utilisateur a modifié l'élément depuis son affichage.
+    """
+    try:
+        get_stockage().supprimer(COLLECTIONS_PAR_TYPE[element_type], element_id, version_attendue=version_attendue)
+    except SuppressionRefusee as e:
+        st.error(str(e))
+        return False
+    except ConflitVersion:
+        st.error(
+            "Cet élément a été modifié ou supprimé par un autre utilisateur depuis son affichage. "
+            "Vérifiez ses valeurs actuelles, puis supprimez-le à nouveau si besoin."
+        )
+        return False
+    return True
+
+@chronometre("figure.budget_annuel")
+def construire_budget_annuel(stockage):
+    """Construit le tableau et la figure du budget par année civile"""
+    import pandas as pd
+    import plotly.express as px
+    budget_annuel = pd.DataFrame(stockage.budget_par("annee"), columns=['Année', 'cout'])
+    if budget_annuel.empty:
+        return budget_annuel, None
+
+    fig = px.bar(
+        budget_annuel,
+        x='Année',
+        y='cout',
+        title='Budget par année',
+        labels={'Année': 'Année', 'cout': 'Coût (€)'},
+        text_auto='.2s'
+    )
+    fig.update_traces(textfont_size=12, textangle=0, textposition="outside", cliponaxis=False)
+    return budget_annuel, fig
+
+@chronometre("figure.budget_enseignant")
+def construire_budget_enseignant(stockage):
+    """Construit le tableau et la figure du coût par enseignant"""
+    import pandas as pd
+    import plotly.express as px
+    budget_enseignant = pd.DataFrame(stockage.budget_par("enseignant"), columns=["enseignant", "cout"])
+    if budget_enseignant.empty:
+        return budget_enseignant, None
+
+    fig = px.bar(
+        budget_enseignant,
+        x="enseignant",
+        y="cout",
+        title="Coût par enseignant",
+        labels={"enseignant": "Enseignant", "cout": "Coût (€)"}
+    )
+    return budget_enseignant, fig
+
+@chronometre("figure.budget_promotion")
+def construire_budget_promotion(stockage):
+    """Construit le tableau et la figure de la répartition par promotion"""
+    import pandas as pd
+    import plotly.express as px
+    budget_promo = pd.DataFrame(stockage.budget_par("promotion"), columns=["promotion", "cout"])
+    if budget_promo.empty:
+        return budget_promo, None
+
+    fig = px.pie(
+        budget_promo,
+        values="cout",
+        names="promotion",
+        title="Répartition par promotion",
+        labels={"promotion": "Promotion", "cout": "Coût (€)"}
+    )
+    return budget_promo, fig
+
+def afficher_liste_seances(data, stockage):
+    """Affiche la liste filtrable et paginée des séances
+
+    Seule la page courante est convertie en tableau ; la modification et la
+    suppression portent sur la ligne sélectionnée. Appelée dans le fragment
+    afficher_gestion_seances : ses relances ne portent que sur ce fragment.
+    """
+    import pandas as pd
+    index = stockage.index
+    premiere_date = date.fromisoformat(index.dates_seances[0][0])
+    derniere_date = date.fromisoformat(index.dates_seances[-1][0])
+
+    # Filtres
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        # Sans filtre de période, la liste couvre toujours toutes les dates, même après un ajout
+        filtrer_periode = st.checkbox("Limiter à une période", key="filtre_limiter_periode")
+        periode = st.date_input(
+            "Période",
+            value=(premiere_date, derniere_date),
+            disabled=not filtrer_periode,
+            key="filtre_periode"
+        )
+    with col2:
+        groupe_id = st.selectbox(
+            "Groupe",
+            options=[None] + [(g["id"], g["nom"]) for g in data["groupes"]],
+            format_func=lambda x: x[1] if x else "Tous les groupes",
+            key="filtre_groupe"
+        )
+    with col3:
+        enseignant_id = st.selectbox(
+            "Enseignant",
+            options=[None] + [(e["id"], libelle("enseignants", e)) for e in data["enseignants"]],
+            format_func=lambda x: x[1] if x else "Tous les enseignants",
+            key="filtre_enseignant"
+        )
+    with col4:
+        recherche = st.text_input("Matière", key="filtre_matiere")
+
+    # Pendant la saisie d'une période, une seule date est renvoyée
+    debut, fin = premiere_date, derniere_date
+    if filtrer_periode and periode:
+        debut = periode[0]
+        fin = periode[1] if len(periode) > 1 else debut
+    seances = filtrer_seances(
+        stockage, debut, fin,
+        groupe_id[0] if groupe_id else None,
+        enseignant_id[0] if enseignant_id else None,
+        recherche
+    )
     if not seances:
-        st.warning("Aucune séance planifiée pour analyser le budget.")
+        st.info("Aucune séance ne correspond aux filtres")
         return
 
-    df = pd.DataFrame(seances)
-    df['Date'] = pd.to_datetime(df['date'])
-    df['Année'] = df['Date'].dt.year
+    # Pagination côté serveur
+    col1, col2 = st.columns(2)
+    with col1:
+        taille_page = st.selectbox("Séances par page", options=TAILLES_PAGE, key="taille_page")
+    pages = nombre_pages(len(seances), taille_page)
+    if st.session_state.get("page_seances", 1) > pages:
+        st.session_state["page_seances"] = pages
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="page_seances")
+    st.caption(f"{len(seances)} séance(s) — page {page}/{pages}")
+
+    page_seances = paginer(seances, page, taille_page)
+    df = pd.DataFrame([ligne_seance(s) for s in page_seances])
+    # La sélection est un numéro de ligne, gardé par Streamlit tant que la clé ne change
+    # pas : la clé suit la page, les filtres et les données, pour ne jamais désigner
+    # une autre séance que celle choisie
+    contexte = (
+        debut, fin, groupe_id and groupe_id[0], enseignant_id and enseignant_id[0], recherche,
+        page, taille_page, stockage.version
+    )
+    selection = st.dataframe(
+        df,
+        column_config={"Coût": st.column_config.NumberColumn("Coût", format="%.2f €")},
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"table_seances{contexte}"
+    )
+
+    # Actions sur la séance sélectionnée
+    lignes = selection.selection.rows
+    if lignes:
+        seance = page_seances[lignes[0]]
+        version = version_affichee("seances", seance)
+        ligne = ligne_seance(seance)
+        st.info(
+            f"Séance sélectionnée : {ligne['Date']} ({ligne['Créneau']}) — "
+            f"{ligne['Groupe']} — {ligne['Matière']} — {ligne['Enseignant']}"
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("✏️ Modifier la séance", key="edit_seance_selection"):
+                # Nouvelle édition : la version sera relue
+                terminer_edition("seances")
+                st.session_state["edit_seance_id"] = seance["id"]
+                relancer_fragment()
+        with col2:
+            if st.button("🗑️ Supprimer la séance", key="del_seance_selection"):
+                if supprimer_element(data, "seance", seance["id"], version):
+                    st.success("Séance supprimée avec succès!")
+                    relancer_fragment()
+    else:
+        st.caption("Sélectionnez une ligne pour la modifier ou la supprimer")
+
+def afficher_generation_seances(data):
+    """Génère automatiquement les séances d'une période à partir de besoins"""
+    import pandas as pd
+    besoins = st.session_state.setdefault("besoins_generation", [])
+
+    # Saisie d'un besoin : groupe, matière, enseignants candidats, volume et période
+    with st.form("form_besoin", clear_on_submit=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            groupe_id = st.selectbox(
+                "Groupe*",
+                options=[(g["id"], g["nom"]) for g in data["groupes"]],
+                format_func=lambda x: x[1]
+            )
+            matiere = st.text_input("Matière*", value="")
+            heures = st.number_input("Volume horaire*", min_value=2, step=2, value=20)
+        with col2:
+            enseignants = st.multiselect(
+                "Enseignant(s)*",
+                options=[(e["id"], libelle("enseignants", e)) for e in data["enseignants"]],
+                format_func=lambda x: x[1]
+            )
+            periode = st.date_input("Période*", value=(date.today(), date.today() + timedelta(weeks=20)))
+        if st.form_submit_button("Ajouter le besoin"):
+            if not matiere or not enseignants or len(periode) < 2:
+                st.error("Tous les champs sont obligatoires")
+            elif heures % 2:
+                # Les séances durent 2h ou 4h : un volume impair ne peut pas être découpé
+                st.error("Le volume horaire doit être un multiple de 2")
+            else:
+                besoins.append({
+                    "groupe_id": groupe_id[0],
+                    "matiere": matiere,
+                    "enseignants": [e[0] for e in enseignants],
+                    "heures": int(heures),
+                    "debut": periode[0].isoformat(),
+                    "fin": periode[1].isoformat()
+                })
+
+    # Indisponibilités des enseignants : {enseignant_id: [date ISO ou (date ISO, créneau)]}
+    indisponibilites = st.session_state.setdefault("indisponibilites_generation", {})
+    with st.form("form_indisponibilite", clear_on_submit=True):
+        st.write("Indisponibilité d'un enseignant")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            enseignant_indisponible = st.selectbox(
+                "Enseignant",
+                options=[(e["id"], libelle("enseignants", e)) for e in data["enseignants"]],
+                format_func=lambda x: x[1]
+            )
+        with col2:
+            periode_indisponible = st.date_input("Du … au", value=(date.today(), date.today()))
+        with col3:
+            creneau_indisponible = st.selectbox(
+                "Créneau",
+                options=[None] + list(CRENEAUX),
+                format_func=lambda x: x if x else "Journée entière"
+            )
+        if st.form_submit_button("Ajouter l'indisponibilité"):
+            if not periode_indisponible:
+                st.error("La période est obligatoire")
+            else:
+                jour = periode_indisponible[0]
+                fin = periode_indisponible[1] if len(periode_indisponible) > 1 else jour
+                entrees = indisponibilites.setdefault(enseignant_indisponible[0], [])
+                while jour <= fin:
+                    entrees.append((jour.isoformat(), creneau_indisponible) if creneau_indisponible else jour.isoformat())
+                    jour += timedelta(days=1)
+
+    index = get_stockage().index
+    if indisponibilites:
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Enseignant": libelle("enseignants", index.element("enseignants", enseignant_id))
+                    if index.element("enseignants", enseignant_id) else f"#{enseignant_id}",
+                    "Date": date.fromisoformat(entree if isinstance(entree, str) else entree[0]).strftime('%d/%m/%Y'),
+                    "Créneau": "Journée entière" if isinstance(entree, str) else entree[1]
+                }
+                for enseignant_id, entrees in indisponibilites.items()
+                for entree in entrees
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+
+    if not besoins:
+        st.info("Ajoutez des besoins à planifier")
+        return
+
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Groupe": index.element("groupes", b["groupe_id"])["nom"],
+                "Matière": b["matiere"],
+                "Enseignant(s)": ", ".join(
+                    f"{e['prenom']} {e['nom']}" for e in (index.element("enseignants", i) for i in b["enseignants"]) if e
+                ),
+                "Heures": b["heures"],
+                "Du": date.fromisoformat(b["debut"]).strftime('%d/%m/%Y'),
+                "Au": date.fromisoformat(b["fin"]).strftime('%d/%m/%Y')
+            }
+            for b in besoins
+        ]),
+        hide_index=True,
+        use_container_width=True
+    )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        budget_temps = st.number_input("Temps de calcul max (s)", min_value=1, max_value=60, value=5)
+    with col2:
+        minimiser_cout = st.checkbox("Minimiser le coût", value=True)
+    with col3:
+        if st.button("Vider les besoins"):
+            besoins.clear()
+            indisponibilites.clear()
+            st.session_state.pop("resultat_generation", None)
+            st.rerun()
+
+    if st.button("Générer les séances"):
+        # La version des données utilisées est vérifiée à l'enregistrement
+        data = charger_donnees()
+        st.session_state["version_generation"] = get_stockage().version
+        try:
+            st.session_state["resultat_generation"] = resoudre(
+                index, besoins, seances_existantes=data["seances"], indisponibilites=indisponibilites,
+                budget_temps=budget_temps, minimiser_cout=minimiser_cout
+            )
+        except ValueError as e:
+            st.error(f"Besoins invalides : {e}")
+            return
+
+    resultat = st.session_state.get("resultat_generation")
+    if resultat is None:
+        return
+    st.caption(f"{len(resultat.seances)} séance(s) générée(s) en {resultat.duree_calcul:.2f} s — coût {resultat.cout:.2f} €")
+    if resultat.non_placees:
+        # Une entrée par séance non placée : les heures sont cumulées par besoin
+        heures_non_placees = {}
+        for numero, heures in resultat.non_placees:
+            heures_non_placees[numero] = heures_non_placees.get(numero, 0) + heures
+        st.warning("\n".join(
+            f"- {besoins[numero]['matiere']} ({index.element('groupes', besoins[numero]['groupe_id'])['nom']}) : "
+            f"{heures}h non placées"
+            for numero, heures in heures_non_placees.items()
+        ))
+    if resultat.seances:
+        st.dataframe(
+            pd.DataFrame([
+                ligne_seance(s) for s in resultat.seances
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+        if st.button("Enregistrer les séances générées"):
+            # Une seule écriture, refusée si les données ont changé depuis la génération :
+            # les chevauchements évités par le solveur ne seraient plus garantis
+            try:
+                get_stockage().ajouter_lot(
+                    "seances", resultat.seances, version_attendue=st.session_state.get("version_generation")
+                )
+            except ConflitVersion:
+                del st.session_state["resultat_generation"]
+                st.error("Les données ont été modifiées depuis la génération : relancez la génération")
+                return
+            besoins.clear()
+            indisponibilites.clear()
+            del st.session_state["resultat_generation"]
+            st.success("Séances enregistrées avec succès!")
+            st.rerun()
+
+def afficher_import_seances():
+    """Importe des séances depuis un fichier CSV/Excel après un aperçu"""
+    import pandas as pd
+    st.caption("Colonnes attendues : Date, Créneau, Groupe, Enseignant, Matière")
+    fichier = st.file_uploader("Fichier de séances", type=['csv', 'xlsx'], key="import_seances")
+    if fichier is None:
+        st.session_state.pop("apercu_import", None)
+        return
+
+    # Analyse sans écriture : aperçu des ajouts, doublons et erreurs
+    if st.button("Analyser le fichier"):
+        try:
+            st.session_state["apercu_import"] = analyser(get_stockage(), lire_lignes(fichier, fichier.name))
+        except Exception as e:
+            st.error(f"Erreur lors de la lecture du fichier: {str(e)}")
+            return
+
+    apercu = st.session_state.get("apercu_import")
+    if apercu is None:
+        return
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Séances à ajouter", len(apercu.a_ajouter))
+    col2.metric("Doublons ignorés", len(apercu.doublons))
+    col3.metric("Lignes en erreur", len(apercu.erreurs))
+    if apercu.erreurs:
+        st.dataframe(
+            pd.DataFrame(apercu.erreurs, columns=["Ligne", "Erreur"]),
+            hide_index=True,
+            use_container_width=True
+        )
+    if apercu.a_ajouter:
+        st.dataframe(
+            pd.DataFrame([
+                {"Ligne": numero, **ligne_seance(s)}
+                for numero, s in apercu.a_ajouter
+            ]),
+            column_config={"Coût": st.column_config.NumberColumn("Coût", format="%.2f €")},
+            hide_index=True,
+            use_container_width=True
+        )
+        if st.button(f"Importer {len(apercu.a_ajouter)} séance(s)"):
+            try:
+                importer(get_stockage(), apercu)
+            except ErreurImport as e:
+                st.error(str(e))
+                return
+            del st.session_state["apercu_import"]
+            st.success("Séances importées avec succès!")
+            st.rerun()
+
+def afficher_budget_annuel(stockage):
+    """Affiche le budget par année civile"""
+    budget_annuel, fig = figure_en_cache(("budget", "annee"), lambda: construire_budget_annuel(stockage))
+    if budget_annuel.empty:
+        st.warning("Aucune séance planifiée pour analyser le budget.")
+        return
 
     # Budget par année
     st.subheader("Budget par année civile")
-    budget_annuel = df.groupby('Année')['cout'].sum().reset_index()
 
-    if not budget_annuel.empty:
-        fig = px.bar(
-            budget_annuel,
-            x='Année',
-            y='cout',
-            title='Budget par année',
-            labels={'Année': 'Année', 'cout': 'Coût (€)'},
-            text_auto='.2s'
-        )
-        fig.update_traces(textfont_size=12, textangle=0, textposition="outside", cliponaxis=False)
+    if fig is not None:
         st.plotly_chart(fig, use_container_width=True)
 
         # Affichage détaillé
@@ -278,22 +730,372 @@ def afficher_budget_annuel(seances):
     else:
         st.info("Aucune donnée budgétaire disponible par année")
 
+@st.fragment
+@chronometre("fragment.seances")
+def afficher_gestion_seances():
+    """Formulaire et liste des séances, relancés seuls (sans main()) par leurs boutons"""
+    data = charger_donnees()
+
+    # Formulaire d'ajout
+    with st.expander("Ajouter/Modifier une séance", expanded=True):
+        edit_id = st.session_state.get("edit_seance_id", None)
+        if afficher_formulaire_seance(data, edit_id):
+            if "edit_seance_id" in st.session_state:
+                del st.session_state["edit_seance_id"]
+            relancer_fragment()
+
+    # Liste des séances avec actions
+    st.subheader("Liste des séances")
+    if data["seances"]:
+        afficher_liste_seances(data, get_stockage())
+    else:
+        st.info("Aucune séance planifiée")
+
+def afficher_formulaire_enseignant(data, edit_id=None):
+    """Affiche le formulaire d'ajout/modification d'enseignant, retourne True une fois enregistré ou annulé"""
+    enseignant = get_stockage().index.element("enseignants", edit_id) if edit_id else None
+    if edit_id:
+        version_en_edition("enseignants", edit_id)
+
+    with st.form(f"form_enseignant_{edit_id}" if edit_id else "form_enseignant"):
+        nom = st.text_input("Nom*", value=enseignant["nom"] if enseignant else "")
+        prenom = st.text_input("Prénom*", value=enseignant["prenom"] if enseignant else "")
+        tarif = st.number_input(
+            "Tarif horaire (€)*",
+            min_value=0.0,
+            step=0.5,
+            value=float(enseignant["tarif"]) if enseignant else 0.0
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.form_submit_button("Enregistrer"):
+                if not nom or not prenom:
+                    st.error("Les champs marqués d'un * sont obligatoires")
+                else:
+                    if edit_id:
+                        # Mise à jour, refusée si un autre utilisateur a enregistré entre-temps
+                        enregistre = enregistrer_modification("enseignants", {
+                            "id": edit_id,
+                            "nom": nom,
+                            "prenom": prenom,
+                            "tarif": tarif
+                        })
+                    else:
+                        # Ajout
+                        get_stockage().ajouter("enseignants", {
+                            "nom": nom,
+                            "prenom": prenom,
+                            "tarif": tarif
+                        })
+                        enregistre = True
+
+                    if enregistre:
+                        st.success("Enseignant enregistré avec succès!")
+                        return True
+
+        with col2:
+            if edit_id and st.form_submit_button("Annuler"):
+                terminer_edition("enseignants")
+                return True
+
+    return False
+
+def afficher_formulaire_groupe(data, edit_id=None):
+    """Affiche le formulaire d'ajout/modification de groupe, retourne True une fois enregistré ou annulé"""
+    groupe = get_stockage().index.element("groupes", edit_id) if edit_id else None
+    if edit_id:
+        version_en_edition("groupes", edit_id)
+
+    with st.form(f"form_groupe_{edit_id}" if edit_id else "form_groupe"):
+        nom = st.text_input("Nom du groupe*", value=groupe["nom"] if groupe else "")
+
+        # Sélection de la promotion
+        promo_options = [(p["id"], p["nom"]) for p in data["promotions"]]
+        promo_id = st.selectbox(
+            "Promotion*",
+            options=promo_options,
+            format_func=lambda x: x[1],
+            index=next((i for i, (id, _) in enumerate(promo_options) if id == groupe["promo_id"]), 0) if groupe and promo_options else 0
+        ) if promo_options else st.warning("Aucune promotion disponible")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.form_submit_button("Enregistrer"):
+                if not nom or not promo_options:
+                    st.error("Les champs marqués d'un * sont obligatoires")
+                else:
+                    if edit_id:
+                        # Mise à jour, refusée si un autre utilisateur a enregistré entre-temps
+                        enregistre = enregistrer_modification("groupes", {
+                            "id": edit_id,
+                            "nom": nom,
+                            "promo_id": promo_id[0]
+                        })
+                    else:
+                        # Ajout
+                        get_stockage().ajouter("groupes", {
+                            "nom": nom,
+                            "promo_id": promo_id[0]
+                        })
+                        enregistre = True
+
+                    if enregistre:
+                        st.success("Groupe enregistré avec succès!")
+                        return True
+
+        with col2:
+            if edit_id and st.form_submit_button("Annuler"):
+                terminer_edition("groupes")
+                return True
+
+    return False
+
+def afficher_formulaire_promotion(data, edit_id=None):
+    """Affiche le formulaire d'ajout/modification de promotion, retourne True une fois enregistré ou annulé"""
+    promo = get_stockage().index.element("promotions", edit_id) if edit_id else None
+    if edit_id:
+        version_en_edition("promotions", edit_id)
+
+    with st.form(f"form_promo_{edit_id}" if edit_id else "form_promo"):
+        nom = st.text_input("Nom de la promotion*", value=promo["nom"] if promo else "")
+
+        # Sélection de la session
+        session_options = [(s["id"], s["nom"]) for s in data["sessions"]]
+        session_id = st.selectbox(
+            "Session*",
+            options=session_options,
+            format_func=lambda x: x[1],
+            index=next((i for i, (id, _) in enumerate(session_options) if id == promo["session_id"]), 0) if promo and session_options else 0
+        ) if session_options else st.warning("Aucune session disponible")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.form_submit_button("Enregistrer"):
+                if not nom or not session_options:
+                    st.error("Les champs marqués d'un * sont obligatoires")
+                else:
+                    if edit_id:
+                        # Mise à jour, refusée si un autre utilisateur a enregistré entre-temps
+                        enregistre = enregistrer_modification("promotions", {
+                            "id": edit_id,
+                            "nom": nom,
+                            "session_id": session_id[0]
+                        })
+                    else:
+                        # Ajout
+                        get_stockage().ajouter("promotions", {
+                            "nom": nom,
+                            "session_id": session_id[0]
+                        })
+                        enregistre = True
+
+                    if enregistre:
+                        st.success("Promotion enregistrée avec succès!")
+                        return True
+
+        with col2:
+            if edit_id and st.form_submit_button("Annuler"):
+                terminer_edition("promotions")
+                return True
+
+    return False
+
+def afficher_formulaire_session(data, edit_id=None):
+    """Affiche le formulaire d'ajout/modification de session, retourne True une fois enregistré ou annulé"""
+    session = get_stockage().index.element("sessions", edit_id) if edit_id else None
+    if edit_id:
+        version_en_edition("sessions", edit_id)
+
+    with st.form(f"form_session_{edit_id}" if edit_id else "form_session"):
+        nom = st.text_input("Nom de la session*", value=session["nom"] if session else "")
+        annee = st.number_input(
+            "Année*",
+            min_value=2023,
+            max_value=2030,
+            step=1,
+            value=session["annee"] if session else 2023
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.form_submit_button("Enregistrer"):
+                if not nom:
+                    st.error("Le nom de la session est obligatoire")
+                else:
+                    if edit_id:
+                        # Mise à jour, refusée si un autre utilisateur a enregistré entre-temps
+                        enregistre = enregistrer_modification("sessions", {
+                            "id": edit_id,
+                            "nom": nom,
+                            "annee": int(annee)
+                        })
+                    else:
+                        # Ajout
+                        get_stockage().ajouter("sessions", {
+                            "nom": nom,
+                            "annee": int(annee)
+                        })
+                        enregistre = True
+
+                    if enregistre:
+                        st.success("Session enregistrée avec succès!")
+                        return True
+
+        with col2:
+            if edit_id and st.form_submit_button("Annuler"):
+                terminer_edition("sessions")
+                return True
+
+    return False
+
+def decrire_element(element_type, element):
+    """Retourne le titre et le détail d'une ligne de la liste d'un onglet"""
+    index = get_stockage().index
+    if element_type == "enseignant":
+        return f"**{element['prenom']} {element['nom']}**", f"Tarif horaire: {element['tarif']:.2f}€"
+    if element_type == "groupe":
+        promo = index.element("promotions", element["promo_id"])
+        return f"**{element['nom']}**", f"Promotion: {promo['nom'] if promo else 'Inconnue'}"
+    if element_type == "promotion":
+        session = index.element("sessions", element["session_id"])
+        return f"**{element['nom']}**", f"Session: {session['nom'] if session else 'Inconnue'}"
+    return f"**{element['nom']}**", f"Année: {element['annee']}"
+
+# Par type d'élément : préfixe des clés de boutons, clé de l'élément en cours
+# d'édition (st.session_state) et formulaire d'ajout/modification
+LIGNES = {
+    "enseignant": ("ens", "edit_enseignant_id", afficher_formulaire_enseignant),
+    "groupe": ("gr", "edit_groupe_id", afficher_formulaire_groupe),
+    "promotion": ("pr", "edit_promo_id", afficher_formulaire_promotion),
+    "session": ("ses", "edit_session_id", afficher_formulaire_session),
+}
+
+@st.fragment
+@chronometre("fragment.ajout")
+def afficher_ajout(element_type, titre):
+    """Formulaire d'ajout d'un onglet, relancé seul tant que la saisie est refusée"""
+    with st.expander(titre, expanded=True):
+        if LIGNES[element_type][2](charger_donnees()):
+            # La liste (un fragment par ligne) doit montrer le nouvel élément
+            st.rerun()
+
+@st.fragment
+@chronometre("fragment.ligne")
+def afficher_ligne(element_type, element_id):
+    """Ligne d'une liste avec ses boutons ✏️/🗑️ : un clic ne relance que cette ligne
+
+    La modification se fait dans la ligne même. L'élément est relu à chaque
+    exécution : une relance du fragment ne repasse pas par main().
+    """
+    prefixe, cle_edition, formulaire = LIGNES[element_type]
+    collection = COLLECTIONS_PAR_TYPE[element_type]
+    element = get_stockage().index.element(collection, element_id)
+    if element is None:
+        # Supprimé depuis l'affichage de la liste
+        return
+
+    if st.session_state.get(cle_edition) == element_id:
+        if formulaire(charger_donnees(), element_id):
+            del st.session_state[cle_edition]
+            relancer_fragment()
+        st.divider()
+        return
+
+    version = version_affichee(collection, element)
+    col1, col2, col3 = st.columns([4, 1, 1])
+    with col1:
+        titre, detail = decrire_element(element_type, element)
+        st.write(titre)
+        st.write(detail)
+
+    with col2:
+        if st.button("✏️", key=f"edit_{prefixe}_{element_id}"):
+            # Nouvelle édition : la version sera relue
+            terminer_edition(collection)
+            precedent = st.session_state.get(cle_edition)
+            st.session_state[cle_edition] = element_id
+            if precedent is not None:
+                # Une autre ligne encore ouverte en édition se referme avec toute la page
+                st.rerun()
+            relancer_fragment()
+
+    with col3:
+        if st.button("🗑️", key=f"del_{prefixe}_{element_id}"):
+            if supprimer_element(charger_donnees(), element_type, element_id, version):
+                relancer_fragment()
+
+    st.divider()
+
+def afficher_liste(data, element_type, vide):
+    """Affiche la liste d'un onglet, une ligne (un fragment) par élément"""
+    collection = COLLECTIONS_PAR_TYPE[element_type]
+    if data[collection]:
+        for element in data[collection]:
+            afficher_ligne(element_type, element["id"])
+    else:
+        st.info(vide)
+
 # Interface principale
+def afficher_mesures():
+    """Panneau d'administration des temps mesurés (p50/p95 par span) dans la barre latérale
+
+    Les compteurs des caches (figures, exports, stockage) y sont ajoutés :
+    durée moyenne d'une construction (miss) face à celle d'un hit. Affiché
+    seulement si les mesures sont actives (PLANNING_MESURES) et si l'URL
+    porte ?admin=<PLANNING_ADMIN>.
+    """
+    jeton = os.environ.get("PLANNING_ADMIN")
+    if not mesures_actives() or not jeton or st.query_params.get("admin") != jeton:
+        return
+    with st.sidebar.expander("Temps mesurés (ms)"):
+        st.dataframe(
+            [
+                {"Span": nom, "N": nombre, "p50": round(p50, 1), "p95": round(p95, 1), "Max": round(maximum, 1)}
+                for nom, nombre, p50, p95, maximum in statistiques_mesures()
+            ],
+            hide_index=True
+        )
+    with st.sidebar.expander("Caches"):
+        st.dataframe(
+            [
+                {"Cache": nom, **cache.statistiques()}
+                for nom, cache in (("Figures", get_cache_figures()), ("Exports", get_cache_exports()))
+            ],
+            hide_index=True
+        )
+        st.dataframe([{"Cache": "Stockage", **get_stockage().statistiques()}], hide_index=True)
+
 def main():
-    data = charger_donnees()
+    # Configuration de la page (ici plutôt qu'à l'import du module)
+    st.set_page_config(
+        page_title="Planification École d'Ingénieurs",
+        page_icon="📚",
+        layout="wide"
+    )
+
+    with mesurer("rerun"):
+        data = charger_donnees()
+        index = get_stockage().index
 
-    # Affichage du logo
-    logo_url = "https://raw.githubusercontent.com/Jules-CESI-Toulouse/planning-CESI/refs/heads/main/logo.png"
-    st.image(load_logo(logo_url), width=200)
+        # Affichage du logo
+        st.image(load_logo(), width=200)
 
-    # Sidebar Navigation
-    st.sidebar.title("Navigation")
-    onglet = st.sidebar.radio("Menu", [
-        "Calendrier", "Séances", "Enseignants",
-        "Groupes", "Promotions", "Sessions",
-        "Budget", "Export"
-    ])
+        # Sidebar Navigation
+        st.sidebar.title("Navigation")
+        onglet = st.sidebar.radio("Menu", [
+            "Calendrier", "Séances", "Enseignants",
+            "Groupes", "Promotions", "Sessions",
+            "Budget", "Export"
+        ])
 
+        # Temps propre de l'onglet (widgets) = durée du span moins celle de ses enfants
+        with mesurer(f"onglet.{onglet}"):
+            afficher_onglet(onglet, data, index)
+    afficher_mesures()
+
+def afficher_onglet(onglet, data, index):
+    """Affiche le contenu de l'onglet choisi dans la barre latérale"""
     # Onglet Calendrier
     if onglet == "Calendrier":
         st.title("Calendrier des séances")
@@ -325,7 +1127,7 @@ def main():
         )
 
         # Affichage du calendrier
-        afficher_calendrier_semaine(data["seances"], debut_semaine, session_id[0] if session_id else None, groupe_id[0] if groupe_id else None)
+        afficher_calendrier_semaine(get_stockage(), debut_semaine, session_id[0] if session_id else None, groupe_id[0] if groupe_id else None)
 
         # Bouton pour ajouter une séance depuis le calendrier
         if st.button("Ajouter une séance", key="ajout_calendrier"):
@@ -338,436 +1140,204 @@ def main():
 
     # Onglet Séances
     elif onglet == "Séances":
+        # pandas n'est chargé que par les onglets qui affichent des tableaux
+        import pandas as pd
         st.title("Gestion des séances")
 
-        # Formulaire d'ajout
-        with st.expander("Ajouter/Modifier une séance", expanded=True):
-            edit_id = st.session_state.get("edit_seance_id", None)
-            if afficher_formulaire_seance(data, edit_id):
-                if "edit_seance_id" in st.session_state:
-                    del st.session_state["edit_seance_id"]
-                st.rerun()
-
-        # Liste des séances avec actions
-        st.subheader("Liste des séances")
-        if data["seances"]:
-            df = pd.DataFrame(data["seances"])
-            df['date'] = pd.to_datetime(df['date']).dt.date
-
-            # Affichage sous forme de tableau avec actions
-            for _, row in df.iterrows():
-                col1, col2, col3 = st.columns([4, 1, 1])
-                with col1:
-                    st.write(f"**{row['date'].strftime('%d/%m/%Y')}** - {row['creneau']}")
-                    st.write(f"{row['matiere']} avec {row['enseignant']} pour le groupe {row['groupe']}")
-                    st.write(f"Coût: {row['cout']:.2f}€")
-
-                with col2:
-                    if st.button("✏️", key=f"edit_{row['id']}"):
-                        st.session_state["edit_seance_id"] = row['id']
-                        st.rerun()
+        # Formulaire et liste : un clic sur une ligne ne relance que ce fragment
+        afficher_gestion_seances()
+
+        # Recherche des chevauchements dans toutes les séances (une seule passe)
+        with st.expander("Chevauchements existants"):
+            if st.button("Rechercher les chevauchements"):
+                conflits = scanner_conflits(data["seances"])
+                if conflits:
+                    st.error(f"{len(conflits)} chevauchement(s) trouvé(s)")
+                    st.dataframe(
+                        pd.DataFrame([
+                            {
+                                "Type": type_conflit,
+                                "Date": date.fromisoformat(jour).strftime('%d/%m/%Y'),
+                                "Séance 1": decrire_conflit(type_conflit, id1),
+                                "Séance 2": decrire_conflit(type_conflit, id2)
+                            }
+                            for type_conflit, jour, _, id1, id2 in conflits
+                        ]),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                else:
+                    st.success("Aucun chevauchement")
 
-                with col3:
-                    if st.button("🗑️", key=f"del_{row['id']}"):
-                        if supprimer_element(data, "seance", row['id']):
-                            st.success("Séance supprimée avec succès!")
-                            st.rerun()
+        # Import en masse depuis un fichier CSV/Excel
+        with st.expander("Importer des séances (CSV/Excel)"):
+            afficher_import_seances()
 
-                st.divider()
-        else:
-            st.info("Aucune séance planifiée")
+        # Génération automatique à partir des besoins d'enseignement
+        with st.expander("Génération automatique"):
+            if data["groupes"] and data["enseignants"]:
+                afficher_generation_seances(data)
+            else:
+                st.info("Créez d'abord des groupes et des enseignants")
 
     # Onglet Enseignants
     elif onglet == "Enseignants":
         st.title("Gestion des enseignants")
 
-        # Formulaire d'ajout/modification
-        with st.expander("Ajouter/Modifier un enseignant", expanded=True):
-            edit_id = st.session_state.get("edit_enseignant_id", None)
-            enseignant = next((e for e in data["enseignants"] if e["id"] == edit_id), None) if edit_id else None
-
-            with st.form("form_enseignant"):
-                nom = st.text_input("Nom*", value=enseignant["nom"] if enseignant else "")
-                prenom = st.text_input("Prénom*", value=enseignant["prenom"] if enseignant else "")
-                tarif = st.number_input(
-                    "Tarif horaire (€)*",
-                    min_value=0.0,
-                    step=0.5,
-                    value=float(enseignant["tarif"]) if enseignant else 0.0
-                )
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.form_submit_button("Enregistrer"):
-                        if not nom or not prenom:
-                            st.error("Les champs marqués d'un * sont obligatoires")
-                        else:
-                            if edit_id:
-                                # Mise à jour
-                                for e in data["enseignants"]:
-                                    if e["id"] == edit_id:
-                                        e.update({
-                                            "nom": nom,
-                                            "prenom": prenom,
-                                            "tarif": tarif
-                                        })
-                                        break
-                            else:
-                                # Ajout
-                                data["enseignants"].append({
-                                    "id": max([e["id"] for e in data["enseignants"]], default=0) + 1,
-                                    "nom": nom,
-                                    "prenom": prenom,
-                                    "tarif": tarif
-                                })
-
-                            sauvegarder_donnees(data)
-                            st.success("Enseignant enregistré avec succès!")
-                            if "edit_enseignant_id" in st.session_state:
-                                del st.session_state["edit_enseignant_id"]
-                            st.rerun()
-
-                with col2:
-                    if edit_id and st.form_submit_button("Annuler"):
-                        if "edit_enseignant_id" in st.session_state:
-                            del st.session_state["edit_enseignant_id"]
-                        st.rerun()
+        # Formulaire d'ajout
+        afficher_ajout("enseignant", "Ajouter un enseignant")
 
-        # Liste des enseignants avec actions
+        # Liste avec actions : un clic sur ✏️ ou 🗑️ ne relance que sa ligne
         st.subheader("Liste des enseignants")
-        if data["enseignants"]:
-            for enseignant in data["enseignants"]:
-                col1, col2, col3 = st.columns([4, 1, 1])
-                with col1:
-                    st.write(f"**{enseignant['prenom']} {enseignant['nom']}**")
-                    st.write(f"Tarif horaire: {enseignant['tarif']:.2f}€")
-
-                with col2:
-                    if st.button("✏️", key=f"edit_ens_{enseignant['id']}"):
-                        st.session_state["edit_enseignant_id"] = enseignant['id']
-                        st.rerun()
-
-                with col3:
-                    if st.button("🗑️", key=f"del_ens_{enseignant['id']}"):
-                        if supprimer_element(data, "enseignant", enseignant['id']):
-                            st.success("Enseignant supprimé avec succès!")
-                            st.rerun()
-
-                st.divider()
-        else:
-            st.info("Aucun enseignant enregistré")
+        afficher_liste(data, "enseignant", "Aucun enseignant enregistré")
 
     # Onglet Groupes
     elif onglet == "Groupes":
         st.title("Gestion des groupes")
 
-        # Formulaire d'ajout/modification
-        with st.expander("Ajouter/Modifier un groupe", expanded=True):
-            edit_id = st.session_state.get("edit_groupe_id", None)
-            groupe = next((g for g in data["groupes"] if g["id"] == edit_id), None) if edit_id else None
-
-            with st.form("form_groupe"):
-                nom = st.text_input("Nom du groupe*", value=groupe["nom"] if groupe else "")
-
-                # Sélection de la promotion
-                promo_options = [(p["id"], p["nom"]) for p in data["promotions"]]
-                promo_id = st.selectbox(
-                    "Promotion*",
-                    options=promo_options,
-                    format_func=lambda x: x[1],
-                    index=next((i for i, (id, _) in enumerate(promo_options) if id == groupe["promo_id"]), 0) if groupe and promo_options else 0
-                ) if promo_options else st.warning("Aucune promotion disponible")
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.form_submit_button("Enregistrer"):
-                        if not nom or not promo_options:
-                            st.error("Les champs marqués d'un * sont obligatoires")
-                        else:
-                            if edit_id:
-                                # Mise à jour
-                                for g in data["groupes"]:
-                                    if g["id"] == edit_id:
-                                        g.update({
-                                            "nom": nom,
-                                            "promo_id": promo_id[0]
-                                        })
-                                        break
-                            else:
-                                # Ajout
-                                data["groupes"].append({
-                                    "id": max([g["id"] for g in data["groupes"]], default=0) + 1,
-                                    "nom": nom,
-                                    "promo_id": promo_id[0]
-                                })
-
-                            sauvegarder_donnees(data)
-                            st.success("Groupe enregistré avec succès!")
-                            if "edit_groupe_id" in st.session_state:
-                                del st.session_state["edit_groupe_id"]
-                            st.rerun()
-
-                with col2:
-                    if edit_id and st.form_submit_button("Annuler"):
-                        if "edit_groupe_id" in st.session_state:
-                            del st.session_state["edit_groupe_id"]
-                        st.rerun()
+        # Formulaire d'ajout
+        afficher_ajout("groupe", "Ajouter un groupe")
 
-        # Liste des groupes avec actions
+        # Liste avec actions : un clic sur ✏️ ou 🗑️ ne relance que sa ligne
         st.subheader("Liste des groupes")
-        if data["groupes"]:
-            for groupe in data["groupes"]:
-                promo_nom = next((p["nom"] for p in data["promotions"] if p["id"] == groupe["promo_id"]), "Inconnue")
-
-                col1, col2, col3 = st.columns([4, 1, 1])
-                with col1:
-                    st.write(f"**{groupe['nom']}**")
-                    st.write(f"Promotion: {promo_nom}")
-
-                with col2:
-                    if st.button("✏️", key=f"edit_gr_{groupe['id']}"):
-                        st.session_state["edit_groupe_id"] = groupe['id']
-                        st.rerun()
-
-                with col3:
-                    if st.button("🗑️", key=f"del_gr_{groupe['id']}"):
-                        if supprimer_element(data, "groupe", groupe['id']):
-                            st.success("Groupe supprimé avec succès!")
-                            st.rerun()
-
-                st.divider()
-        else:
-            st.info("Aucun groupe enregistré")
+        afficher_liste(data, "groupe", "Aucun groupe enregistré")
 
     # Onglet Promotions
     elif onglet == "Promotions":
         st.title("Gestion des promotions")
 
-        # Formulaire d'ajout/modification
-        with st.expander("Ajouter/Modifier une promotion", expanded=True):
-            edit_id = st.session_state.get("edit_promo_id", None)
-            promo = next((p for p in data["promotions"] if p["id"] == edit_id), None) if edit_id else None
-
-            with st.form("form_promo"):
-                nom = st.text_input("Nom de la promotion*", value=promo["nom"] if promo else "")
-
-                # Sélection de la session
-                session_options = [(s["id"], s["nom"]) for s in data["sessions"]]
-                session_id = st.selectbox(
-                    "Session*",
-                    options=session_options,
-                    format_func=lambda x: x[1],
-                    index=next((i for i, (id, _) in enumerate(session_options) if id == promo["session_id"]), 0) if promo and session_options else 0
-                ) if session_options else st.warning("Aucune session disponible")
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.form_submit_button("Enregistrer"):
-                        if not nom or not session_options:
-                            st.error("Les champs marqués d'un * sont obligatoires")
-                        else:
-                            if edit_id:
-                                # Mise à jour
-                                for p in data["promotions"]:
-                                    if p["id"] == edit_id:
-                                        p.update({
-                                            "nom": nom,
-                                            "session_id": session_id[0]
-                                        })
-                                        break
-                            else:
-                                # Ajout
-                                data["promotions"].append({
-                                    "id": max([p["id"] for p in data["promotions"]], default=0) + 1,
-                                    "nom": nom,
-                                    "session_id": session_id[0]
-                                })
-
-                            sauvegarder_donnees(data)
-                            st.success("Promotion enregistrée avec succès!")
-                            if "edit_promo_id" in st.session_state:
-                                del st.session_state["edit_promo_id"]
-                            st.rerun()
-
-                with col2:
-                    if edit_id and st.form_submit_button("Annuler"):
-                        if "edit_promo_id" in st.session_state:
-                            del st.session_state["edit_promo_id"]
-                        st.rerun()
+        # Formulaire d'ajout
+        afficher_ajout("promotion", "Ajouter une promotion")
 
-        # Liste des promotions avec actions
+        # Liste avec actions : un clic sur ✏️ ou 🗑️ ne relance que sa ligne
         st.subheader("Liste des promotions")
-        if data["promotions"]:
-            for promo in data["promotions"]:
-                session_nom = next((s["nom"] for s in data["sessions"] if s["id"] == promo["session_id"]), "Inconnue")
-
-                col1, col2, col3 = st.columns([4, 1, 1])
-                with col1:
-                    st.write(f"**{promo['nom']}**")
-                    st.write(f"Session: {session_nom}")
-
-                with col2:
-                    if st.button("✏️", key=f"edit_pr_{promo['id']}"):
-                        st.session_state["edit_promo_id"] = promo['id']
-                        st.rerun()
-
-                with col3:
-                    if st.button("🗑️", key=f"del_pr_{promo['id']}"):
-                        if supprimer_element(data, "promotion", promo['id']):
-                            st.success("Promotion supprimée avec succès!")
-                            st.rerun()
-
-                st.divider()
-        else:
-            st.info("Aucune promotion enregistrée")
+        afficher_liste(data, "promotion", "Aucune promotion enregistrée")
 
     # Onglet Sessions
     elif onglet == "Sessions":
         st.title("Gestion des sessions")
 
-        # Formulaire d'ajout/modification
-        with st.expander("Ajouter/Modifier une session", expanded=True):
-            edit_id = st.session_state.get("edit_session_id", None)
-            session = next((s for s in data["sessions"] if s["id"] == edit_id), None) if edit_id else None
-
-            with st.form("form_session"):
-                nom = st.text_input("Nom de la session*", value=session["nom"] if session else "")
-                annee = st.number_input(
-                    "Année*",
-                    min_value=2023,
-                    max_value=2030,
-                    step=1,
-                    value=session["annee"] if session else 2023
-                )
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.form_submit_button("Enregistrer"):
-                        if not nom:
-                            st.error("Le nom de la session est obligatoire")
-                        else:
-                            if edit_id:
-                                # Mise à jour
-                                for s in data["sessions"]:
-                                    if s["id"] == edit_id:
-                                        s.update({
-                                            "nom": nom,
-                                            "annee": int(annee)
-                                        })
-                                        break
-                            else:
-                                # Ajout
-                                data["sessions"].append({
-                                    "id": max([s["id"] for s in data["sessions"]], default=0) + 1,
-                                    "nom": nom,
-                                    "annee": int(annee)
-                                })
-
-                            sauvegarder_donnees(data)
-                            st.success("Session enregistrée avec succès!")
-                            if "edit_session_id" in st.session_state:
-                                del st.session_state["edit_session_id"]
-                            st.rerun()
-
-                with col2:
-                    if edit_id and st.form_submit_button("Annuler"):
-                        if "edit_session_id" in st.session_state:
-                            del st.session_state["edit_session_id"]
-                        st.rerun()
+        # Formulaire d'ajout
+        afficher_ajout("session", "Ajouter une session")
 
-        # Liste des sessions avec actions
+        # Liste avec actions : un clic sur ✏️ ou 🗑️ ne relance que sa ligne
         st.subheader("Liste des sessions")
-        if data["sessions"]:
-            for session in data["sessions"]:
-                col1, col2, col3 = st.columns([4, 1, 1])
-                with col1:
-                    st.write(f"**{session['nom']}**")
-                    st.write(f"Année: {session['annee']}")
-
-                with col2:
-                    if st.button("✏️", key=f"edit_ses_{session['id']}"):
-                        st.session_state["edit_session_id"] = session['id']
-                        st.rerun()
-
-                with col3:
-                    if st.button("🗑️", key=f"del_ses_{session['id']}"):
-                        if supprimer_element(data, "session", session['id']):
-                            st.success("Session supprimée avec succès!")
-                            st.rerun()
-
-                st.divider()
-        else:
-            st.info("Aucune session enregistrée")
+        afficher_liste(data, "session", "Aucune session enregistrée")
 
     # Onglet Budget
     elif onglet == "Budget":
+        import pandas as pd
         st.title("Analyse budgétaire")
 
         # Budget par année civile
-        afficher_budget_annuel(data["seances"])
-
-        if data["seances"]:
-            df = pd.DataFrame(data["seances"])
+        stockage = get_stockage()
+        afficher_budget_annuel(stockage)
 
+        # Les totaux sont agrégés par le stockage et les figures gardées en cache
+        _, fig1 = figure_en_cache(("budget", "enseignant"), lambda: construire_budget_enseignant(stockage))
+        if fig1 is not None:
             # Budget par enseignant
             st.subheader("Budget par enseignant")
-            budget_enseignant = df.groupby("enseignant")["cout"].sum().reset_index()
-            fig1 = px.bar(
-                budget_enseignant,
-                x="enseignant",
-                y="cout",
-                title="Coût par enseignant",
-                labels={"enseignant": "Enseignant", "cout": "Coût (€)"}
-            )
             st.plotly_chart(fig1, use_container_width=True)
 
             # Budget par promotion
-            if "promotion" in df.columns:
+            _, fig2 = figure_en_cache(("budget", "promotion"), lambda: construire_budget_promotion(stockage))
+            if fig2 is not None:
                 st.subheader("Budget par promotion")
-                budget_promo = df.groupby("promotion")["cout"].sum().reset_index()
-                fig2 = px.pie(
-                    budget_promo,
-                    values="cout",
-                    names="promotion",
-                    title="Répartition par promotion",
-                    labels={"promotion": "Promotion", "cout": "Coût (€)"}
-                )
                 st.plotly_chart(fig2, use_container_width=True)
 
             # Budget total
-            total = df["cout"].sum()
+            total = stockage.cout_total()
             st.metric("Coût total des séances", f"{total:.2f} €")
 
+            # Contrôle des agrégats incrémentaux (recalcul complet, à la demande)
+            if st.button("Vérifier la cohérence des totaux"):
+                ecarts = stockage.verifier_budget()
+                if ecarts:
+                    st.error(f"{len(ecarts)} écart(s) entre les totaux et un recalcul complet")
+                    st.dataframe(
+                        pd.DataFrame(ecarts, columns=["Axe", "Clé", "Attendu", "Tenu"]).astype({"Clé": str}),
+                        hide_index=True
+                    )
+                else:
+                    st.success("Les totaux correspondent au recalcul complet")
+
     # Onglet Export
     elif onglet == "Export":
         st.title("Exporter les données")
 
         # Export Excel
         st.subheader("Export Excel")
+        col1, col2 = st.columns(2)
+        with col1:
+            filtrer_periode = st.checkbox("Limiter à une période", key="export_filtre_periode")
+            periode = st.date_input(
+                "Période exportée",
+                value=(date.today() - timedelta(days=365), date.today()),
+                disabled=not filtrer_periode,
+                key="export_periode"
+            )
+        with col2:
+            promotion = st.selectbox(
+                "Promotion exportée",
+                options=[None] + [(p["id"], p["nom"]) for p in data["promotions"]],
+                format_func=lambda x: x[1] if x else "Toutes les promotions",
+                key="export_promotion"
+            )
+        debut_export = fin_export = None
+        if filtrer_periode and periode:
+            debut_export = periode[0]
+            fin_export = periode[1] if len(periode) > 1 else periode[0]
+        promo_export = promotion[0] if promotion else None
+
         if st.button("Générer le fichier Excel"):
             try:
-                with pd.ExcelWriter('export_planification.xlsx') as writer:
-                    if data["enseignants"]:
-                        pd.DataFrame(data["enseignants"]).to_excel(writer, sheet_name="Enseignants", index=False)
-                    if data["sessions"]:
-                        pd.DataFrame(data["sessions"]).to_excel(writer, sheet_name="Sessions", index=False)
-                    if data["promotions"]:
-                        pd.DataFrame(data["promotions"]).to_excel(writer, sheet_name="Promotions", index=False)
-                    if data["groupes"]:
-                        pd.DataFrame(data["groupes"]).to_excel(writer, sheet_name="Groupes", index=False)
-                    if data["seances"]:
-                        pd.DataFrame(data["seances"]).to_excel(writer, sheet_name="Séances", index=False)
-
-                with open('export_planification.xlsx', 'rb') as f:
-                    st.download_button(
-                        label="Télécharger le fichier Excel",
-                        data=f,
-                        file_name='export_planification.xlsx',
-                        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                    )
+                # Construit en mémoire, une fois par version des données et par filtre
+                contenu = get_cache_exports().obtenir(
+                    ("excel", debut_export, fin_export, promo_export),
+                    get_stockage().version,
+                    lambda: exporter_excel(get_stockage(), debut_export, fin_export, promo_export)
+                )
+                st.download_button(
+                    label="Télécharger le fichier Excel",
+                    data=contenu,
+                    file_name='export_planification.xlsx',
+                    mime=TYPE_MIME
+                )
             except Exception as e:
                 st.error(f"Erreur lors de l'export Excel: {str(e)}")
 
+        # Calendriers ICS (abonnement via planning.serveur_ics, ou téléchargement)
+        st.subheader("Calendriers (ICS)")
+        col1, col2 = st.columns(2)
+        with col1:
+            type_flux = st.selectbox(
+                "Calendrier de",
+                options=["enseignant", "groupe", "promotion", "session"],
+                format_func=str.capitalize,
+                key="type_flux_ics"
+            )
+        collection = COLLECTIONS_PAR_TYPE[type_flux]
+        with col2:
+            entite = st.selectbox(
+                "Choix",
+                options=[(e["id"], libelle(collection, e)) for e in data[collection]],
+                format_func=lambda x: x[1],
+                key="entite_flux_ics"
+            )
+        if entite:
+            contenu, _ = get_flux_ics().flux(type_flux, entite[0])
+            st.download_button(
+                label="Télécharger le calendrier",
+                data=contenu,
+                file_name=f"planning_{type_flux}_{entite[0]}.ics",
+                mime=TYPE_MIME_ICS
+            )
+            url_ics = os.environ.get("PLANNING_ICS_URL")
+            if url_ics:
+                st.caption("Adresse d'abonnement :")
+                st.code(f"{url_ics.rstrip('/')}/{type_flux}/{entite[0]}.ics")
+
         # Sauvegarde/Restauration
         st.subheader("Sauvegarde des données")
         col1, col2 = st.columns(2)
@@ -775,27 +1345,44 @@ def main():
         with col1:
             st.write("Télécharger une sauvegarde complète")
             if st.button("Générer la sauvegarde"):
-                with open('data/sauvegardes.json', 'r', encoding='utf-8') as f:
-                    st.download_button(
-                        label="Télécharger la sauvegarde",
-                        data=f,
-                        file_name='sauvegarde_planification.json',
-                        mime='application/json'
-                    )
+                # L'instantané sur disque ne contient pas le journal : on exporte l'état courant
+                st.download_button(
+                    label="Télécharger la sauvegarde",
+                    data=json.dumps(data, ensure_ascii=False, indent=4, default=dict),
+                    file_name='sauvegarde_planification.json',
+                    mime='application/json'
+                )
 
         with col2:
             st.write("Restaurer une sauvegarde")
             fichier = st.file_uploader("Importer un fichier JSON", type=['json'], key="import_json")
-            if fichier is not None:
+            if fichier is not None and st.button("Restaurer cette sauvegarde"):
+                # Lecture par morceaux et validation complète avant tout remplacement
                 try:
-                    contenu = fichier.getvalue().decode('utf-8')
-                    json.loads(contenu)  # Validation JSON
-                    with open('data/sauvegardes.json', 'w', encoding='utf-8') as f:
-                        f.write(contenu)
+                    restaurer_fichier(get_stockage(), fichier)
                     st.success("Sauvegarde restaurée avec succès!")
                     st.rerun()
+                except ErreurRestauration as e:
+                    st.error("Sauvegarde refusée, les données n'ont pas été modifiées :\n"
+                             + "\n".join(f"- {erreur}" for erreur in e.erreurs))
                 except Exception as e:
                     st.error(f"Erreur lors de la restauration: {str(e)}")
 
+            # Retour à un état antérieur (archivé à chaque restauration)
+            archives = get_stockage().archives()
+            if archives:
+                numero = st.selectbox(
+                    "Versions précédentes",
+                    options=[numero for numero, _ in archives],
+                    format_func=lambda n: datetime.fromtimestamp(os.path.getmtime(dict(archives)[n])).strftime('Avant la restauration du %d/%m/%Y à %H:%M')
+                )
+                if st.button("Revenir à cette version"):
+                    try:
+                        restaurer_archive(get_stockage(), numero)
+                        st.success("Version précédente restaurée avec succès!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Erreur lors de la restauration: {str(e)}")
+
 if __name__ == "__main__":
     main()